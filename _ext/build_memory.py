@@ -0,0 +1,351 @@
+"""
+Where the memory of a build goes: peak memory per build phase, per kind of work on
+the documents, per listener and per allocating module.
+
+An opt-in extension, loaded by conf.py when SPHINX_PROFILE includes "memory":
+
+    SPHINX_PROFILE=memory sphinx-build -b html . _build/html
+
+Two measures are taken, with the hooks of instrument.py:
+
+- the memory allocated by Python, traced with tracemalloc: the peak while each
+  piece of work runs, and how far above the memory in use when it started that
+  peak went (its "growth", what the work itself needed)
+- the resident memory (RSS) of the process, sampled every build_memory_interval
+  seconds while the work runs, which includes what C extensions allocate (lxml,
+  numpy, the images of the social cards); only on systems with /proc
+
+At the end of each phase, the allocations still traced are grouped by the module,
+or package, that made them, to show what holds the memory: the doctrees and
+environment (docutils, sphinx), the search index, the plotly figure of the
+translation statistics, the social cards (matplotlib)...
+
+Only what is allocated once tracing started is traced: with PYTHONTRACEMALLOC=1,
+tracemalloc starts with the interpreter and the imports are traced too. Tracing
+slows the build down, so compare reports with reports, not with normal builds.
+
+The report is written to _build/profile (or the directory in the build_memory_dir
+config value), as ``memory-<builder>-<language>.json``. Sizes are in bytes, so
+that reports of different runs, languages or commits can be compared:
+
+    python -m _ext.build_memory _build/profile/memory-*.json
+    python -m _ext.build_memory _build/profile/memory-*.json --baseline old/
+"""
+
+import argparse
+import json
+import os
+import sysconfig
+import threading
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from _ext.instrument import (
+    BASE_DIR,
+    PHASES,
+    instrument_build,
+    instrument_listeners,
+    report_path,
+)
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+    from sphinx.config import Config
+
+# Number of allocating modules listed for each phase
+TOP_MODULES = 15
+
+# Namespace packages, whose modules are named by their first two components
+NAMESPACE_PACKAGES = ("sphinxext", "sphinxcontrib", "_ext")
+
+STDLIB_DIR = Path(sysconfig.get_paths()["stdlib"])
+
+# The memory of the build running in this process, from its start to its report
+_memory: "BuildMemory | None" = None
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int | None:
+    """The resident memory of this process, None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def module_of(filename: str) -> str:
+    """The module or package that a file of an allocation traceback belongs to."""
+    path = Path(filename)
+    if "site-packages" in path.parts:
+        parts = path.parts[path.parts.index("site-packages") + 1 :]
+    elif path.is_relative_to(BASE_DIR):
+        parts = path.relative_to(BASE_DIR).parts
+    elif path.is_relative_to(STDLIB_DIR):
+        parts = path.relative_to(STDLIB_DIR).parts
+    else:
+        return filename
+    if not parts:
+        return filename
+    count = 2 if parts[0] in NAMESPACE_PACKAGES and len(parts) > 1 else 1
+    return ".".join(part.removesuffix(".py") for part in parts[:count])
+
+
+def top_modules(snapshot: tracemalloc.Snapshot, count: int) -> list[dict]:
+    """The modules holding the most traced memory in a snapshot."""
+    sizes: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    for statistic in snapshot.statistics("filename"):
+        module = module_of(statistic.traceback[0].filename)
+        sizes[module][0] += statistic.size
+        sizes[module][1] += statistic.count
+    largest = sorted(sizes.items(), key=lambda item: -item[1][0])[:count]
+    return [
+        {"module": module, "size": size, "blocks": blocks}
+        for module, (size, blocks) in largest
+    ]
+
+
+@dataclass
+class Frame:
+    """Memory of a piece of work being measured."""
+
+    start: int
+    peak: int
+    rss: int = 0
+
+
+class BuildMemory:
+    """Peak memory of the measured work, by category and name."""
+
+    def __init__(self, interval: float = 0.05, modules: int = TOP_MODULES):
+        self.modules = modules
+        # tracemalloc may have been started with the interpreter (PYTHONTRACEMALLOC)
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.stack: list[Frame] = []
+        self.peaks: dict[tuple[str, str], dict] = {}
+        self.phase_modules: dict[str, list[dict]] = {}
+        self.peak_rss = current_rss() or 0
+        self.stopped = threading.Event()
+        self.sampler = None
+        if interval > 0 and self.peak_rss:
+            self.sampler = threading.Thread(
+                target=self.sample_rss, args=(interval,), daemon=True
+            )
+            self.sampler.start()
+
+    def sample_rss(self, interval: float) -> None:
+        while not self.stopped.wait(interval):
+            self.record_rss()
+
+    def record_rss(self) -> None:
+        rss = current_rss() or 0
+        self.peak_rss = max(self.peak_rss, rss)
+        # A copy, the build thread pushes and pops frames meanwhile
+        for frame in list(self.stack):
+            frame.rss = max(frame.rss, rss)
+
+    @contextmanager
+    def measure(self, category: str, name: str) -> Iterator[None]:
+        current, peak = tracemalloc.get_traced_memory()
+        if self.stack:
+            # The peak counter is reset below, keep what it held for the caller
+            self.stack[-1].peak = max(self.stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        frame = Frame(start=current, peak=current)
+        self.stack.append(frame)
+        self.record_rss()
+        try:
+            yield
+        finally:
+            self.record_rss()
+            frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1].peak = max(self.stack[-1].peak, frame.peak)
+            self.record(category, name, frame)
+            if category == "phase":
+                self.phase_modules[name] = top_modules(
+                    tracemalloc.take_snapshot(), self.modules
+                )
+
+    def record(self, category: str, name: str, frame: Frame) -> None:
+        peaks = self.peaks.setdefault(
+            (category, name), {"calls": 0, "peak": 0, "growth": 0, "rss": 0}
+        )
+        peaks["calls"] += 1
+        peaks["peak"] = max(peaks["peak"], frame.peak)
+        peaks["growth"] = max(peaks["growth"], frame.peak - frame.start)
+        peaks["rss"] = max(peaks["rss"], frame.rss)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.sampler is not None:
+            self.sampler.join()
+        if self.started_tracing:
+            tracemalloc.stop()
+
+    def report(self) -> dict:
+        phases = {}
+        documents: dict[str, dict] = {}
+        listeners = []
+        for (category, name), peaks in self.peaks.items():
+            if category == "phase":
+                phases[name] = {
+                    **{key: peaks[key] for key in ("peak", "growth", "rss")},
+                    "modules": self.phase_modules.get(name, []),
+                }
+            elif category == "event":
+                event, _, handler = name.partition(" ")
+                listeners.append({"event": event, "listener": handler, **peaks})
+            else:
+                # The work on each document, kept for the document it peaked on
+                work = documents.setdefault(
+                    category, {"documents": 0, "peak": 0, "growth": 0, "rss": 0}
+                )
+                work["documents"] += 1
+                if peaks["growth"] >= work["growth"]:
+                    work["largest"] = name
+                for key in ("peak", "growth", "rss"):
+                    work[key] = max(work[key], peaks[key])
+        return {
+            "peak": max((peaks["peak"] for peaks in self.peaks.values()), default=0),
+            "rss": self.peak_rss,
+            "phases": dict(sorted(phases.items(), key=lambda item: _order(item[0]))),
+            "documents": documents,
+            "listeners": sorted(listeners, key=lambda item: -item["growth"]),
+        }
+
+
+def _order(phase: str) -> int:
+    names = list(PHASES.values())
+    return names.index(phase) if phase in names else len(names)
+
+
+def start_memory(app: "Sphinx", config: "Config") -> None:
+    global _memory
+
+    _memory = BuildMemory(config.build_memory_interval)
+
+
+def measure(category: str, name: str) -> AbstractContextManager:
+    """Measure with the memory of the build, once started."""
+    return _memory.measure(category, name) if _memory is not None else nullcontext()
+
+
+def instrument_builder(app: "Sphinx") -> None:
+    instrument_build(app, measure)
+
+
+def write_memory_report(app: "Sphinx", exception: Exception | None) -> None:
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.build_memory")
+
+    memory = _memory
+    memory.stop()
+    json_path = report_path(app, app.config.build_memory_dir, "memory", ".json")
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(
+        json.dumps(
+            {
+                "builder": app.builder.name,
+                "language": app.config.language or "en",
+                **memory.report(),
+            },
+            indent=2,
+        )
+    )
+    logger.info("Wrote the build memory report to %s", json_path)
+
+
+def setup(app: "Sphinx"):
+    global _memory
+
+    # A new build, in this process or another (see scripts/build/build_languages.py)
+    _memory = None
+    # Directory of the reports, _build/profile by default
+    app.add_config_value("build_memory_dir", "", "", types=(str,))
+    # Seconds between two samples of the resident memory, 0 to only sample it when
+    # a piece of work starts and ends
+    app.add_config_value("build_memory_interval", 0.05, "", types=(int, float))
+    # The listeners of the extensions loaded after this one are measured as they
+    # are connected, from when the configuration is read, and the builder once it
+    # exists
+    instrument_listeners(app, measure)
+    app.connect("config-inited", start_memory, priority=0)
+    app.connect("builder-inited", instrument_builder)
+    app.connect("build-finished", write_memory_report, priority=900)
+    return {
+        "version": "0.1",
+        "parallel_read_safe": False,
+        "parallel_write_safe": False,
+    }
+
+
+def megabytes(size: int) -> str:
+    return f"{size / 2**20:8.1f} MB"
+
+
+def summary(report: dict, baseline: dict | None = None) -> str:
+    """The peaks of a report as text, with the change from a baseline report."""
+
+    def line(label: str, size: int, base: int | None) -> str:
+        change = "" if base is None else f" ({(size - base) / 2**20:+7.1f} MB)"
+        return f"  {megabytes(size)}{change}  {label}"
+
+    def base(*keys):
+        value = baseline
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+
+    lines = [f"{report['builder']} build ({report['language']}):"]
+    lines.append(line("peak traced", report["peak"], base("peak")))
+    lines.append(line("peak resident", report["rss"], base("rss")))
+    for phase, peaks in report["phases"].items():
+        for key, label in (("peak", "peak"), ("rss", "resident")):
+            base_size = base("phases", phase, key)
+            lines.append(line(f"{phase} {label}", peaks[key], base_size))
+    for category, work in report["documents"].items():
+        label = f"{category} growth ({work.get('largest', '-')})"
+        base_size = base("documents", category, "growth")
+        lines.append(line(label, work["growth"], base_size))
+    for listener in report["listeners"][:5]:
+        label = f"{listener['event']} {listener['listener']}"
+        lines.append(line(label, listener["growth"], None))
+    if "read" in report["phases"]:
+        lines.append("  held at the end of reading:")
+        for module in report["phases"]["read"]["modules"][:10]:
+            lines.append(f"    {megabytes(module['size'])}  {module['module']}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Print the peak memory of build memory reports, compared to earlier ones."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("reports", type=Path, nargs="+")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="directory of earlier reports, compared with the reports of the same name",
+    )
+    args = parser.parse_args(argv)
+    for path in args.reports:
+        baseline = None
+        if args.baseline and (args.baseline / path.name).exists():
+            baseline = json.loads((args.baseline / path.name).read_text())
+        print(summary(json.loads(path.read_text()), baseline), end="\n\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+"""
+Where the time of a build goes: per build phase, per document and per listener.
+
+An opt-in extension, loaded by conf.py when SPHINX_PROFILE includes "timing":
+
+    SPHINX_PROFILE=timing sphinx-build -b html . _build/html
+
+At the end of the build, it writes to _build/profile (or the directory in the
+build_timing_dir config value):
+
+- ``timing-<builder>-<language>.json``: the time spent reading, resolving and
+  writing each document, and in each event listener
+- ``timing-<builder>-<language>.collapsed``: the same as collapsed stacks, one
+  ``phase;document;listener microseconds`` line per stack, for flamegraph tools
+  such as flamegraph.pl, speedscope or inferno
+
+The time of nested work is only counted once in the collapsed stacks: a listener
+called while a document is read is part of the time of that document, not added
+to it. Parallel builds (-j) are made serial, so that no time goes unrecorded.
+
+Print the slowest documents and listeners of a report with:
+
+    python -m _ext.build_timing _build/profile/timing-html-en.json --top 20
+"""
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from _ext.instrument import instrument_build, instrument_listeners, report_path
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+
+# The categories of the work done on each document, see instrument.py
+DOCUMENT_CATEGORIES = ("read", "pickle", "resolve", "write")
+
+# The timings of the build running in this process, from setup() to its report
+_timings: "BuildTimings | None" = None
+
+
+class BuildTimings:
+    """Wall time of the measured work, by category and name and by stack."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # Each frame is [label, time spent in the frames called from it]
+        self.stack: list[list] = []
+        self.self_time: dict[tuple[str, ...], float] = defaultdict(float)
+        self.totals: dict[tuple[str, str], float] = defaultdict(float)
+        self.calls: dict[tuple[str, str], int] = defaultdict(int)
+
+    @contextmanager
+    def measure(self, category: str, name: str) -> Iterator[None]:
+        frame = [name if category in ("phase", "event") else f"{category} {name}", 0.0]
+        self.stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            path = tuple(label for label, _ in self.stack)
+            self.stack.pop()
+            self.self_time[path] += elapsed - frame[1]
+            if self.stack:
+                self.stack[-1][1] += elapsed
+            # Recursive calls, such as write_doc_serialized calling write_doc in
+            # some builders, would be counted twice in the totals
+            if not any(label == frame[0] for label, _ in self.stack):
+                self.totals[(category, name)] += elapsed
+            self.calls[(category, name)] += 1
+
+    def report(self) -> dict:
+        documents = defaultdict(lambda: dict.fromkeys(DOCUMENT_CATEGORIES, 0.0))
+        listeners = []
+        phases = {}
+        for (category, name), seconds in self.totals.items():
+            if category in DOCUMENT_CATEGORIES:
+                documents[name][category] += seconds
+            elif category == "event":
+                event, _, handler = name.partition(" ")
+                listeners.append(
+                    {
+                        "event": event,
+                        "listener": handler,
+                        "calls": self.calls[(category, name)],
+                        "seconds": seconds,
+                    }
+                )
+            elif category == "phase":
+                phases[name] = seconds
+        for times in documents.values():
+            times["total"] = sum(times[category] for category in DOCUMENT_CATEGORIES)
+        return {
+            "seconds": time.perf_counter() - self.start,
+            "phases": phases,
+            "documents": dict(
+                sorted(documents.items(), key=lambda item: -item[1]["total"])
+            ),
+            "listeners": sorted(listeners, key=lambda item: -item["seconds"]),
+        }
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{';'.join(label.replace(';', ':') for label in path)} "
+            f"{round(seconds * 1e6)}\n"
+            for path, seconds in sorted(self.self_time.items())
+            if seconds > 0
+        )
+
+
+def start_timing(app: "Sphinx") -> None:
+    instrument_build(app, _timings.measure)
+
+
+def write_timing_report(app: "Sphinx", exception: Exception | None) -> None:
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.build_timing")
+
+    timings = _timings
+    json_path = report_path(app, app.config.build_timing_dir, "timing", ".json")
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(
+        json.dumps(
+            {
+                "builder": app.builder.name,
+                "language": app.config.language or "en",
+                **timings.report(),
+            },
+            indent=2,
+        )
+    )
+    json_path.with_suffix(".collapsed").write_text(timings.collapsed())
+    logger.info("Wrote the build timings to %s", json_path)
+
+
+def setup(app: "Sphinx"):
+    global _timings
+
+    # A new build, in this process or another (see scripts/build/build_languages.py)
+    _timings = BuildTimings()
+    # Directory of the reports, _build/profile by default
+    app.add_config_value("build_timing_dir", "", "", types=(str,))
+    # The listeners of the extensions loaded after this one are measured as they
+    # are connected, the builder once it exists
+    instrument_listeners(app, _timings.measure)
+    app.connect("builder-inited", start_timing)
+    app.connect("build-finished", write_timing_report, priority=900)
+    return {
+        "version": "0.1",
+        "parallel_read_safe": False,
+        "parallel_write_safe": False,
+    }
+
+
+def top(report: dict, count: int) -> str:
+    """The slowest documents and listeners of a report, as text."""
+    lines = [
+        f"{report['builder']} build ({report['language']}): "
+        f"{report['seconds']:.1f}s"
+    ]
+    for name, seconds in report["phases"].items():
+        lines.append(f"  {name:20} {seconds:8.2f}s")
+    lines.append(f"\nSlowest {count} documents (read / resolve / write):")
+    for name, times in list(report["documents"].items())[:count]:
+        lines.append(
+            f"  {times['total']:7.2f}s  {name}  ({times['read']:.2f} / "
+            f"{times['resolve']:.2f} / {times['write']:.2f})"
+        )
+    lines.append(f"\nSlowest {count} event listeners:")
+    for listener in report["listeners"][:count]:
+        lines.append(
+            f"  {listener['seconds']:7.2f}s  {listener['event']}  "
+            f"{listener['listener']}  ({listener['calls']} calls)"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Print the slowest documents and event listeners of build timing reports."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("reports", type=Path, nargs="+")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+    for path in args.reports:
+        print(top(json.loads(path.read_text()), args.top), end="\n\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
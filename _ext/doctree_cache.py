@@ -0,0 +1,185 @@
+"""
+Re-read only the pages whose content changed, whatever their modification times.
+
+Sphinx decides which pages to read again by comparing the modification time of
+each page (and of the files it depends on: included files, and the catalog of a
+translated build) with the time it last read it. A git checkout, a fresh clone
+with restored doctrees or a branch switched back and forth gives the files new
+times, and Sphinx reads their pages again although nothing changed.
+
+This extension records, next to the doctrees, a hash of what each page was read
+from: its source, the content of each file it depends on (the ``.po`` file
+rather than the ``.mo`` compiled from it, since the builds compile it again) and
+the language. When Sphinx finds a page changed by its times only, it is only
+read again if that hash changed too, and a page whose hash changed is read again
+whatever its times. Pages Sphinx reads again for any other reason (a new page, a
+changed configuration, a globbed toctree) are left alone, and the extensions
+adding pages to read once the list is drawn up, as html_gettext does, add them
+after the unchanged ones are taken out.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+    from sphinx.environment import BuildEnvironment
+
+HASHES_NAME = "content_hashes.json"
+# Bumped when the hashes change meaning, so older ones are discarded
+HASHES_VERSION = "1"
+
+# The pages Sphinx found changed, by their times, with the content they were last
+# read from, until they are taken out of the pages to read
+_unchanged: set[str] = set()
+
+
+class ContentHashes:
+    """The content hash of each page, hashing each file at most once."""
+
+    def __init__(self, env: "BuildEnvironment"):
+        from sphinx.util.i18n import CatalogRepository
+
+        self.env = env
+        self.files: dict[Path, str] = {}
+        # Sphinx only notes the catalog of a page as a dependency when it looks
+        # for the pages, not when it reads them, so it is looked up here
+        config = env.config
+        repo = CatalogRepository(
+            env.srcdir, config.locale_dirs, config.language, config.source_encoding
+        )
+        self.catalogs = {c.domain: Path(c.po_path) for c in repo.catalogs}
+
+    def file_hash(self, path: Path) -> str:
+        if path not in self.files:
+            try:
+                self.files[path] = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                self.files[path] = "missing"
+        return self.files[path]
+
+    def document_hash(self, docname: str) -> str:
+        from sphinx.util.i18n import docname_to_domain
+
+        srcdir = Path(self.env.srcdir)
+        digest = hashlib.sha256(f"{self.env.config.language}\n".encode())
+        files = {Path(self.env.doc2path(docname))}
+        # The .mo files are compiled from the catalogs again by each build
+        files.update(
+            Path(path)
+            for path in self.env.dependencies.get(docname, ())
+            if Path(path).suffix != ".mo"
+        )
+        domain = docname_to_domain(docname, self.env.config.gettext_compact)
+        if domain in self.catalogs:
+            files.add(self.catalogs[domain])
+        for path in sorted(files):
+            name = os.path.relpath(path, srcdir)
+            digest.update(f"{name}\0{self.file_hash(path)}\n".encode())
+        return digest.hexdigest()
+
+
+def hashes_path(env: "BuildEnvironment") -> Path:
+    return Path(env.doctreedir) / HASHES_NAME
+
+
+def load_hashes(path: Path) -> dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            recorded = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(recorded, dict) or recorded.get("version") != HASHES_VERSION:
+        return {}
+    return recorded.get("documents", {})
+
+
+def save_hashes(path: Path, documents: dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": HASHES_VERSION, "documents": documents}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def compare_hashes(
+    app: "Sphinx",
+    env: "BuildEnvironment",
+    added: set[str],
+    changed: set[str],
+    removed: set[str],
+) -> list[str]:
+    """
+    Note the pages Sphinx found changed but whose content is the same, and return
+    those whose content changed although their times did not.
+    """
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.doctree_cache")
+
+    _unchanged.clear()
+    recorded = load_hashes(hashes_path(env))
+    if not recorded:
+        return []
+    hashes = ContentHashes(env)
+    doctree_dir = Path(env.doctreedir)
+    # Pages with a globbed toctree are read again for the pages added or removed
+    globbed = env.glob_toctrees if added or removed else set()
+    _unchanged.update(
+        docname
+        for docname in changed - globbed
+        if docname not in env.reread_always
+        and (doctree_dir / f"{docname}.doctree").is_file()
+        and recorded.get(docname) == hashes.document_hash(docname)
+    )
+    outdated = sorted(
+        docname
+        for docname in env.found_docs & recorded.keys() - added - changed - removed
+        if recorded[docname] != hashes.document_hash(docname)
+    )
+    if outdated:
+        logger.info(
+            "%d page(s) with the same times but new content are read again",
+            len(outdated),
+        )
+    return outdated
+
+
+def skip_unchanged(app: "Sphinx", env: "BuildEnvironment", docnames: list[str]) -> None:
+    """Take the pages whose content did not change out of those to read."""
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.doctree_cache")
+
+    skipped = [docname for docname in docnames if docname in _unchanged]
+    # The list is the one Sphinx reads, which the event lets handlers edit in place
+    docnames[:] = [docname for docname in docnames if docname not in _unchanged]
+    _unchanged.clear()
+    if skipped:
+        logger.info(
+            "%d page(s) with new times but the same content are not read again",
+            len(skipped),
+        )
+
+
+def record_hashes(app: "Sphinx", env: "BuildEnvironment") -> list[str]:
+    """Record the content hash of every page, as the environment now has them."""
+    hashes = ContentHashes(env)
+    documents = {docname: hashes.document_hash(docname) for docname in env.all_docs}
+    save_hashes(hashes_path(env), dict(sorted(documents.items())))
+    return []
+
+
+def setup(app: "Sphinx"):
+    app.connect("env-get-outdated", compare_hashes)
+    # Before the extensions adding pages of their own to read
+    app.connect("env-before-read-docs", skip_unchanged, priority=100)
+    app.connect("env-updated", record_hashes)
+    return {
+        "version": "0.1",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
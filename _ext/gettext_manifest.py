@@ -0,0 +1,80 @@
+"""
+Keep the translation templates (.pot) of incremental gettext builds in step with
+the guide.
+
+The gettext builder only reads the pages that changed since its last build (the
+doctrees are kept in _build/gettext/.doctrees), and only rewrites the templates
+whose messages changed. What it never does is remove the template of a section
+or page that is gone, and sphinx-intl would keep creating a .po file for it in
+every locale.
+
+So at the end of each gettext build, this extension writes the list of templates
+the build made, and the pages each comes from, to ``<outdir>/manifest.json``, and
+removes the templates that are not in it. The templates left are the same as
+those of a build from scratch.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+
+MANIFEST_NAME = "manifest.json"
+
+
+def catalog_manifest(app: "Sphinx") -> dict[str, list[str]]:
+    """The templates of the build, each with the pages its messages come from."""
+    from sphinx.util.i18n import docname_to_domain
+
+    manifest = {domain: [] for domain in app.builder.catalogs}
+    for docname in sorted(app.env.found_docs):
+        domain = docname_to_domain(docname, app.config.gettext_compact)
+        manifest.setdefault(domain, []).append(docname)
+    return dict(sorted(manifest.items()))
+
+
+def orphan_templates(outdir: Path, manifest: dict[str, list[str]]) -> list[Path]:
+    """The templates in the output directory that the build did not make."""
+    doctree_dir = outdir / ".doctrees"
+    return sorted(
+        path
+        for path in outdir.rglob("*.pot")
+        if not path.is_relative_to(doctree_dir)
+        and path.relative_to(outdir).with_suffix("").as_posix() not in manifest
+    )
+
+
+def write_manifest(outdir: Path, manifest: dict[str, list[str]]) -> Path:
+    path = outdir / MANIFEST_NAME
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps({"catalogs": manifest}, indent=2))
+    os.replace(tmp_path, path)
+    return path
+
+
+def prune_templates(app: "Sphinx", exception: Exception | None) -> None:
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.gettext_manifest")
+
+    # A failed build may not have written every template
+    if exception is not None or app.builder.name != "gettext":
+        return
+    outdir = Path(app.outdir)
+    manifest = catalog_manifest(app)
+    write_manifest(outdir, manifest)
+    for path in orphan_templates(outdir, manifest):
+        logger.info("Removing the orphan template %s", path.relative_to(outdir))
+        path.unlink()
+
+
+def setup(app: "Sphinx"):
+    app.connect("build-finished", prune_templates)
+    return {
+        "version": "0.1",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,119 @@
+"""
+When each file was last changed, according to git.
+
+The dates of every file come from a single ``git log`` pass, cached by the commit
+checked out, so that pages can be dated by their last commit rather than by the
+modification time of their file, which a fresh checkout sets to the checkout time.
+"""
+
+import json
+import os
+import subprocess
+from collections.abc import Sequence
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # Repository base directory
+CACHE_DIR = Path(os.environ.get("SPHINX_CACHE_DIR", BASE_DIR / "_build" / ".cache"))
+CACHE_PATH = CACHE_DIR / "git_dates.json"
+
+# The dates already read in this process, by repository, HEAD and pathspec
+_loaded_dates: dict[tuple[str, str, tuple[str, ...]], dict[str, int]] = {}
+
+
+def last_commit_dates(
+    repo: Path, pathspec: Sequence[str] = (), cache_path: Path | None = CACHE_PATH
+) -> dict[str, int] | None:
+    """
+    Map each file to the time of the last commit that changed it.
+
+    Parameters
+    ----------
+    repo : Path
+        A directory in a git checkout. The files are relative to it.
+    pathspec : sequence of str, optional
+        Only date the files that match, such as ``["tutorials"]``.
+    cache_path : Path, optional
+        JSON file the dates are kept in until HEAD changes, or ``None`` to not
+        cache them.
+
+    Returns
+    -------
+    dict or None
+        The commit time of each file, in seconds since the epoch, or ``None`` when
+        git or its history is not available. Files never committed are missing.
+    """
+    head = _git(repo, "rev-parse", "HEAD")
+    if head is None:
+        return None
+    key = (str(Path(repo).resolve()), head.strip(), tuple(pathspec))
+    if key in _loaded_dates:
+        return _loaded_dates[key]
+
+    cached = _load_cache(cache_path) if cache_path is not None else {}
+    cache_key = [*key[:2], list(pathspec)]  # As it reads back from JSON
+    if cached.get("key") == cache_key:
+        dates = cached["dates"]
+    else:
+        dates = _read_log(repo, pathspec)
+        if dates is None:
+            return None
+        if cache_path is not None:
+            _save_cache({"key": cache_key, "dates": dates}, cache_path)
+    _loaded_dates[key] = dates
+    return dates
+
+
+def _read_log(repo: Path, pathspec: Sequence[str]) -> dict[str, int] | None:
+    """The dates from one pass over the history, newest commit first."""
+    # A NUL starts each commit's time, which no file name can
+    output = _git(
+        repo,
+        "-c",
+        "core.quotepath=off",
+        "log",
+        "--format=%x00%ct",
+        "--name-only",
+        "--relative",
+        "--",
+        *pathspec,
+    )
+    if output is None:
+        return None
+    dates = {}
+    commit_time = 0
+    for line in output.splitlines():
+        if line.startswith("\0"):
+            commit_time = int(line[1:])
+        elif line:
+            # The newest commit that changed a file comes first
+            dates.setdefault(line, commit_time)
+    return dates
+
+
+def _git(repo: Path, *args: str) -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=repo,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
+def _load_cache(cache_path: Path) -> dict:
+    try:
+        return json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: dict, cache_path: Path) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(cache))
+    os.replace(tmp_path, cache_path)
@@ -0,0 +1,116 @@
+"""
+Let the gettext builds reuse the doctrees of the English HTML build, rather than
+read every page again.
+
+The gettext builder reads the pages as the HTML builder does, except that it
+marks each translatable node with an id (its doctree "versioning"), without
+which its messages are not extracted. Sphinx does not let builders with
+different versionings share a doctree directory, so this extension gives the
+HTML builder the versioning of gettext. A gettext build pointed at the doctrees
+of the HTML build then only reads the pages changed since, and writes the same
+templates as a gettext build of its own:
+
+    sphinx-build -b html . _build/html
+    sphinx-build -b gettext -d _build/html/.doctrees . _build/gettext
+
+Sphinx removes the placeholders of translatable inline text (the content of
+``versionadded`` or of the fields of an object description) while reading, for
+any builder but gettext. They are kept in the doctrees here, and removed once
+each page is resolved instead, so the gettext builds still find their messages.
+Sphinx also counts the translation progress of each page for any builder but
+gettext, so the pages last read by a gettext build are read again by the next
+HTML build rather than written from those doctrees.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from docutils import nodes
+from sphinx.builders.html import StandaloneHTMLBuilder
+from sphinx.transforms import SphinxTransform
+from sphinx.util.nodes import NodeMatcher
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+    from sphinx.environment import BuildEnvironment
+
+# What the placeholders are marked with while in the doctrees, which Sphinx
+# does not remove as it does those marked "translatable"
+KEPT_TRANSLATABLE = "html_gettext_translatable"
+
+
+class HTMLBuilder(StandaloneHTMLBuilder):
+    """The HTML builder, reading the pages with the versioning of gettext."""
+
+    versioning_method = "text"
+
+
+class KeepTranslatableInline(SphinxTransform):
+    """Keep the placeholders of translatable inline text in the doctrees."""
+
+    # Just before Sphinx's RemoveTranslatableInline
+    default_priority = 998
+
+    def apply(self, **kwargs: Any) -> None:
+        matcher = NodeMatcher(nodes.inline, translatable=Any)
+        for inline in matcher.findall(self.document):
+            inline[KEPT_TRANSLATABLE] = inline.attributes.pop("translatable")
+
+
+def resolve_translatable_inline(
+    app: "Sphinx", doctree: nodes.document, docname: str
+) -> None:
+    """Give the placeholders back to gettext, remove them for the other builders."""
+    matcher = NodeMatcher(nodes.inline, **{KEPT_TRANSLATABLE: Any})
+    for inline in list(matcher.findall(doctree)):
+        if app.builder.name == "gettext":
+            inline["translatable"] = inline.attributes.pop(KEPT_TRANSLATABLE)
+        else:
+            # As RemoveTranslatableInline does
+            parent = inline.parent
+            parent.remove(inline)
+            parent += inline.children
+
+
+def _read_by_gettext(env: "BuildEnvironment") -> set[str]:
+    if not hasattr(env, "html_gettext_read_by_gettext"):
+        env.html_gettext_read_by_gettext = set()
+    return env.html_gettext_read_by_gettext
+
+
+def note_read(app: "Sphinx", doctree: nodes.document) -> None:
+    if app.builder.name == "gettext":
+        _read_by_gettext(app.env).add(app.env.docname)
+
+
+def purge_doc(app: "Sphinx", env: "BuildEnvironment", docname: str) -> None:
+    _read_by_gettext(env).discard(docname)
+
+
+def merge_info(
+    app: "Sphinx", env: "BuildEnvironment", docnames: set[str], other
+) -> None:
+    _read_by_gettext(env).update(_read_by_gettext(other) & docnames)
+
+
+def read_again(app: "Sphinx", env: "BuildEnvironment", docnames: list[str]) -> None:
+    """Add the pages a gettext build read, for any other build to read them again."""
+    if app.builder.name == "gettext":
+        return
+    # After doctree_cache, which would take out those whose content is the same
+    docnames.extend(sorted(_read_by_gettext(env) & env.found_docs - set(docnames)))
+
+
+def setup(app: "Sphinx"):
+    app.add_builder(HTMLBuilder, override=True)
+    app.add_transform(KeepTranslatableInline)
+    app.connect("doctree-resolved", resolve_translatable_inline)
+    app.connect("doctree-read", note_read)
+    app.connect("env-purge-doc", purge_doc)
+    app.connect("env-merge-info", merge_info)
+    app.connect("env-before-read-docs", read_again)
+    return {
+        "version": "0.1",
+        "env_version": 1,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
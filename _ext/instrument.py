@@ -0,0 +1,123 @@
+"""
+Hooks for the opt-in build profilers (see build_timing.py and build_memory.py).
+
+A profiler provides a `Measure`: given a category and a name, a context manager
+wrapped around the work it names. `instrument_build` wraps the build phases and
+the reading, resolving, pickling and writing of each document with it, and
+`instrument_listeners` wraps each event listener as it is connected, so that the
+work of myst_nb, of the theme and of each extension is attributed to its own
+name. The profilers are loaded before the other extensions of conf.py for that;
+the listeners Sphinx connects for itself are counted in the work they are part of.
+
+Only the application being built and its builder are patched, nothing in the
+modules themselves.
+"""
+
+import functools
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeAlias
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # Repository base directory
+REPORT_DIR = BASE_DIR / "_build" / "profile"  # Default directory of the reports
+
+# The modules whose listeners are not measured: the profilers' own
+PROFILER_MODULES = ("_ext.build_timing", "_ext.build_memory", __name__)
+
+# Measure(category, name) returns a context manager around the work named
+Measure: TypeAlias = Callable[[str, str], AbstractContextManager]
+
+# The builder methods measured as a whole, each a phase of the build
+PHASES = {
+    "read": "read",
+    "write": "write",
+    "finish": "finish",
+    # Only HTML builders have this one, called while finishing
+    "dump_search_index": "search index",
+}
+
+# The builder methods called for each document, by category
+DOCUMENT_METHODS = {
+    "read_doc": "read",
+    "write_doctree": "pickle",
+    "write_doc_serialized": "write",
+    "write_doc": "write",
+}
+
+
+def _wrap(obj: Any, attr: str, measure: Measure, category: str, name=None) -> None:
+    """
+    Replace a method of an object by one measured under a category. The name is
+    given, or else the first argument of each call, such as the document name.
+    """
+    method = getattr(obj, attr)
+
+    @functools.wraps(method)
+    def measured(*args, **kwargs):
+        with measure(category, name if name is not None else str(args[0])):
+            return method(*args, **kwargs)
+
+    setattr(obj, attr, measured)
+
+
+def instrument_build(app: "Sphinx", measure: Measure) -> None:
+    """Measure the phases of the build and the work on each document."""
+    builder = app.builder
+    for attr, phase in PHASES.items():
+        if hasattr(builder, attr):
+            _wrap(builder, attr, measure, "phase", phase)
+    for attr, category in DOCUMENT_METHODS.items():
+        _wrap(builder, attr, measure, category)
+
+    # The environment is pickled at the end of the read phase, and a method patched
+    # on it would not pickle, so it is only patched once writing starts
+    def measure_resolving(app: "Sphinx", builder) -> None:
+        _wrap(app.env, "get_and_resolve_doctree", measure, "resolve")
+
+    app.connect("write-started", measure_resolving)
+
+
+def listener_name(handler: Callable) -> str:
+    # sphinx_design connects partials of its own functions
+    while isinstance(handler, functools.partial):
+        handler = handler.func
+    module = getattr(handler, "__module__", None) or "?"
+    qualname = getattr(handler, "__qualname__", None) or repr(handler)
+    return f"{module}.{qualname}"
+
+
+def instrument_listeners(app: "Sphinx", measure: Measure) -> None:
+    """
+    Measure each event listener connected from now on, but the profilers' own, as
+    "<event> <module.function>".
+    """
+    connect = app.connect
+
+    def measured_listener(event: str, callback: Callable) -> Callable:
+        name = f"{event} {listener_name(callback)}"
+
+        @functools.wraps(callback)
+        def measured(*args, **kwargs):
+            with measure("event", name):
+                return callback(*args, **kwargs)
+
+        return measured
+
+    @functools.wraps(connect)
+    def connect_measured(event: str, callback: Callable, priority: int = 500) -> int:
+        if getattr(callback, "__module__", None) not in PROFILER_MODULES:
+            callback = measured_listener(event, callback)
+        return connect(event, callback, priority)
+
+    app.connect = connect_measured
+
+
+def report_path(app: "Sphinx", directory: str, kind: str, suffix: str) -> Path:
+    """Where to write a report, one per profiler, builder and language."""
+    language = app.config.language or "en"
+    name = f"{kind}-{app.builder.name}-{language}{suffix}"
+    return (Path(directory) if directory else REPORT_DIR) / name
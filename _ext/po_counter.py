@@ -0,0 +1,208 @@
+"""
+Count the messages of a .po file without building a catalog.
+
+The counts follow `babel.messages.pofile.read_po`, which the translation stats
+were computed with before: the header and obsolete (``#~``) entries are not
+counted, fuzzy entries are never translated, and plural entries are always
+translated unless fuzzy (babel pads their ``msgstr[n]`` with empty strings,
+which still makes a non-empty tuple). Duplicate entries are merged as babel
+does: counted once, fuzzy if any of them is, translated if the first one is.
+"""
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+# Which string a continuation line (one that starts with a quote) extends
+_MSGID = 1
+_MSGSTR = 2
+_MSGCTXT = 3
+
+# What is known about a message once its entry is read
+_FUZZY = 1
+_TRANSLATED = 2
+_PLURAL = 4
+
+MessageKey = bytes | tuple[bytes, bytes]
+
+
+class MessageCounts(NamedTuple):
+    total: int
+    translated: int
+    fuzzy: int
+
+
+def count_messages(po_path: Path) -> MessageCounts:
+    """
+    Count the messages of a .po file, reading it one line at a time.
+
+    Parameters
+    ----------
+    po_path : Path
+        Path to the .po file.
+
+    Returns
+    -------
+    MessageCounts
+        The number of messages, of translated messages and of fuzzy messages.
+    """
+    with open(po_path, "rb") as f:
+        return count_message_lines(f)
+
+
+def count_message_lines(lines: Iterable[bytes]) -> MessageCounts:
+    """
+    Count the messages of a .po file given as lines, such as a blob read from git.
+    """
+    # Only the msgid (and msgctxt) of each message is kept, to merge duplicates
+    messages: dict[MessageKey, int] = {}
+    for key, state in _scan_entries(lines):
+        current = messages.get(key)
+        if current is None:
+            messages[key] = state
+        elif state & _PLURAL and not current & _PLURAL:
+            # babel replaces the string of a message when a duplicate adds plurals
+            messages[key] = state | (current & _FUZZY)
+        else:
+            messages[key] = current | (state & _FUZZY)
+
+    total = len(messages)
+    fuzzy = translated = 0
+    for state in messages.values():
+        if state & _FUZZY:
+            fuzzy += 1
+        elif state & _TRANSLATED:
+            translated += 1
+    return MessageCounts(total, translated, fuzzy)
+
+
+def _text(quoted: bytes) -> bytes:
+    """What is between the quotes of a quoted string from a .po file, still escaped."""
+    return quoted.strip()[1:-1]
+
+
+class _Entry:
+    """
+    What is needed to count the entry being read, reused from one entry to the next.
+
+    Only the msgid and msgctxt are kept, the number of msgid and msgstr keywords,
+    whether the first msgstr has any text, the fuzzy flag and whether the entry
+    is obsolete.
+    """
+
+    __slots__ = (
+        "msgid",
+        "msgctxt",
+        "ids",
+        "strings",
+        "string_filled",
+        "fuzzy",
+        "obsolete",
+        "field",
+    )
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.msgid = bytearray()
+        # None without a msgctxt keyword, which babel tells apart from msgctxt ""
+        self.msgctxt: bytearray | None = None
+        self.ids = 0
+        self.strings = 0
+        self.string_filled = False
+        self.fuzzy = False
+        self.obsolete = False
+        self.field = None
+
+    @property
+    def counted(self) -> bool:
+        """Whether the entry is a message, not the header nor an obsolete entry."""
+        return not self.obsolete and (self.ids > 1 or bool(self.msgid))
+
+    @property
+    def key(self) -> MessageKey:
+        """The msgid and msgctxt, which tell duplicate messages apart as in babel."""
+        if self.msgctxt is not None:
+            return bytes(self.msgid), bytes(self.msgctxt)
+        return bytes(self.msgid)
+
+    @property
+    def state(self) -> int:
+        state = _FUZZY if self.fuzzy else 0
+        if self.ids > 1:
+            state |= _PLURAL | _TRANSLATED
+        elif self.string_filled:
+            state |= _TRANSLATED
+        return state
+
+    def add_keyword(self, keyword: bytes, arg: bytes, obsolete: bool) -> None:
+        self.obsolete = obsolete
+        if keyword in (b"msgid", b"msgid_plural"):
+            self.ids += 1
+            self.field = _MSGID
+            if self.ids == 1:
+                self.msgid += _text(arg)
+        elif keyword == b"msgctxt":
+            self.field = _MSGCTXT
+            if self.msgctxt is None:
+                self.msgctxt = bytearray()
+            self.msgctxt += _text(arg)
+        elif keyword == b"msgstr" or keyword.startswith(b"msgstr["):
+            self.strings += 1
+            self.field = _MSGSTR
+            if self.strings == 1:
+                self.string_filled = bool(_text(arg))
+
+    def add_continuation(self, line: bytes) -> None:
+        # Only the text of the first msgid and msgstr matters (and of the msgctxt)
+        if self.field == _MSGID and self.ids == 1:
+            self.msgid += _text(line)
+        elif self.field == _MSGSTR and self.strings == 1:
+            self.string_filled = self.string_filled or bool(_text(line))
+        elif self.field == _MSGCTXT:
+            self.msgctxt += _text(line)
+
+
+def _scan_entries(lines: Iterable[bytes]) -> Iterator[tuple[MessageKey, int]]:
+    """
+    Yield the key and state of each counted entry among the lines of a .po file.
+
+    As in babel, an entry ends at the next ``msgid`` or ``msgctxt`` keyword, at
+    the next comment or at the end of the file, but not at a blank line.
+    """
+    entry = _Entry()
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        obsolete = line[:2] == b"#~"
+        if obsolete:
+            line = line[2:].lstrip()
+            if not line:
+                continue
+        elif line[:1] == b"#":
+            # Comments belong to the entry that follows them
+            if entry.ids:
+                if entry.counted:
+                    yield entry.key, entry.state
+                entry.reset()
+            if line[:2] == b"#,":
+                flags = [flag.strip() for flag in line[2:].split(b",")]
+                entry.fuzzy = entry.fuzzy or b"fuzzy" in flags
+            continue
+
+        if line[:1] == b'"':
+            entry.add_continuation(line)
+            continue
+
+        keyword, _, arg = line.partition(b" ")
+        if keyword in (b"msgid", b"msgctxt") and entry.ids:
+            if entry.counted:
+                yield entry.key, entry.state
+            entry.reset()
+        entry.add_keyword(keyword, arg, obsolete)
+
+    if entry.ids and entry.counted:
+        yield entry.key, entry.state
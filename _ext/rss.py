@@ -1,17 +1,23 @@
 """
-Create an RSS feed of tutorials
+Create an RSS feed for each section of the guide, such as the tutorials
 
 Cribbed from: https://github.com/python/peps/blob/main/pep_sphinx_extensions/generate_rss.py
 """
 
-from dataclasses import dataclass, asdict
+import hashlib
+import json
+import os
+from dataclasses import dataclass, asdict, field
 from datetime import datetime, UTC
 from email.utils import format_datetime
 from html import escape
+from pathlib import Path
 from pprint import pformat
 from typing import TYPE_CHECKING
 from urllib.parse import urljoin
 
+from _ext.git_dates import last_commit_dates
+
 if TYPE_CHECKING:
     from sphinx.application import Sphinx
 
@@ -30,28 +36,38 @@ class RSSItem:
     author: str = "pyOpenSci"
 
     @classmethod
-    def from_meta(cls, page_name: str, meta: dict, app: "Sphinx") -> "RSSItem":
-        """Create from a page's metadata"""
-        url = urljoin(app.config.html_baseurl, app.builder.get_target_uri(page_name))
+    def from_meta(
+        cls, page_name: str, meta: dict, app: "Sphinx", dates: dict | None = None
+    ) -> "RSSItem":
+        """Create from a page's metadata, and the git dates of the source files"""
+        url = urljoin(base_url(app), app.builder.get_target_uri(page_name))
 
         # purposely don't use `get` here because we want to error if these fields are absent
         return RSSItem(
             title=meta[":og:title"],
             description=meta[":og:description"],
-            date=cls.get_date_updated(page_name, meta, app),
+            date=cls.get_date_updated(page_name, meta, app, dates),
             author=meta.get(":og:author", "pyOpenSci"),
             url=url,
         )
 
     @staticmethod
-    def get_date_updated(page_name: str, meta: dict, app: "Sphinx") -> datetime:
-        """if the page has an explicit date_updated, use that, otherwise get mtime"""
+    def get_date_updated(
+        page_name: str, meta: dict, app: "Sphinx", dates: dict | None = None
+    ) -> datetime:
+        """
+        if the page has an explicit date_updated, use that, otherwise the date of the
+        last commit that changed it, or its mtime if it was never committed
+        """
         if 'date_updated' in meta:
             return datetime.fromisoformat(meta['date_updated'])
+        source = page_name + ".md"
+        if dates and source in dates:
+            timestamp = dates[source]
         else:
-            page_path = app.srcdir / (page_name + ".md")
-            mtime = page_path.stat().st_mtime
-            return datetime.fromtimestamp(mtime)
+            timestamp = (app.srcdir / source).stat().st_mtime
+        # naive, in UTC, like the dates rendered by _format_rfc_2822
+        return datetime.fromtimestamp(timestamp, UTC).replace(tzinfo=None)
 
     def render(self) -> str:
         return f"""\
@@ -65,16 +81,34 @@ class RSSItem:
 </item>"""
 
 
+def build_date() -> datetime:
+    """
+    now, unless SOURCE_DATE_EPOCH pins it for a reproducible build (naive, in UTC)
+    see https://reproducible-builds.org/specs/source-date-epoch/
+    """
+    if epoch := os.environ.get("SOURCE_DATE_EPOCH"):
+        return datetime.fromtimestamp(int(epoch), UTC).replace(tzinfo=None)
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
 @dataclass
 class RSSFeed:
     items: list[RSSItem]
-    last_build_date: datetime = datetime.now()
+    last_build_date: datetime = field(default_factory=build_date)
     title: str = "pyOpenSci Tutorials"
     link: str = "https://www.pyopensci.org/python-package-guide/tutorials/intro.html"
     self_link: str = "https://www.pyopensci.org/python-package-guide/tutorials.rss"
     description: str = "A tutorial feed that lists metadata for the pyOpenSci Python packaging tutorials so we can automatically list them on our website."
     language: str = "en"
 
+    def digest(self) -> str:
+        """A hash of everything rendered but the build date, to tell if it changed"""
+        fields = asdict(self)
+        del fields["last_build_date"]
+        fields["items"].sort(key=lambda item: item["url"])
+        content = json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
     def render(self) -> str:
         items = sorted(self.items, key=lambda i: i.date, reverse=True)
         items = "\n".join([item.render() for item in items])
@@ -94,19 +128,99 @@ class RSSFeed:
         """
 
 
-def generate_tutorials_feed(app: "Sphinx"):
-    from sphinx.util import logging
+def base_url(app: "Sphinx") -> str:
+    """The URL of the build's output, each translation being in a subdirectory"""
+    language = app.config.language or "en"
+    if language == "en":
+        return app.config.html_baseurl
+    return urljoin(app.config.html_baseurl, f"{language}/")
 
-    logger = logging.getLogger("_ext.rss")
-    logger.info("Generating RSS feed for tutorials")
+
+def index_sections(metadata: dict, sections) -> dict[str, list[str]]:
+    """Group the pages of each section, in one pass over the pages' metadata"""
+    pages = {section: [] for section in sections}
+    for page_name in metadata:
+        section, sep, _ = page_name.partition("/")
+        if sep and section in pages:
+            pages[section].append(page_name)
+    return pages
+
+
+def build_feed(
+    app: "Sphinx", section: str, spec: dict, pages: list[str], dates: dict | None
+) -> RSSFeed:
+    """The feed of a section, as described in the rss_feeds config value"""
     metadata = app.builder.env.metadata
-    tutorials = [t for t in metadata if t.startswith("tutorials/")]
-    feed_items = [RSSItem.from_meta(t, metadata[t], app) for t in tutorials]
-    feed = RSSFeed(items=feed_items)
-    with open(app.outdir / "tutorials.rss", "w") as f:
-        f.write(feed.render())
-
-    logger.info(
-        f"Generated RSS feed for tutorials, wrote to {app.outdir / 'tutorials.rss'}"
+    return RSSFeed(
+        items=[RSSItem.from_meta(p, metadata[p], app, dates) for p in pages],
+        title=spec["title"],
+        link=urljoin(base_url(app), app.builder.get_target_uri(spec["index"])),
+        self_link=urljoin(base_url(app), f"{section}.rss"),
+        description=spec["description"],
+        language=app.config.language or "en",
     )
-    logger.debug(f"feed items: \n{pformat([asdict(item) for item in feed_items])}")
+
+
+def generate_feeds(app: "Sphinx", force: bool = False) -> list[Path]:
+    """
+    Write a <section>.rss feed for each section in the rss_feeds config value.
+
+    A feed is only rendered again when its items changed since it was written,
+    according to the digests kept with the doctrees of the build.
+    """
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.rss")
+    feeds = app.config.rss_feeds
+    pages = index_sections(app.builder.env.metadata, feeds)
+    # one git log for the pages of every feed, None outside of a git checkout
+    dates = last_commit_dates(app.srcdir, list(feeds)) if feeds else None
+
+    digests_path = Path(app.doctreedir) / "rss_digests.json"
+    try:
+        digests = json.loads(digests_path.read_text())
+    except (OSError, ValueError):
+        digests = {}
+
+    written = []
+    for section, spec in feeds.items():
+        feed = build_feed(app, section, spec, pages[section], dates)
+        digest = feed.digest()
+        out_path = Path(app.outdir) / f"{section}.rss"
+        if not force and digests.get(section) == digest and out_path.is_file():
+            logger.info(f"RSS feed {out_path} is up to date")
+            continue
+        _write_atomically(out_path, feed.render())
+        digests[section] = digest
+        written.append(out_path)
+        logger.info(f"Generated RSS feed for {section}, wrote to {out_path}")
+        logger.debug(f"feed items: \n{pformat([asdict(i) for i in feed.items])}")
+
+    if written:
+        _write_atomically(digests_path, json.dumps(digests, indent=2))
+    return written
+
+
+def write_feeds(app: "Sphinx", exception: Exception | None) -> None:
+    if exception is not None or app.builder.format != "html":
+        return
+    generate_feeds(app)
+
+
+def _write_atomically(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def setup(app: "Sphinx"):
+    # {section: {"title": ..., "description": ..., "index": page of the <link>}}
+    app.add_config_value("rss_feeds", {}, "html", types=(dict,))
+    app.connect("build-finished", write_feeds)
+    return {
+        "version": "0.1",
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,137 @@
+"""Tests for the build memory profiler."""
+
+from __future__ import annotations
+
+import json
+import sysconfig
+import tracemalloc
+
+import pytest
+
+from _ext import build_memory
+from _ext.build_memory import BuildMemory, module_of
+from _ext.instrument import BASE_DIR
+
+MB = 2**20
+
+
+@pytest.fixture
+def memory():
+    memory = BuildMemory(interval=0)
+    yield memory
+    memory.stop()
+
+
+def test_peaks_of_nested_work(memory):
+    with memory.measure("phase", "read"):
+        with memory.measure("read", "index"):
+            kept = bytearray(4 * MB)
+            with memory.measure("event", "doctree-read ext.listener"):
+                temporary = bytearray(8 * MB)
+                del temporary
+        with memory.measure("read", "intro"):
+            pass
+
+    read = memory.peaks[("read", "index")]
+    listener = memory.peaks[("event", "doctree-read ext.listener")]
+    assert 8 * MB <= listener["growth"] < 9 * MB
+    # The listener's peak is part of the peak of the document and phase around it
+    assert 12 * MB <= read["growth"] < 13 * MB
+    assert memory.peaks[("phase", "read")]["peak"] >= listener["peak"]
+    # What the document kept is held when the next one starts, but not its growth
+    assert memory.peaks[("read", "intro")]["growth"] < MB
+    assert memory.peaks[("read", "intro")]["peak"] >= 4 * MB
+    del kept
+
+
+def test_report(memory):
+    with memory.measure("phase", "write"):
+        with memory.measure("write", "small"):
+            pass
+        with memory.measure("write", "large"):
+            data = bytearray(2 * MB)
+            del data
+    with memory.measure("phase", "read"):
+        pass
+
+    report = memory.report()
+
+    assert list(report["phases"]) == ["read", "write"]
+    assert report["documents"]["write"]["documents"] == 2
+    assert report["documents"]["write"]["largest"] == "large"
+    assert report["documents"]["write"]["growth"] >= 2 * MB
+    assert report["peak"] >= report["phases"]["write"]["peak"]
+    modules = report["phases"]["write"]["modules"]
+    assert modules and all(module["size"] > 0 for module in modules)
+    json.dumps(report)
+
+
+def test_stops_only_the_tracing_it_started():
+    tracemalloc.start()
+    try:
+        BuildMemory(interval=0).stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    BuildMemory(interval=0).stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_build_report_names_the_listeners_of_the_extensions(tmp_path, sphinx_project):
+    profile_dir = tmp_path / "profile"
+    project = sphinx_project(
+        {"index": "Index\n=====\n\nSome text.\n"},
+        extensions=["_ext.build_memory", "sphinx_design"],
+        conf=f"build_memory_dir = {str(profile_dir)!r}\nbuild_memory_interval = 0\n",
+    )
+    project.build()
+
+    report = json.loads((profile_dir / "memory-html-en.json").read_text())
+    listeners = [item["listener"] for item in report["listeners"]]
+    assert any(name.startswith("sphinx_design.") for name in listeners)
+    assert not any(name.startswith("_ext.build_memory.") for name in listeners)
+    assert set(report["phases"]) >= {"read", "write", "finish"}
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize(
+    "filename, module",
+    [
+        ("/venv/lib/python3.11/site-packages/plotly/io/_html.py", "plotly"),
+        (
+            "/venv/lib/site-packages/sphinxext/opengraph/_social_cards.py",
+            "sphinxext.opengraph",
+        ),
+        (str(BASE_DIR / "_ext" / "translation_graph.py"), "_ext.translation_graph"),
+        (str(BASE_DIR / "conf.py"), "conf"),
+        (sysconfig.get_paths()["stdlib"] + "/json/decoder.py", "json"),
+        ("<frozen importlib._bootstrap>", "<frozen importlib._bootstrap>"),
+    ],
+)
+def test_module_of(filename, module):
+    assert module_of(filename) == module
+
+
+def test_summary_compares_with_the_baseline(tmp_path, capsys):
+    def report(peak):
+        phase = {"peak": peak, "growth": 0, "rss": 0, "modules": []}
+        return {
+            "builder": "html",
+            "language": "es",
+            "peak": peak,
+            "rss": 0,
+            "phases": {"read": phase},
+            "documents": {},
+            "listeners": [],
+        }
+
+    (tmp_path / "old").mkdir()
+    (tmp_path / "old" / "memory-html-es.json").write_text(json.dumps(report(MB)))
+    path = tmp_path / "memory-html-es.json"
+    path.write_text(json.dumps(report(3 * MB)))
+
+    assert build_memory.main([str(path), "--baseline", str(tmp_path / "old")]) == 0
+
+    output = capsys.readouterr().out
+    assert "3.0 MB (   +2.0 MB)  peak traced" in output
+    assert "3.0 MB (   +2.0 MB)  read peak" in output
@@ -0,0 +1,137 @@
+"""Tests for the build timing instrumentation."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+from _ext import build_timing
+from _ext.build_timing import BuildTimings
+from _ext.instrument import instrument_listeners
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def timed_build(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(build_timing.time, "perf_counter", clock)
+    timings = BuildTimings()
+    with timings.measure("phase", "read"):
+        with timings.measure("read", "index"):
+            clock.now += 1
+            with timings.measure("event", "doctree-read ext.listener"):
+                clock.now += 2
+        with timings.measure("read", "intro"):
+            clock.now += 0.5
+    with timings.measure("phase", "write"):
+        with timings.measure("write", "index"):
+            clock.now += 0.25
+    return timings
+
+
+def test_nested_work_is_counted_once_in_the_collapsed_stacks(monkeypatch):
+    collapsed = timed_build(monkeypatch).collapsed()
+
+    assert collapsed.splitlines() == [
+        "read;read index 1000000",
+        "read;read index;doctree-read ext.listener 2000000",
+        "read;read intro 500000",
+        "write;write index 250000",
+    ]
+    total = sum(int(line.rsplit(" ", 1)[1]) for line in collapsed.splitlines())
+    assert total == 3_750_000
+
+
+def test_report_times_documents_listeners_and_phases(monkeypatch):
+    report = timed_build(monkeypatch).report()
+
+    assert report["phases"] == {"read": 3.5, "write": 0.25}
+    assert list(report["documents"]) == ["index", "intro"]
+    assert report["documents"]["index"] == {
+        "read": 3.0,
+        "pickle": 0.0,
+        "resolve": 0.0,
+        "write": 0.25,
+        "total": 3.25,
+    }
+    assert report["listeners"] == [
+        {"event": "doctree-read", "listener": "ext.listener", "calls": 1, "seconds": 2}
+    ]
+
+
+def test_recursive_calls_are_not_counted_twice(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(build_timing.time, "perf_counter", clock)
+    timings = BuildTimings()
+    with timings.measure("write", "index"):
+        with timings.measure("write", "index"):
+            clock.now += 1
+
+    assert timings.report()["documents"]["index"]["write"] == 1
+    assert timings.calls[("write", "index")] == 2
+
+
+def test_listeners_are_measured_as_they_are_connected():
+    def listener(app, docname):
+        return docname.upper()
+
+    def own_listener(app):
+        pass
+
+    own_listener.__module__ = "_ext.build_timing"
+    connected = []
+
+    def connect(event, callback, priority=500):
+        connected.append((event, callback, priority))
+        return len(connected)
+
+    app = SimpleNamespace(connect=connect)
+    timings = BuildTimings()
+
+    instrument_listeners(app, timings.measure)
+    assert app.connect("source-read", listener, priority=400) == 1
+    app.connect("builder-inited", own_listener)
+
+    [(_, measured, priority), (_, own, _)] = connected
+    assert measured(app, "index") == "INDEX"
+    assert priority == 400
+    assert own is own_listener
+    name = f"source-read {__name__}.test_listeners_are_measured_as_they_are_connected"
+    assert timings.calls == {("event", f"{name}.<locals>.listener"): 1}
+
+
+def test_build_report_names_the_listeners_of_the_extensions(tmp_path, sphinx_project):
+    profile_dir = tmp_path / "profile"
+    project = sphinx_project(
+        {"index": "Index\n=====\n\nSome text.\n"},
+        extensions=["_ext.build_timing", "sphinx_design"],
+        conf=f"build_timing_dir = {str(profile_dir)!r}\n",
+    )
+    project.build()
+
+    report = json.loads((profile_dir / "timing-html-en.json").read_text())
+    listeners = [item["listener"] for item in report["listeners"]]
+    assert any(name.startswith("sphinx_design.") for name in listeners)
+    assert not any(name.startswith("_ext.build_timing.") for name in listeners)
+    assert report["documents"]["index"]["read"] > 0
+    assert set(report["phases"]) >= {"read", "write", "finish"}
+
+
+def test_top_lists_the_slowest(monkeypatch, capsys, tmp_path):
+    report = {"builder": "html", "language": "en"}
+    report.update(timed_build(monkeypatch).report())
+    path = tmp_path / "timing-html-en.json"
+    path.write_text(json.dumps(report))
+
+    assert build_timing.main([str(path), "--top", "1"]) == 0
+
+    output = capsys.readouterr().out
+    assert "3.25s  index  (3.00 / 0.00 / 0.25)" in output
+    assert "intro" not in output
+    assert "doctree-read  ext.listener  (1 calls)" in output
@@ -0,0 +1,95 @@
+"""Tests for re-reading only the pages whose content changed."""
+
+from __future__ import annotations
+
+import os
+import time
+
+from _ext.doctree_cache import HASHES_NAME, load_hashes
+
+PO = """
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "First tip."
+msgstr "{translation}"
+"""
+PO_PATH = "locales/es/LC_MESSAGES/one.po"
+
+
+def make_project(sphinx_project, extensions=("_ext.doctree_cache",)):
+    return sphinx_project(
+        {
+            "index": "Index\n=====\n\n.. toctree::\n\n   one\n   two\n",
+            "one": "One\n===\n\nFirst tip.\n\n.. include:: tip.txt\n",
+            "two": "Two\n===\n\nSecond tip.\n",
+        },
+        {
+            "tip.txt": "Included tip.\n",
+            PO_PATH: PO.format(translation="Primer consejo."),
+        },
+        extensions=extensions,
+    )
+
+
+def touch(*paths, seconds=10):
+    later = time.time() + seconds
+    for path in paths:
+        os.utime(path, (later, later))
+
+
+def test_pages_with_new_times_but_the_same_content_are_not_read(sphinx_project):
+    project = make_project(sphinx_project)
+    srcdir, build = project.srcdir, project.build
+    assert build() == ["index", "one", "two"]
+    hashes = load_hashes(project.root / "html" / ".doctrees" / HASHES_NAME)
+    assert sorted(hashes) == ["index", "one", "two"]
+
+    # As after a checkout: every file is newer than the last build
+    touch(*srcdir.glob("*.*"))
+    assert build() == []
+    assert build() == []
+
+    (srcdir / "tip.txt").write_text("Another included tip.\n")
+    touch(srcdir / "two.rst")
+    assert build() == ["one"]
+
+
+def test_translated_pages_are_read_again_when_their_catalog_changes(sphinx_project):
+    project = make_project(sphinx_project)
+    po_path, build = project.srcdir / PO_PATH, project.build
+    assert build(language="es") == ["index", "one", "two"]
+
+    touch(po_path)  # The .mo is compiled again, with the same messages
+    assert build(language="es") == []
+
+    po_path.write_text(PO.format(translation="Un primer consejo."))
+    touch(po_path)
+    assert build(language="es") == ["one"]
+
+
+def test_pages_with_new_content_but_old_times_are_read(sphinx_project):
+    project = make_project(sphinx_project)
+    srcdir, build = project.srcdir, project.build
+    assert build() == ["index", "one", "two"]
+
+    # As when a file is restored with the time it had before the last build
+    (srcdir / "two.rst").write_text("Two\n===\n\nAnother tip.\n")
+    touch(srcdir / "two.rst", seconds=-3600)
+    assert build() == ["two"]
+    assert build() == []
+
+
+def test_pages_read_by_gettext_are_still_read_again(sphinx_project):
+    extensions = ["_ext.doctree_cache", "_ext.html_gettext"]
+    project = make_project(sphinx_project, extensions)
+    srcdir, build = project.srcdir, project.build
+    doctree_dir = project.root / "html" / ".doctrees"
+    assert build() == ["index", "one", "two"]
+    (srcdir / "one.rst").write_text("One\n===\n\nFirst tip, again.\n")
+    assert build("gettext", doctree_dir=doctree_dir) == ["one"]
+
+    touch(*srcdir.glob("*.*"))
+    assert build() == ["one"]
+    assert build() == []
@@ -0,0 +1,72 @@
+"""Tests for the manifest of the translation templates."""
+
+from __future__ import annotations
+
+import json
+
+from _ext.gettext_manifest import MANIFEST_NAME, orphan_templates
+
+EXTENSIONS = ["_ext.gettext_manifest"]
+
+
+def template_lines(path):
+    # The creation date is the only line that may differ between two builds
+    lines = path.read_text().splitlines()
+    return [line for line in lines if "POT-Creation-Date" not in line]
+
+
+def same_templates(first, second):
+    names = sorted(path.name for path in first.glob("*.pot"))
+    assert names == sorted(path.name for path in second.glob("*.pot"))
+    for name in names:
+        assert template_lines(first / name) == template_lines(second / name), name
+    return names
+
+
+def test_incremental_build_matches_a_clean_one(tmp_path, sphinx_project):
+    index = "Index\n=====\n\n.. toctree::\n\n   tips/one\n   tips/two\n   about\n"
+    project = sphinx_project(
+        {
+            "index": index,
+            "tips/one": "One\n===\n\nFirst tip.\n",
+            "tips/two": "Two\n===\n\nSecond tip.\n",
+            "about": "About\n=====\n\nAbout the guide.\n",
+        },
+        extensions=EXTENSIONS,
+    )
+    srcdir, outdir = project.srcdir, tmp_path / "gettext"
+    project.build("gettext")
+    manifest = json.loads((outdir / MANIFEST_NAME).read_text())["catalogs"]
+    assert manifest == {
+        "about": ["about"],
+        "index": ["index"],
+        "tips": ["tips/one", "tips/two"],
+    }
+    tips = outdir / "tips.pot"
+    tips_mtime = tips.stat().st_mtime_ns
+
+    (srcdir / "about.rst").unlink()
+    (srcdir / "index.rst").write_text(index.replace("   about\n", ""))
+    (srcdir / "tips" / "two.rst").write_text("Two\n===\n\nAnother second tip.\n")
+    project.build("gettext")
+    project.build("gettext", tmp_path / "clean")
+
+    assert same_templates(outdir, tmp_path / "clean") == ["index.pot", "tips.pot"]
+    assert not (outdir / "about.pot").exists()
+    assert "Another second tip." in tips.read_text()
+    assert tips.stat().st_mtime_ns != tips_mtime
+    # A build with nothing changed does not write the templates again
+    index_mtime = (outdir / "index.pot").stat().st_mtime_ns
+    project.build("gettext")
+    assert (outdir / "index.pot").stat().st_mtime_ns == index_mtime
+
+
+def test_orphans_are_the_templates_not_in_the_manifest(tmp_path):
+    for name in ("kept.pot", "gone.pot", "section/page.pot", ".doctrees/x.pot"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+    orphans = orphan_templates(tmp_path, {"kept": ["kept"], "section/page": []})
+
+    assert orphans == [tmp_path / "gone.pot"]
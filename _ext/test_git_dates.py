@@ -0,0 +1,88 @@
+"""Tests for the git dates of the RSS feed items."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from datetime import datetime
+from types import SimpleNamespace
+
+from _ext import git_dates
+from _ext.rss import RSSItem
+
+
+def commit(repo, timestamp, files):
+    for path, content in files.items():
+        path = repo / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    date = f"@{timestamp} +0000"
+    env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run(["git", "add", "-A"], cwd=repo, check=True)
+    subprocess.run(
+        [*git, "commit", "-q", "-m", "change"], cwd=repo, check=True, env=env
+    )
+
+
+def make_repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    commit(repo, 1000, {"tutorials/a.md": "a", "tutorials/b.md": "b", "index.md": "i"})
+    commit(repo, 2000, {"tutorials/b.md": "b, again"})
+    commit(repo, 3000, {"index.md": "i, again", "tutorials/ñ.md": "ñ"})
+    return repo
+
+
+def test_each_file_gets_the_time_of_its_last_commit(tmp_path):
+    repo = make_repo(tmp_path)
+    dates = git_dates.last_commit_dates(repo, cache_path=None)
+    assert dates == {
+        "index.md": 3000,
+        "tutorials/ñ.md": 3000,
+        "tutorials/b.md": 2000,
+        "tutorials/a.md": 1000,
+    }
+    tutorials = git_dates.last_commit_dates(repo / "tutorials", cache_path=None)
+    assert tutorials == {"ñ.md": 3000, "b.md": 2000, "a.md": 1000}
+
+
+def test_dates_are_cached_until_head_changes(tmp_path):
+    repo = make_repo(tmp_path)
+    cache_path = tmp_path / "git_dates.json"
+    git_dates.last_commit_dates(repo, ["tutorials"], cache_path)
+
+    # Doctor the cache, and forget what this process already read
+    cache = json.loads(cache_path.read_text())
+    cache["dates"]["tutorials/a.md"] = 1
+    cache_path.write_text(json.dumps(cache))
+    git_dates._loaded_dates.clear()
+    assert git_dates.last_commit_dates(repo, ["tutorials"], cache_path)[
+        "tutorials/a.md"
+    ] == 1
+
+    commit(repo, 4000, {"tutorials/c.md": "c"})
+    dates = git_dates.last_commit_dates(repo, ["tutorials"], cache_path)
+    assert dates["tutorials/a.md"] == 1000
+    assert dates["tutorials/c.md"] == 4000
+
+
+def test_no_dates_outside_of_git(tmp_path):
+    assert git_dates.last_commit_dates(tmp_path, cache_path=None) is None
+
+
+def test_feed_items_fall_back_to_mtime(tmp_path):
+    repo = make_repo(tmp_path)
+    (repo / "tutorials" / "new.md").write_text("not committed yet")
+    os.utime(repo / "tutorials" / "new.md", (5000, 5000))
+    app = SimpleNamespace(srcdir=repo)
+    dates = git_dates.last_commit_dates(repo, ["tutorials"], cache_path=None)
+
+    def date(page, meta={}):
+        return RSSItem.get_date_updated(page, meta, app, dates)
+
+    assert date("tutorials/b") == datetime(1970, 1, 1, 0, 33, 20)
+    assert date("tutorials/new") == datetime(1970, 1, 1, 1, 23, 20)
+    assert date("tutorials/a", {"date_updated": "2024-05-01"}) == datetime(2024, 5, 1)
@@ -0,0 +1,90 @@
+"""Tests for sharing the doctrees of the HTML build with the gettext builds."""
+
+from __future__ import annotations
+
+import json
+
+from _ext.gettext_manifest import MANIFEST_NAME
+
+EXTENSIONS = ["sphinx_design", "_ext.gettext_manifest", "_ext.html_gettext"]
+PAGES = {
+    "index": "Index\n=====\n\n.. toctree::\n\n   install\n",
+    "install": """Install
+=======
+
+.. tab-set::
+
+   .. tab-item:: On Linux
+
+      Use your package manager.
+
+   .. tab-item:: On Windows
+
+      Use the installer.
+
+.. only:: html
+
+   Only in the web pages.
+
+.. versionadded:: 1.0
+   The installer.
+""",
+}
+
+
+def template_lines(path):
+    lines = path.read_text().splitlines()
+    return [line for line in lines if "POT-Creation-Date" not in line]
+
+
+def test_templates_are_the_same_as_those_of_a_gettext_build(tmp_path, sphinx_project):
+    project = sphinx_project(PAGES, extensions=EXTENSIONS)
+    gettext_dir = tmp_path / "gettext"
+    project.build("gettext")
+
+    doctree_dir = tmp_path / "html" / ".doctrees"
+    assert project.build("html") == ["index", "install"]
+    templates_dir = tmp_path / "templates"
+    # Nothing changed since the HTML build read the pages
+    assert project.build("gettext", templates_dir, doctree_dir) == []
+
+    names = sorted(path.name for path in gettext_dir.glob("*.pot"))
+    assert names == ["index.pot", "install.pot"]
+    assert names == sorted(path.name for path in templates_dir.glob("*.pot"))
+    for name in names:
+        assert template_lines(templates_dir / name) == template_lines(
+            gettext_dir / name
+        ), name
+    install = (templates_dir / "install.pot").read_text()
+    assert 'msgid "On Windows"' in install
+    assert 'msgid "Only in the web pages."' in install
+    manifest = json.loads((templates_dir / MANIFEST_NAME).read_text())["catalogs"]
+    assert manifest["install"] == ["install"]
+
+
+def test_pages_read_by_gettext_are_read_again_by_html(tmp_path, sphinx_project):
+    project = sphinx_project(PAGES, extensions=EXTENSIONS)
+    html_dir = tmp_path / "html"
+    doctree_dir = html_dir / ".doctrees"
+    project.build("html")
+    plain_page = (html_dir / "install.html").read_text()
+
+    project.write("install.rst", PAGES["install"] + "\nOne more step.\n")
+    gettext_dir = tmp_path / "gettext"
+    assert project.build("gettext", doctree_dir=doctree_dir) == ["install"]
+    assert 'msgid "One more step."' in (gettext_dir / "install.pot").read_text()
+
+    assert project.build("html") == ["install"]
+    assert project.build("html") == []
+    page = (html_dir / "install.html").read_text()
+    assert page.replace("<p>One more step.</p>\n", "") == plain_page
+
+
+def test_the_pages_are_the_same_as_without_the_extension(tmp_path, sphinx_project):
+    pages = []
+    for name, extensions in [("with", EXTENSIONS), ("without", EXTENSIONS[:-1])]:
+        project = sphinx_project(PAGES, extensions=extensions, root=tmp_path / name)
+        project.build("html")
+        pages.append((project.root / "html" / "install.html").read_text())
+    assert "The installer." in pages[0]
+    assert pages[0] == pages[1]
@@ -0,0 +1,224 @@
+"""Tests that the streaming .po counter agrees with babel."""
+
+from __future__ import annotations
+
+import textwrap
+
+import pytest
+from babel.messages import pofile
+
+from _ext.po_counter import MessageCounts, count_messages
+from _ext.translation_graph import get_po_files
+
+# Enough to know what babel makes of the plural entries below
+HEADER = """\
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+"""
+
+
+def babel_counts(po_path) -> MessageCounts:
+    """The counts as the translation stats computed them with babel."""
+    with open(po_path, "r", encoding="utf-8") as f:
+        catalog = pofile.read_po(f, locale="es")
+    total = translated = fuzzy = 0
+    for message in catalog:
+        if message.id:
+            total += 1
+            if message.fuzzy:
+                fuzzy += 1
+            elif message.string:
+                translated += 1
+    return MessageCounts(total, translated, fuzzy)
+
+
+@pytest.mark.parametrize(
+    "po_path", get_po_files(), ids=lambda path: f"{path.parent.parent.name}/{path.name}"
+)
+def test_every_catalog_in_the_repository(po_path):
+    assert count_messages(po_path) == babel_counts(po_path)
+
+
+SYNTHETIC = {
+    "header only": "",
+    "translated and untranslated": """
+        msgid "One"
+        msgstr "Uno"
+
+        msgid "Two"
+        msgstr ""
+        """,
+    "fuzzy among other flags": """
+        #, python-format, fuzzy
+        msgid "Hello %s"
+        msgstr "Hola %s"
+
+        #,fuzzy
+        msgid "Bye"
+        msgstr ""
+        """,
+    "multi-line strings": """
+        msgid ""
+        "A long sentence "
+        "over two lines"
+        msgstr ""
+        "Una frase larga "
+        "en dos líneas"
+
+        msgid ""
+        "Not translated yet"
+        msgstr ""
+        ""
+        """,
+    "escaped quotes only": """
+        msgid "\\"quoted\\""
+        msgstr "\\"citado\\""
+
+        msgid "\\n"
+        msgstr ""
+        """,
+    "plural forms": """
+        msgid "one file"
+        msgid_plural "%d files"
+        msgstr[0] "un archivo"
+        msgstr[1] "%d archivos"
+
+        msgid "one page"
+        msgid_plural "%d pages"
+        msgstr[0] ""
+        msgstr[1] ""
+
+        #, fuzzy
+        msgid "one link"
+        msgid_plural "%d links"
+        msgstr[0] "un enlace"
+        msgstr[1] ""
+        """,
+    "context": """
+        msgctxt "menu"
+        msgid "Open"
+        msgstr "Abrir"
+
+        msgctxt "state"
+        msgid "Open"
+        msgstr ""
+        """,
+    "an empty context": """
+        msgid "Open"
+        msgstr "Abrir"
+
+        msgctxt ""
+        msgid "Open"
+        msgstr ""
+        """,
+    "obsolete entries": """
+        msgid "Kept"
+        msgstr "Guardado"
+
+        #~ msgid "Gone"
+        #~ msgstr "Ido"
+
+        #, fuzzy
+        #~ msgid "Gone too"
+        #~ msgstr ""
+        #~ "Ido también"
+        """,
+    "previous msgid of a fuzzy entry": """
+        #, fuzzy
+        #| msgid "Old text"
+        msgid "New text"
+        msgstr "Texto viejo"
+        """,
+    "comments end an entry, blank lines do not": """
+        msgid "First"
+
+        msgstr "Primero"
+        # translator comment
+        #: page.md:1
+        msgid "Second"
+        msgstr ""
+
+        "Segundo"
+        """,
+    "missing msgstr": """
+        msgid "Lonely"
+
+        msgid "Company"
+        msgstr "Compañía"
+        """,
+    "fuzzy header": """
+        #, fuzzy
+        msgid ""
+        msgstr "Content-Type: text/plain; charset=UTF-8\\n"
+
+        msgid "After the header"
+        msgstr "Tras la cabecera"
+        """,
+    "duplicates are merged": """
+        msgid "Twice"
+        msgstr "Dos veces"
+
+        #, fuzzy
+        msgid ""
+        "Twice"
+        msgstr ""
+
+        msgid "Untranslated twice"
+        msgstr ""
+
+        msgid "Untranslated twice"
+        msgstr "Traducido la segunda vez"
+
+        msgctxt "other"
+        msgid "Twice"
+        msgstr ""
+        """,
+    "a duplicate that adds plurals": """
+        msgid "file"
+        msgstr ""
+
+        msgid "file"
+        msgid_plural "files"
+        msgstr[0] ""
+        msgstr[1] ""
+        """,
+    "no trailing newline": """
+        msgid "Last"
+        msgstr "Último\"""",
+}
+
+
+@pytest.mark.parametrize("name", SYNTHETIC)
+def test_synthetic_catalogs(tmp_path, name):
+    po_path = tmp_path / "synthetic.po"
+    po_path.write_text(HEADER + textwrap.dedent(SYNTHETIC[name]), encoding="utf-8")
+    assert count_messages(po_path) == babel_counts(po_path)
+
+
+def test_counts_of_a_small_catalog(tmp_path):
+    """Babel agreeing is not enough if both are wrong."""
+    po_path = tmp_path / "small.po"
+    po_path.write_text(
+        HEADER
+        + textwrap.dedent(
+            """
+            msgid "One"
+            msgstr "Uno"
+
+            #, fuzzy
+            msgid "Two"
+            msgstr "Dos"
+
+            msgid "Three"
+            msgstr ""
+
+            #~ msgid "Four"
+            #~ msgstr "Cuatro"
+            """
+        ),
+        encoding="utf-8",
+    )
+    assert count_messages(po_path) == MessageCounts(total=3, translated=1, fuzzy=1)
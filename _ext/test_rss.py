@@ -0,0 +1,71 @@
+"""Tests for the RSS feeds of the sections of the guide."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from _ext import rss
+
+FEEDS = {
+    "tutorials": {"title": "Tutorials", "index": "tutorials/intro", "description": ""},
+    "tips": {"title": "Tips", "index": "tips/index", "description": ""},
+}
+
+
+def page(title):
+    return {
+        ":og:title": title,
+        ":og:description": f"About {title}",
+        "date_updated": "2024-01-01",
+    }
+
+
+def make_app(tmp_path, metadata, language="en"):
+    return SimpleNamespace(
+        config=SimpleNamespace(
+            html_baseurl="https://example.org/guide/",
+            language=language,
+            rss_feeds=FEEDS,
+        ),
+        builder=SimpleNamespace(
+            env=SimpleNamespace(metadata=metadata),
+            get_target_uri=lambda page: f"{page}.html",
+        ),
+        srcdir=tmp_path,
+        outdir=tmp_path / "html",
+        doctreedir=tmp_path / "doctrees",
+    )
+
+
+def test_pages_are_grouped_by_section():
+    metadata = {"tutorials/a": {}, "tips/b": {}, "tutorials/c": {}, "index": {}}
+    assert rss.index_sections(metadata, FEEDS) == {
+        "tutorials": ["tutorials/a", "tutorials/c"],
+        "tips": ["tips/b"],
+    }
+
+
+def test_feeds_are_only_written_when_their_items_change(tmp_path):
+    metadata = {"tutorials/a": page("A"), "tips/b": page("B")}
+    app = make_app(tmp_path, metadata)
+    assert rss.generate_feeds(app) == [
+        tmp_path / "html" / "tutorials.rss",
+        tmp_path / "html" / "tips.rss",
+    ]
+    assert rss.generate_feeds(app) == []
+
+    metadata["tips/b"] = page("B, renamed")
+    assert rss.generate_feeds(app) == [tmp_path / "html" / "tips.rss"]
+    assert "B, renamed" in (tmp_path / "html" / "tips.rss").read_text()
+
+    (tmp_path / "html" / "tutorials.rss").unlink()
+    assert rss.generate_feeds(app) == [tmp_path / "html" / "tutorials.rss"]
+
+
+def test_translations_link_to_their_own_pages(tmp_path):
+    app = make_app(tmp_path, {"tutorials/a": page("A")}, language="es")
+    rss.generate_feeds(app)
+    feed = (tmp_path / "html" / "tutorials.rss").read_text()
+    assert "<language>es</language>" in feed
+    assert "<link>https://example.org/guide/es/tutorials/a.html</link>" in feed
+    assert 'href="https://example.org/guide/es/tutorials.rss"' in feed
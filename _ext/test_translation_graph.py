@@ -0,0 +1,192 @@
+"""Tests for the translation graph extension."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Sphinx has always imported docutils by the time it loads an extension
+PRELOADED = "import docutils.nodes, docutils.parsers.rst"
+
+# What loading the extension may cost on top of that, in microseconds. It takes
+# about 20ms today; importing numpy alone takes longer than the whole budget.
+IMPORT_BUDGET_US = 60_000
+
+# Only a build that draws a graph (or parses .po files in parallel) needs these
+DEFERRED_MODULES = ["numpy", "plotly", "concurrent.futures.process"]
+
+
+class RecordingApp:
+    """Just enough of a Sphinx application to call setup()."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def import_time_us() -> int:
+    """The cumulative import time of the extension in a fresh interpreter."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"{PRELOADED}; import _ext.translation_graph",
+        ],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        _, cumulative, name = (part.strip() for part in line.split("|"))
+        if name == "_ext.translation_graph":
+            return int(cumulative)
+    raise AssertionError(f"no import time for the extension in:\n{result.stderr}")
+
+
+def test_loading_the_extension_stays_within_budget():
+    # The best of a few runs, so a busy machine does not fail the test
+    best = min(import_time_us() for _ in range(3))
+    assert best < IMPORT_BUDGET_US, f"importing took {best}us"
+
+
+def test_heavy_modules_are_only_imported_when_needed():
+    script = (
+        f"{PRELOADED}; import sys; import _ext.translation_graph as ext;"
+        "from _ext.test_translation_graph import RecordingApp;"
+        "ext.setup(RecordingApp());"
+        f"print(*[m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == []
+
+
+def write_catalog(path: Path, translated: int, untranslated: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entries = [f'msgid "Done {i}"\nmsgstr "Hecho {i}"\n' for i in range(translated)]
+    entries += [f'msgid "To do {i}"\nmsgstr ""\n' for i in range(untranslated)]
+    path.write_text("\n".join(entries))
+
+
+def make_locales(locales_dir: Path, modules: int) -> None:
+    for locale in ("es", "ja"):
+        for i in range(modules):
+            po_path = locales_dir / locale / "LC_MESSAGES" / f"module{i}.po"
+            write_catalog(po_path, translated=i, untranslated=modules - i)
+
+
+def test_pooled_stats_are_the_serial_stats(tmp_path):
+    from _ext import translation_graph as ext
+
+    locales_dir = tmp_path / "locales"
+    # Enough files for the pool to be used, in both locales
+    make_locales(locales_dir, ext.PARALLEL_MIN_FILES)
+    serial = ext.get_translation_stats(None, workers=1, locales_dir=locales_dir)
+    pooled = ext.get_translation_stats(None, workers=2, locales_dir=locales_dir)
+    assert pooled == serial
+    assert list(pooled["ja"]) == list(serial["ja"])
+    assert serial["es"]["module3"]["translated"] == 3
+
+
+def test_only_the_changed_catalogs_are_parsed_again(tmp_path, monkeypatch):
+    from _ext import translation_graph as ext
+
+    parsed = []
+    calculate = ext.calculate_translation_percentage
+
+    def recording_calculate(po_file):
+        parsed.append(po_file.relative_to(locales_dir).as_posix())
+        return calculate(po_file)
+
+    monkeypatch.setattr(ext, "calculate_translation_percentage", recording_calculate)
+    locales_dir = tmp_path / "locales"
+    cache_path = tmp_path / "cache" / "translation_stats.json"
+    make_locales(locales_dir, 3)
+
+    def stats():
+        parsed.clear()
+        return ext.get_translation_stats(cache_path, locales_dir=locales_dir)
+
+    first = stats()
+    assert len(parsed) == 6
+    assert stats() == first
+    assert parsed == []
+
+    write_catalog(locales_dir / "es" / "LC_MESSAGES" / "module0.po", 3, 0)
+    changed = stats()
+    assert parsed == ["es/LC_MESSAGES/module0.po"]
+    assert changed["es"]["module0"]["percentage"] == 100.0
+    assert changed["ja"] == first["ja"]
+
+    (locales_dir / "ja" / "LC_MESSAGES" / "module2.po").unlink()
+    assert "module2" not in stats()["ja"]
+    assert parsed == []
+    entries = ext.load_stats_cache(cache_path)
+    assert "ja/LC_MESSAGES/module2.po" not in entries
+
+    # Stats cached by another version of the extension are not used
+    cache_path.write_text('{"version": "0", "entries": {}}')
+    stats()
+    assert len(parsed) == 5
+
+
+def test_the_snapshot_is_only_written_when_the_catalogs_change(tmp_path):
+    from _ext import translation_graph as ext
+
+    snapshot_path = tmp_path / "snapshot.json"
+
+    def write_snapshot():
+        result = subprocess.run(
+            [sys.executable, "-m", "_ext.translation_graph", str(snapshot_path)],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout
+
+    assert write_snapshot().startswith("Wrote")
+    fingerprint = ext.po_fingerprint()
+    stats = ext.load_stats_snapshot(snapshot_path, fingerprint)
+    assert stats == ext.get_translation_stats(cache_path=None)
+    assert write_snapshot().endswith("is up to date\n")
+
+    # As if a .po file changed since the snapshot was written
+    snapshot_path.write_text(json.dumps({"fingerprint": "0" * 64, "stats": {}}))
+    assert ext.load_stats_snapshot(snapshot_path, fingerprint) is None
+    assert write_snapshot().startswith("Wrote")
+    assert ext.load_stats_snapshot(snapshot_path, fingerprint) == stats
+
+
+def test_builders_other_than_html_leave_the_graph_out(tmp_path):
+    from sphinx.cmd.build import build_main
+
+    srcdir = tmp_path / "source"
+    srcdir.mkdir()
+    (srcdir / "conf.py").write_text(
+        f"import sys\nsys.path.insert(0, {str(BASE_DIR)!r})\n"
+        'extensions = ["_ext.translation_graph"]\n'
+    )
+    (srcdir / "index.rst").write_text(
+        "Translations\n============\n\n.. translation-graph::\n\nThe end.\n"
+    )
+    outputs = {"text": ".txt", "man": ".1", "texinfo": ".texi", "latex": ".tex"}
+    for builder, suffix in outputs.items():
+        outdir = tmp_path / builder
+        args = ["-q", "-b", builder, str(srcdir), str(outdir)]
+        assert build_main(args) == 0, builder
+        [output] = outdir.glob(f"*{suffix}")
+        text = output.read_text()
+        assert "The end." in text, builder
+        assert "plotly" not in text, builder
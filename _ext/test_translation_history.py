@@ -0,0 +1,167 @@
+"""Tests for the append-only translation history."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import textwrap
+from datetime import datetime, timezone
+
+import numpy as np
+
+from _ext.translation_history import TranslationHistory, backfill
+
+
+def counts(total, translated, fuzzy=0):
+    return {"total": total, "translated": translated, "fuzzy": fuzzy}
+
+
+def day(n):
+    return datetime(2024, 1, n, tzinfo=timezone.utc)
+
+
+def test_identical_consecutive_snapshots_are_not_appended(tmp_path):
+    history = TranslationHistory(tmp_path)
+    stats = {"es": {"index": counts(10, 2)}, "fr": {"index": counts(10, 5)}}
+    assert history.append(stats, day(1), "a" * 40)
+    # The same stats, listed in another order
+    assert not history.append(dict(reversed(stats.items())), day(2))
+    assert history.append({"es": {"index": counts(10, 3)}}, day(3))
+    assert history.append(stats, day(4))
+    assert len(TranslationHistory(tmp_path).snapshots()) == 3
+
+
+def test_progress_of_a_locale_between_dates(tmp_path):
+    history = TranslationHistory(tmp_path)
+    history.append({"es": {"index": counts(10, 2)}}, day(1), "a" * 40)
+    history.append(
+        {"es": {"index": counts(10, 4), "tests": counts(10, 5, fuzzy=1)}}, day(2)
+    )
+    history.append({"fr": {"index": counts(10, 5)}}, day(3))
+    history.append({"es": {"index": counts(10, 10)}}, day(4))
+
+    progress = TranslationHistory(tmp_path).progress("es", since=day(1), until=day(3))
+    assert [(row.time, row.commit) for row in progress] == [
+        (day(1), "a" * 40),
+        (day(2), ""),
+    ]
+    assert [(row.total, row.translated, row.fuzzy) for row in progress] == [
+        (10, 2, 0),
+        (20, 9, 1),
+    ]
+    assert [row.percentage for row in progress] == [20.0, 45.0]
+    assert history.progress("es", since=day(4))[0].percentage == 100.0
+    assert history.progress("de") == []
+
+
+def test_an_interrupted_append_is_ignored(tmp_path):
+    history = TranslationHistory(tmp_path)
+    history.append({"es": {"index": counts(10, 2)}}, day(1))
+    # As if the counts of a second snapshot were written, but not the snapshot
+    with open(history.counts_path, "ab") as f:
+        f.write(np.zeros(3, dtype=history.counts().dtype).tobytes())
+    assert [row.total for row in history.progress("es")] == [10]
+
+    history.append({"es": {"index": counts(12, 2)}}, day(2))
+    assert len(history.counts()) == 2
+    assert [row.total for row in history.progress("es")] == [10, 12]
+
+
+def commit(repo, when, files):
+    for path, content in files.items():
+        path = repo / path
+        if content is None:
+            path.unlink()
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(content))
+    date = when.isoformat()
+    env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run(["git", "add", "-A"], cwd=repo, check=True)
+    subprocess.run(
+        [*git, "commit", "-q", "-m", "change"], cwd=repo, check=True, env=env
+    )
+
+
+ONE_OF_TWO = """
+    msgid "One"
+    msgstr "Uno"
+
+    msgid "Two"
+    msgstr ""
+"""
+
+TWO_OF_TWO = """
+    msgid "One"
+    msgstr "Uno"
+
+    msgid "Two"
+    msgstr "Dos"
+"""
+
+
+def test_backfill_from_git(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    commit(repo, day(1), {"locales/es/LC_MESSAGES/index.po": ONE_OF_TWO})
+    commit(repo, day(2), {"README.md": "Not a translation"})
+    commit(
+        repo,
+        day(3),
+        {
+            "locales/es/LC_MESSAGES/index.po": TWO_OF_TWO,
+            "locales/fr/LC_MESSAGES/index.po": ONE_OF_TWO,
+        },
+    )
+    commit(repo, day(4), {"locales/fr/LC_MESSAGES/index.po": None})
+
+    history = TranslationHistory(tmp_path / "history")
+    assert backfill(history, repo) == 3
+    assert [(row.time, row.translated) for row in history.progress("es")] == [
+        (day(1), 1),
+        (day(3), 2),
+        (day(4), 2),
+    ]
+    assert [(row.time, row.translated) for row in history.progress("fr")] == [
+        (day(3), 1)
+    ]
+
+    # Only the commits not in the history yet are added
+    commit(repo, day(5), {"locales/es/LC_MESSAGES/index.po": ONE_OF_TWO})
+    assert backfill(history, repo) == 1
+    assert backfill(history, repo) == 0
+    assert len(history.snapshots()) == 4
+
+
+def test_backfill_after_builds(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    commit(repo, day(1), {"locales/es/LC_MESSAGES/index.po": ONE_OF_TWO})
+    commit(repo, day(3), {"locales/es/LC_MESSAGES/index.po": TWO_OF_TWO})
+
+    # A build appended its stats before the history was ever backfilled
+    history = TranslationHistory(tmp_path / "history")
+    assert history.append({"es": {"index": counts(2, 2)}}, day(10), "b" * 40)
+    assert backfill(history, repo) == 2
+    assert backfill(history, repo) == 0
+
+    snapshots = history.snapshots()
+    assert list(snapshots["time"]) == sorted(snapshots["time"])
+    assert [(row.time, row.translated) for row in history.progress("es")] == [
+        (day(1), 1),
+        (day(3), 2),
+        (day(10), 2),
+    ]
+    # Between the builds, wherever its commit time falls
+    commit(repo, day(5), {"locales/es/LC_MESSAGES/index.po": ONE_OF_TWO})
+    assert history.append({"es": {"index": counts(2, 1)}}, day(12))
+    assert backfill(history, repo) == 1
+    progress = TranslationHistory(tmp_path / "history").progress("es", since=day(4))
+    assert [(row.time, row.translated) for row in progress] == [
+        (day(5), 1),
+        (day(10), 2),
+        (day(12), 1),
+    ]
@@ -0,0 +1,70 @@
+"""Tests for the locale × module arrays of the translation stats."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from _ext.translation_graph import get_translation_stats
+from _ext.translation_matrix import TranslationMatrix
+
+
+def module(total, translated, fuzzy=0):
+    percentage = round(translated / total * 100, 2) if total else 0
+    return {
+        "total": total,
+        "translated": translated,
+        "fuzzy": fuzzy,
+        "untranslated": total - translated - fuzzy,
+        "percentage": percentage,
+    }
+
+
+# "fr" lacks the "tests" catalog, "pt" has an empty one
+STATS = {
+    "pt": {"index": module(10, 2), "tests": module(0, 0)},
+    "es": {"index": module(10, 10), "tests": module(4, 1, fuzzy=2)},
+    "fr": {"index": module(10, 5, fuzzy=1)},
+}
+
+
+def test_the_stats_of_the_repository_survive_a_round_trip():
+    stats = get_translation_stats(cache_path=None)
+    assert TranslationMatrix.from_stats(stats).to_stats() == stats
+
+
+def test_a_missing_catalog_is_not_an_empty_one():
+    matrix = TranslationMatrix.from_stats(STATS)
+    assert matrix.locales == ["es", "fr", "pt"]
+    assert matrix.modules == ["index", "tests"]
+    assert matrix.present.tolist() == [[True, True], [True, False], [True, True]]
+    assert matrix.to_stats() == STATS
+
+
+def test_percentages_are_zero_for_empty_catalogs():
+    matrix = TranslationMatrix.from_stats(STATS)
+    assert matrix.percentages().tolist() == [[100.0, 25.0], [50.0, 0.0], [20.0, 0.0]]
+    assert matrix.percentage_labels().tolist() == [
+        ["100%", "25%"],
+        ["50%", "0%"],
+        ["20%", "0%"],
+    ]
+
+
+def test_english_is_complete_and_ranked_first():
+    matrix = TranslationMatrix.from_stats(STATS).with_english().ranked()
+    # fr only counts its own catalog: 50% beats the 10% average of pt
+    assert matrix.locales == ["en", "es", "fr", "pt"]
+    assert matrix.total[0].tolist() == [10, 4]
+    assert matrix.percentages()[0].tolist() == [100.0, 100.0]
+
+
+def test_hover_data_follows_the_hover_template():
+    matrix = TranslationMatrix.from_stats(STATS)
+    translated, fuzzy, untranslated, total, percentage = np.moveaxis(
+        matrix.hover_data(), -1, 0
+    )
+    assert translated.tolist() == matrix.translated.tolist()
+    assert fuzzy.tolist() == matrix.fuzzy.tolist()
+    assert untranslated.tolist() == matrix.untranslated.tolist()
+    assert total.tolist() == matrix.total.tolist()
+    assert percentage.tolist() == matrix.percentages().tolist()
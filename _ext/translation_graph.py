@@ -1,22 +1,39 @@
+import argparse
+import hashlib
 import json
+import os
+from html import escape
 from pathlib import Path
 from typing import TYPE_CHECKING, TypeAlias, TypedDict
 from typing import Annotated as A
 
-import numpy as np
-import plotly.graph_objects as go
-from babel.messages import pofile
 from docutils import nodes
 from docutils.parsers.rst import Directive
-from plotly.offline import plot
+
+from _ext.po_counter import count_messages
 
 if TYPE_CHECKING:
     from sphinx.application import Sphinx
+    from sphinx.config import Config
+    from sphinx.writers.html5 import HTML5Translator
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # Repository base directory
 LOCALES_DIR = BASE_DIR / "locales"  # Locales directory
 STATIC_DIR = BASE_DIR / "_static"  # Static directory
+# Survives between builds, unlike doctrees; SPHINX_CACHE_DIR moves it elsewhere
+CACHE_DIR = Path(os.environ.get("SPHINX_CACHE_DIR", BASE_DIR / "_build" / ".cache"))
+STATS_CACHE_PATH = CACHE_DIR / "translation_stats.json"
+
+# Bump whenever calculate_translation_percentage changes what it counts,
+# so that stats cached by an older version of this extension are discarded.
+STATS_CACHE_VERSION = "3"
+
+# Below this many .po files to parse, starting a process pool costs more than it saves
+PARALLEL_MIN_FILES = 16
+
+# Default location of the stats shared by the builds of each language
+STATS_SNAPSHOT_PATH = CACHE_DIR / "translation_stats_snapshot.json"
 
 
 class ModuleStats(TypedDict):
@@ -31,21 +48,30 @@ TranslationStats: TypeAlias = dict[
     A[str, "locale"], dict[A[str, "module"], ModuleStats]
 ]
 
+# The stats of the current .po files, by fingerprint, once loaded in this process
+_loaded_stats: dict[str, TranslationStats] = {}
+
+
+class translation_graph(nodes.General, nodes.Element):
+    """
+    A translation graph, drawn in the browser from its plotly figure (as JSON).
+    """
+
 
 class TranslationGraph(Directive):
     # Tells Sphinx that this directive can be used in the document body
     # and has no content
     has_content = False
 
-    # oddly, this is evaluated in the js not python,
-    # so we treat customdata like a json object
+    # oddly, this is evaluated in the js not python. The module is the x value
+    # and customdata holds the counts in the order of TranslationMatrix.hover_data
     HOVER_TEMPLATE = """
-    <b>%{customdata.module}</b><br>
-    Translated: %{customdata.translated}<br>
-    Fuzzy: %{customdata.fuzzy}<br>
-    Untranslated: %{customdata.untranslated}<br>
-    Total: %{customdata.total}<br>
-    Completed: %{customdata.percentage}%
+    <b>%{x}</b><br>
+    Translated: %{customdata[0]}<br>
+    Fuzzy: %{customdata[1]}<br>
+    Untranslated: %{customdata[2]}<br>
+    Total: %{customdata[3]}<br>
+    Completed: %{customdata[4]}%
     """
 
     def run(self):
@@ -56,72 +82,36 @@ class TranslationGraph(Directive):
         for po_file in get_po_files():
             env.note_dependency(str(po_file))
 
-        data = get_translation_stats()
-
-        # Sort data by locale and module
-        data = {
-            locale: dict(sorted(loc_stats.items()))
-            for locale, loc_stats in sorted(data.items())
-        }
-
-        # prepend english, everything set to 100%
-        en = {
-            module: ModuleStats(
-                total=stats["total"],
-                translated=stats["total"],
-                fuzzy=0,
-                untranslated=0,
-                percentage=100,
-            )
-            for module, stats in next(iter(data.values())).items()
-        }
-        data = {"en": en} | data
-
-        # Calculate average completion percentage for each locale and sort locales
-        locale_completion = {
-            locale: np.mean([stats["percentage"] for stats in loc_stats.values()])
-            for locale, loc_stats in data.items()
-        }
-        sorted_locales = sorted(
-            locale_completion.keys(),
-            key=lambda locale: locale_completion[locale],
-            reverse=True,
-        )
+        figure = self.build_figure(load_translation_stats(env.config))
+        # plotly.js itself is loaded by _static/translation_graph.js, only once
+        # the graph scrolls into view
+        return [translation_graph(figure=figure.to_json())]
 
-        # Reorder data based on sorted locales
-        data = {locale: data[locale] for locale in sorted_locales}
-
-        # Update locales list after sorting
-        locales = list(data.keys())
-        modules = list(next(iter(data.values())).keys())
-
-        # Extract data to plot
-        values = [
-            [stats["percentage"] for stats in loc_stats.values()]
-            for loc_stats in data.values()
-        ]
-        hoverdata = [
-            [{"module": module} | stats for module, stats in loc_stats.items()]
-            for loc_stats in data.values()
-        ]
-
-        # Add text to display percentages directly in the heatmap boxes
-        text = [
-            [f"{int(stats['percentage'])}%" for stats in loc_stats.values()]
-            for loc_stats in data.values()
-        ]
+    @classmethod
+    def build_figure(cls, stats: TranslationStats):
+        """The heatmap of the stats, a plotly Figure."""
+        # numpy and plotly take a while to import, so only the builds that
+        # draw a graph pay for them (not gettext, linkcheck, etc.)
+        import plotly.graph_objects as go
+
+        from _ext.translation_matrix import TranslationMatrix
+
+        # Sort data by locale and module, prepend english (everything set to 100%),
+        # then sort locales by their average completion percentage
+        data = TranslationMatrix.from_stats(stats)
+        data = data.with_english().ranked()
 
         heatmap = go.Heatmap(
-            x=modules,
-            y=locales,
-            z=values,
-            text=text,  # Add text to the heatmap
+            x=data.modules,
+            y=data.locales,
+            z=data.percentages(),
+            text=data.percentage_labels(),  # Add text to the heatmap
             texttemplate="%{text}",  # Format the text to display directly
             textfont={"size": 15},  # Adjust font size for better readability
             xgap=5,
             ygap=5,
-            customdata=np.array(hoverdata),
-            hovertemplate=self.HOVER_TEMPLATE,
+            customdata=data.hover_data(),
+            hovertemplate=cls.HOVER_TEMPLATE,
             name="",  # Set the trace name to an empty string to remove "trace 0" from hoverbox
             colorbar={
                 "orientation": "h",
@@ -169,16 +159,56 @@ class TranslationGraph(Directive):
             yaxis_title="Locale",
             yaxis_autorange="reversed",
         )
-        div = plot(
-            fig,
-            output_type="div",
-            include_plotlyjs=True,
-            config={"displayModeBar": False},
-        )
-        return [nodes.raw("", div, format="html")]
+        return fig
 
 
-def calculate_translation_percentage(po_path: Path, locale: str) -> ModuleStats:
+def plotlyjs_filename() -> str:
+    """
+    The name plotly.js is copied under, versioned so browsers can cache it for good.
+    """
+    from plotly.offline import get_plotlyjs_version
+
+    return f"plotly-{get_plotlyjs_version()}.min.js"
+
+
+def visit_translation_graph_html(self: "HTML5Translator", node: translation_graph):
+    # "</" would end the script element early, and "<\/" means the same in JSON
+    figure = node["figure"].replace("</", "<\\/")
+    shared_static = self.builder.config.translation_graph_shared_static
+    self.body.append(
+        f'<div class="translation-graph" data-plotlyjs="{plotlyjs_filename()}"'
+        f' data-shared-static="{escape(shared_static)}">'
+        f'<script type="application/json">{figure}</script>'
+        "</div>\n"
+    )
+    raise nodes.SkipNode
+
+
+def skip_translation_graph(self, node: translation_graph):
+    # Only the web pages can draw the graph
+    raise nodes.SkipNode
+
+
+def add_translation_graph_assets(
+    app: "Sphinx", pagename: str, templatename: str, context: dict, doctree
+) -> None:
+    """
+    Load the translation graph script on the pages that have a graph, and copy
+    plotly.js to the output the first time one is found.
+    """
+    if doctree is None or next(doctree.findall(translation_graph), None) is None:
+        return
+
+    from plotly.offline import get_plotlyjs
+
+    app.add_js_file("translation_graph.js", loading_method="defer")
+    plotlyjs_path = Path(app.outdir) / "_static" / plotlyjs_filename()
+    if not plotlyjs_path.is_file():
+        plotlyjs_path.parent.mkdir(parents=True, exist_ok=True)
+        plotlyjs_path.write_text(get_plotlyjs(), encoding="utf-8")
+
+
+def calculate_translation_percentage(po_path: Path) -> ModuleStats:
     """
     Calculate the translation percentage for a given .po file.
 
@@ -186,8 +216,6 @@ def calculate_translation_percentage(po_path: Path, locale: str) -> ModuleStats:
     ----------
     po_path : Path
         Path to the .po file.
-    locale : str
-        Locale code (e.g., 'es', 'fr').
 
     Returns
     -------
@@ -195,24 +223,8 @@ def calculate_translation_percentage(po_path: Path, locale: str) -> ModuleStats:
         A dictionary containing the total number of strings, translated strings,
         fuzzy strings, untranslated strings, and the translation percentage.
     """
-    with open(po_path, "r", encoding="utf-8") as f:
-        catalog = pofile.read_po(f, locale=locale)
-
-    total = 0
-    translated = 0
-    fuzzy = 0
-
-    for message in catalog:
-        if message.id:
-            total += 1
-            # Check if the message is fuzzy
-            # Fuzzy messages are not considered translated
-            if message.fuzzy:
-                fuzzy += 1
-                continue
-            # Check if the message is translated
-            if message.string:
-                translated += 1
+    # Fuzzy messages are not considered translated
+    total, translated, fuzzy = count_messages(po_path)
 
     percentage = (translated / total * 100) if total > 0 else 0
 
@@ -225,16 +237,46 @@ def calculate_translation_percentage(po_path: Path, locale: str) -> ModuleStats:
     }
 
 
-def get_po_files() -> list[Path]:
+def get_po_files(locales_dir: Path = LOCALES_DIR) -> list[Path]:
     """
     Find every .po file across all locales, in a stable order.
     """
-    return sorted(LOCALES_DIR.rglob("*.po"))
+    return sorted(locales_dir.rglob("*.po"))
+
+
+def get_translation_stats(
+    cache_path: Path | None = STATS_CACHE_PATH,
+    workers: int = 1,
+    locales_dir: Path = LOCALES_DIR,
+) -> TranslationStats:
+    """
+    Calculate the translation stats of every .po file, grouped by locale.
+
+    Parameters
+    ----------
+    cache_path : Path, optional
+        JSON file where the stats of each .po file are cached, keyed by a hash of
+        its contents. Only the files whose contents changed since the last call are
+        parsed again. Pass ``None`` to parse every file without touching the cache.
+    workers : int, optional
+        Maximum number of processes used to parse the .po files, ``0`` meaning one
+        per CPU. The files are parsed serially when only a few need parsing.
+    locales_dir : Path, optional
+        Directory of the catalogs, as ``<locale>/LC_MESSAGES/<module>.po``.
 
+    Returns
+    -------
+    dict
+        The stats of each module (.po file), grouped by locale.
+    """
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.translation_graph")
 
-def get_translation_stats() -> TranslationStats:
     # Get all .po files in the locales directory
-    po_files = get_po_files()
+    po_files = get_po_files(locales_dir)
+    cached = load_stats_cache(cache_path) if cache_path is not None else {}
+    entries = {}
 
     # Let's use a dictionary to store the results
     #
@@ -262,11 +304,27 @@ def get_translation_stats() -> TranslationStats:
     # }
     results = {}
 
+    # Look up each file in the cache first, so only the misses are parsed
+    digests = {}
+    stale = []
+    for po_file in po_files:
+        key = po_file.relative_to(locales_dir).as_posix()
+        digests[key] = hashlib.sha256(po_file.read_bytes()).hexdigest()
+        entry = cached.get(key)
+        if entry is None or entry["sha256"] != digests[key]:
+            if cache_path is not None:
+                logger.debug("Translation stats cache miss for %s", key)
+            stale.append(po_file)
+    misses = len(stale)
+    parsed = dict(zip(stale, parse_po_files(stale, workers)))
+
     # Calculate translation percentages for each file
     for po_file in po_files:
         # Get the locale from the file path
         locale = po_file.parent.parent.name
-        stats = calculate_translation_percentage(po_file, locale)
+        key = po_file.relative_to(locales_dir).as_posix()
+        stats = parsed[po_file] if po_file in parsed else cached[key]["stats"]
+        entries[key] = {"sha256": digests[key], "stats": stats}
 
         # Store the results in the dictionary
         if locale not in results:
@@ -274,9 +332,160 @@ def get_translation_stats() -> TranslationStats:
 
         results[locale][po_file.stem] = stats
 
+    if cache_path is not None:
+        logger.info(
+            "Translation stats cache: %d hits, %d misses",
+            len(po_files) - misses,
+            misses,
+        )
+        if misses or entries.keys() != cached.keys():
+            save_stats_cache(entries, cache_path)
+
     return results
 
 
+def parse_po_files(po_files: list[Path], workers: int = 1) -> list[ModuleStats]:
+    """
+    Calculate the translation stats of several .po files, in the same order.
+
+    Parameters
+    ----------
+    po_files : list of Path
+        Paths to the .po files.
+    workers : int, optional
+        Maximum number of processes to spread the files over, ``0`` meaning one
+        per CPU. Small batches are always parsed in this process.
+
+    Returns
+    -------
+    list
+        The stats of each file, as returned by `calculate_translation_percentage`.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(po_files))
+
+    if workers <= 1 or len(po_files) < PARALLEL_MIN_FILES:
+        return list(map(calculate_translation_percentage, po_files))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # map() yields results in submission order, so the output does not depend
+    # on which worker finishes first
+    chunksize = max(1, len(po_files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(calculate_translation_percentage, po_files, chunksize=chunksize)
+        )
+
+
+def load_stats_cache(cache_path: Path) -> dict[str, dict]:
+    """
+    Read the cached stats of each .po file, or nothing if the cache is missing,
+    unreadable or was written by another version of this extension.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != STATS_CACHE_VERSION:
+        return {}
+    return cache.get("entries", {})
+
+
+def save_stats_cache(entries: dict[str, dict], cache_path: Path) -> None:
+    """
+    Write the cached stats of each .po file.
+
+    The file is replaced atomically, since parallel Sphinx workers may read it
+    while another build writes it.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": STATS_CACHE_VERSION, "entries": entries}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def po_fingerprint(po_files: list[Path] | None = None) -> str:
+    """
+    A hash of the name and contents of every .po file, which changes when any does
+    (or when what the stats count does).
+    """
+    fingerprint = hashlib.sha256(STATS_CACHE_VERSION.encode())
+    for po_file in get_po_files() if po_files is None else po_files:
+        fingerprint.update(po_file.relative_to(LOCALES_DIR).as_posix().encode())
+        fingerprint.update(hashlib.sha256(po_file.read_bytes()).digest())
+    return fingerprint.hexdigest()
+
+
+def load_stats_snapshot(snapshot_path: Path, fingerprint: str) -> TranslationStats | None:
+    """
+    Read the stats from a snapshot, or nothing if it is missing or was written for
+    other .po files than the ones with this fingerprint.
+    """
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("fingerprint") != fingerprint:
+        return None
+    return snapshot["stats"]
+
+
+def write_stats_snapshot(snapshot_path: Path, workers: int = 1) -> TranslationStats:
+    """
+    Compute the stats and write them, with the fingerprint of the .po files they
+    were computed from, to a snapshot that other builds can read.
+    """
+    fingerprint = po_fingerprint()
+    stats = get_translation_stats(workers=workers)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "stats": stats}, f)
+    os.replace(tmp_path, snapshot_path)
+    return stats
+
+
+def load_translation_stats(config: "Config") -> TranslationStats:
+    """
+    Get the translation stats for this build, computing them at most once.
+
+    Both the directive and the build-finished hook use the same stats, kept in
+    memory for as long as the .po files do not change. When
+    ``translation_stats_snapshot`` names a snapshot written for the current .po
+    files, the stats are read from it instead of computed, so the builds of each
+    language share the work done once by the first one (or by nox beforehand).
+    """
+    from sphinx.util import logging
+
+    logger = logging.getLogger("_ext.translation_graph")
+
+    fingerprint = po_fingerprint()
+    if fingerprint in _loaded_stats:
+        return _loaded_stats[fingerprint]
+
+    if config.translation_stats_snapshot:
+        snapshot_path = Path(config.translation_stats_snapshot)
+        stats = load_stats_snapshot(snapshot_path, fingerprint)
+        if stats is not None:
+            logger.info("Using translation stats snapshot %s", snapshot_path)
+        else:
+            logger.info("Writing translation stats snapshot %s", snapshot_path)
+            stats = write_stats_snapshot(
+                snapshot_path, workers=config.translation_stats_workers
+            )
+    else:
+        stats = get_translation_stats(workers=config.translation_stats_workers)
+
+    _loaded_stats.clear()
+    _loaded_stats[fingerprint] = stats
+    return stats
+
+
 def write_translation_stats(app: "Sphinx", exception: Exception | None) -> None:
     from sphinx.util import logging
 
@@ -290,21 +499,69 @@ def write_translation_stats(app: "Sphinx", exception: Exception | None) -> None:
         logger.info("Skipping translation stats because the build raised an exception")
         return
 
-    stats = get_translation_stats()
+    stats = load_translation_stats(app.config)
     if not stats:
         logger.info("Skipping translation stats because no .po files were found")
         return
 
+    # Every language has the same stats, and the builds of the translations may run
+    # at the same time, so only the English build appends them to the history
+    if app.config.translation_stats_history and app.config.language in (None, "en"):
+        record_translation_history(
+            Path(app.srcdir) / app.config.translation_stats_history, stats
+        )
+
     out_path = Path(app.outdir) / "_static" / "translation_stats.json"
+    content = json.dumps(stats, indent=2)
+    if out_path.is_file() and out_path.read_text() == content:
+        logger.info("Translation stats in %s are up to date", out_path)
+        return
+
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with open(out_path, "w") as f:
-        json.dump(stats, f, indent=2)
+        f.write(content)
 
     logger.info("Wrote translation stats to %s", out_path)
 
 
+def record_translation_history(path: Path, stats: TranslationStats) -> None:
+    """Append the stats of this build to the history, unless they did not change."""
+    from datetime import datetime, timezone
+
+    from sphinx.util import logging
+
+    from _ext.translation_history import TranslationHistory, head_commit
+
+    logger = logging.getLogger("_ext.translation_graph")
+
+    history = TranslationHistory(path)
+    if history.append(stats, datetime.now(timezone.utc), head_commit()):
+        logger.info("Appended the translation stats to the history in %s", path)
+
+
 def setup(app):
+    app.add_node(
+        translation_graph,
+        html=(visit_translation_graph_html, None),
+        latex=(skip_translation_graph, None),
+        text=(skip_translation_graph, None),
+        man=(skip_translation_graph, None),
+        texinfo=(skip_translation_graph, None),
+    )
     app.add_directive("translation-graph", TranslationGraph)
+    # Processes used to parse the .po files when computing the stats (0: one per
+    # CPU). Parsing them all takes a fraction of a second, less than starting a
+    # process pool on most machines, so it is opt-in.
+    app.add_config_value("translation_stats_workers", 1, "", types=(int,))
+    # Stats shared by the builds of each language, see load_translation_stats
+    app.add_config_value("translation_stats_snapshot", "", "", types=(str,))
+    # Directory of the translation progress history, relative to the source
+    # directory (see _ext/translation_history.py), or "" to keep no history
+    app.add_config_value("translation_stats_history", "", "", types=(str,))
+    # The _static directory of the English build, for instance, so that browsers
+    # download plotly.js once for all languages (the page's own copy is the fallback)
+    app.add_config_value("translation_graph_shared_static", "", "html", types=(str,))
+    app.connect("html-page-context", add_translation_graph_assets)
     app.connect("build-finished", write_translation_stats)
 
     return {
@@ -312,3 +569,31 @@ def setup(app):
         "parallel_read_safe": True,
         "parallel_write_safe": True,
     }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Write the translation stats snapshot once, before building each language.
+
+    For example: python -m _ext.translation_graph _build/.cache/translation_stats_snapshot.json
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("snapshot", type=Path, nargs="?", default=STATS_SNAPSHOT_PATH)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes used to parse the .po files (0: one per CPU)",
+    )
+    args = parser.parse_args(argv)
+
+    if load_stats_snapshot(args.snapshot, po_fingerprint()) is not None:
+        print(f"Translation stats snapshot {args.snapshot} is up to date")
+    else:
+        write_stats_snapshot(args.snapshot, workers=args.workers)
+        print(f"Wrote translation stats snapshot {args.snapshot}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,448 @@
+"""
+An append-only history of the translation stats, to chart progress over time.
+
+Each snapshot of the stats (one per build, or per commit when backfilled from git)
+is added to three files in the history directory:
+
+- ``snapshots.bin``: one `SNAPSHOT` record per snapshot, ordered by time
+- ``counts.bin``: one `COUNT` record per locale and module of each snapshot, each
+  snapshot's records following those of the snapshot added before it
+- ``names.json``: the locale and module names the records refer to by index
+
+The records have a fixed size, so the files are read straight into numpy arrays
+and "progress of a locale between two dates" is answered with a few vectorised
+operations, in milliseconds even for years of history. A snapshot identical to
+the one before it is not added, so rebuilding without .po changes costs nothing.
+
+To fill the history from the commits that changed the .po files (those already in
+the history are skipped, so it can run before every build):
+
+    python -m _ext.translation_history backfill
+"""
+
+import argparse
+import json
+import os
+import subprocess
+from collections.abc import Iterator, Mapping
+from datetime import date, datetime, time, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from _ext.po_counter import count_message_lines
+from _ext.translation_graph import BASE_DIR, CACHE_DIR
+
+HISTORY_DIR = CACHE_DIR / "translation_history"
+
+SNAPSHOT = np.dtype(
+    [
+        ("time", "<i8"),  # Seconds since the epoch
+        ("commit", "S40"),  # Empty when the build was not in a git checkout
+        ("start", "<i8"),  # First record of the snapshot in counts.bin
+        ("size", "<i4"),  # Number of records of the snapshot in counts.bin
+    ]
+)
+COUNT = np.dtype(
+    [
+        ("snapshot", "<i4"),  # How many snapshots were added before this one
+        ("locale", "<u2"),
+        ("module", "<u2"),
+        ("total", "<i4"),
+        ("translated", "<i4"),
+        ("fuzzy", "<i4"),
+    ]
+)
+
+# The counts of each module of each locale, as in translation_stats.json
+# (any other keys, such as the percentage, are ignored)
+Counts = Mapping[str, Mapping[str, Mapping[str, int]]]
+
+# An all-zero object name, as git prints for the files a commit deleted
+NULL_OID = "0" * 40
+
+
+class Progress(NamedTuple):
+    time: datetime
+    commit: str
+    total: int
+    translated: int
+    fuzzy: int
+    percentage: float
+
+
+class TranslationHistory:
+    """The history stored in a directory, created on the first append."""
+
+    def __init__(self, path: Path = HISTORY_DIR):
+        self.path = Path(path)
+        self.names_path = self.path / "names.json"
+        self.snapshots_path = self.path / "snapshots.bin"
+        self.counts_path = self.path / "counts.bin"
+        self.locales: list[str] = []
+        self.modules: list[str] = []
+        if self.names_path.is_file():
+            names = json.loads(self.names_path.read_text())
+            self.locales = names["locales"]
+            self.modules = names["modules"]
+
+    def snapshots(self) -> np.ndarray:
+        if not self.snapshots_path.is_file():
+            return np.zeros(0, dtype=SNAPSHOT)
+        return np.fromfile(self.snapshots_path, dtype=SNAPSHOT)
+
+    def counts(self) -> np.ndarray:
+        if not self.counts_path.is_file():
+            return np.zeros(0, dtype=COUNT)
+        return np.fromfile(self.counts_path, dtype=COUNT)
+
+    def append(self, stats: Counts, when: datetime, commit: str = "") -> bool:
+        """
+        Add a snapshot of the stats at its place in time, unless it is identical to
+        the snapshot before it.
+
+        Parameters
+        ----------
+        stats : Counts
+            The stats, in the schema of ``translation_stats.json``.
+        when : datetime
+            The time of the build or of the commit.
+        commit : str
+            The commit the stats were computed from, if known.
+
+        Returns
+        -------
+        bool
+            Whether the snapshot was added.
+        """
+        new_names = self._add_names(stats)
+        locale_ids = {locale: i for i, locale in enumerate(self.locales)}
+        module_ids = {module: i for i, module in enumerate(self.modules)}
+        records = np.array(
+            [
+                (
+                    0,
+                    locale_ids[locale],
+                    module_ids[module],
+                    counts["total"],
+                    counts["translated"],
+                    counts["fuzzy"],
+                )
+                for locale, modules in stats.items()
+                for module, counts in modules.items()
+            ],
+            dtype=COUNT,
+        )
+        records.sort(order=["locale", "module"])
+
+        snapshots = self.snapshots()
+        timestamp = int(when.timestamp())
+        # After the snapshots of the same time, as they were added first
+        position = int(np.searchsorted(snapshots["time"], timestamp, side="right"))
+        if position and np.array_equal(
+            self._records_of(snapshots[position - 1]),
+            records[["locale", "module", *_COUNTS]],
+        ):
+            return False
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        if new_names:
+            _write_atomically(
+                self.names_path,
+                json.dumps({"locales": self.locales, "modules": self.modules}),
+            )
+        # Counts first: a snapshot record is only written once its counts are.
+        # Counts left behind by an interrupted append are overwritten here.
+        start = _records_end(snapshots)
+        records["snapshot"] = len(snapshots)
+        with open(self.counts_path, "r+b" if start else "wb") as f:
+            f.seek(start * COUNT.itemsize)
+            f.truncate()
+            records.tofile(f)
+        snapshot = np.array(
+            [(timestamp, commit.encode(), start, len(records))], dtype=SNAPSHOT
+        )
+        if position == len(snapshots):
+            with open(self.snapshots_path, "ab") as f:
+                snapshot.tofile(f)
+        else:
+            # Older than the last snapshot, as when backfilling after builds
+            snapshots = np.insert(snapshots, position, snapshot)
+            _write_atomically(self.snapshots_path, snapshots.tobytes())
+        return True
+
+    def progress(
+        self,
+        locale: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[Progress]:
+        """
+        The totals of a locale, over all its modules, at each snapshot in a range.
+
+        Parameters
+        ----------
+        locale : str
+            The locale, such as "es".
+        since, until : datetime | None
+            The range of snapshot times, both included, unbounded if None.
+
+        Returns
+        -------
+        list[Progress]
+            The totals at each snapshot in the range that has the locale, by time.
+        """
+        snapshots = self.snapshots()
+        if locale not in self.locales or not len(snapshots):
+            return []
+        in_range = np.ones(len(snapshots), dtype=bool)
+        if since is not None:
+            in_range &= snapshots["time"] >= int(since.timestamp())
+        if until is not None:
+            in_range &= snapshots["time"] <= int(until.timestamp())
+
+        # Leftovers of an interrupted append are past the last snapshot's records
+        counts = self.counts()[: _records_end(snapshots)]
+        # The index in snapshots.bin of each record, from the blocks of records
+        # the snapshots have in counts.bin, one after the other
+        by_start = np.argsort(snapshots["start"], kind="stable")
+        owners = np.repeat(by_start, snapshots["size"][by_start])
+        in_locale = counts["locale"] == self.locales.index(locale)
+        rows, owners = counts[in_locale], owners[in_locale]
+        rows, owners = rows[in_range[owners]], owners[in_range[owners]]
+
+        def summed(field: str) -> np.ndarray:
+            return np.bincount(
+                owners, weights=rows[field], minlength=len(snapshots)
+            ).astype(np.int64)
+
+        present = np.bincount(owners, minlength=len(snapshots)) > 0
+        total, translated, fuzzy = (summed(field) for field in _COUNTS)
+        percentages = np.divide(
+            translated * 100,
+            total,
+            out=np.zeros(len(snapshots)),
+            where=total > 0,
+        )
+        return [
+            Progress(
+                time=datetime.fromtimestamp(int(snapshots["time"][i]), timezone.utc),
+                commit=snapshots["commit"][i].decode(),
+                total=int(total[i]),
+                translated=int(translated[i]),
+                fuzzy=int(fuzzy[i]),
+                percentage=round(float(percentages[i]), 2),
+            )
+            for i in range(len(snapshots))
+            if present[i]
+        ]
+
+    def _add_names(self, stats: Counts) -> bool:
+        """Give an index to the locales and modules seen for the first time."""
+        added = False
+        for locale, modules in stats.items():
+            if locale not in self.locales:
+                self.locales.append(locale)
+                added = True
+            for module in modules:
+                if module not in self.modules:
+                    self.modules.append(module)
+                    added = True
+        return added
+
+    def _records_of(self, snapshot: np.void) -> np.ndarray:
+        records = np.fromfile(
+            self.counts_path,
+            dtype=COUNT,
+            count=int(snapshot["size"]),
+            offset=int(snapshot["start"]) * COUNT.itemsize,
+        )
+        return records[["locale", "module", *_COUNTS]]
+
+
+_COUNTS = ("total", "translated", "fuzzy")
+
+
+def _records_end(snapshots: np.ndarray) -> int:
+    """Where the records of the next snapshot go in counts.bin."""
+    if not len(snapshots):
+        return 0
+    return int((snapshots["start"] + snapshots["size"]).max())
+
+
+def _write_atomically(path: Path, content: str | bytes) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    if isinstance(content, bytes):
+        tmp_path.write_bytes(content)
+    else:
+        tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+
+
+def head_commit(repo: Path = BASE_DIR) -> str:
+    """The commit checked out in the repository, empty outside of a git checkout."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=repo,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.strip()
+
+
+def backfill(history: TranslationHistory, repo: Path = BASE_DIR) -> int:
+    """
+    Add a snapshot for each commit that changed the .po files, oldest first.
+
+    The history of the main line is read in one pass of ``git log``, and only the
+    .po files each commit changed are counted, from the blobs git already has,
+    without checking anything out. The commits already in the history are skipped,
+    so backfilling again only adds the others, wherever they fall among the
+    snapshots of the builds.
+
+    Returns
+    -------
+    int
+        The number of snapshots added.
+    """
+    known = set(history.snapshots()["commit"].tolist())
+
+    log = subprocess.Popen(
+        # --first-parent and -m: the changes of merges relative to the main line
+        ["git", "log", "--reverse", "--first-parent", "-m", "--raw", "--no-abbrev"]
+        + ["--no-renames", "--format=commit %H %ct", "--", "locales"],
+        cwd=repo,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    blobs = _BlobReader(repo)
+    # The counts of each .po file in the commit being read, by locale and module
+    state: dict[str, dict[str, dict[str, int]]] = {}
+    counted: dict[str, dict[str, int]] = {}
+    added = 0
+    try:
+        for commit, timestamp, changes in _read_raw_log(log.stdout):
+            for oid, path in changes:
+                # locales/<locale>/LC_MESSAGES/<module>.po
+                parts = Path(path).parts
+                if len(parts) != 4 or parts[2] != "LC_MESSAGES":
+                    continue
+                if not path.endswith(".po"):
+                    continue
+                locale, module = parts[1], Path(parts[3]).stem
+                if oid == NULL_OID:
+                    state.get(locale, {}).pop(module, None)
+                    continue
+                if oid not in counted:
+                    counts = count_message_lines(blobs.read(oid).splitlines())
+                    counted[oid] = counts._asdict()
+                state.setdefault(locale, {})[module] = counted[oid]
+            if commit.encode() in known:
+                continue
+            when = datetime.fromtimestamp(timestamp, timezone.utc)
+            stats = {locale: modules for locale, modules in state.items() if modules}
+            added += history.append(stats, when, commit)
+    finally:
+        blobs.close()
+        log.stdout.close()
+        if log.wait():
+            raise subprocess.CalledProcessError(log.returncode, log.args)
+    return added
+
+
+def _read_raw_log(lines) -> Iterator[tuple[str, int, list[tuple[str, str]]]]:
+    """
+    Yield the commit, commit time and changed files (new object name and path)
+    of each commit in ``git log --raw --format="commit %H %ct"`` output.
+    """
+    commit = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("commit "):
+            if commit is not None:
+                yield commit, timestamp, changes
+            _, commit, ct = line.split()
+            timestamp = int(ct)
+            changes = []
+        elif line.startswith(":"):
+            # :<old mode> <new mode> <old object> <new object> <status>\t<path>
+            info, path = line.split("\t", 1)
+            changes.append((info.split()[3], path))
+    if commit is not None:
+        yield commit, timestamp, changes
+
+
+class _BlobReader:
+    """Reads objects through one ``git cat-file --batch`` process."""
+
+    def __init__(self, repo: Path):
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=repo,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def read(self, oid: str) -> bytes:
+        self.process.stdin.write(f"{oid}\n".encode())
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError(f"git object {oid} is missing")
+        content = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)  # The newline after each object
+        return content
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def _day(value: str) -> datetime:
+    return datetime.combine(date.fromisoformat(value), time(), timezone.utc)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Fill the translation history from git, or print the progress of a locale.
+
+    For example: python -m _ext.translation_history progress es --since 2024-01-01
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--history", type=Path, default=HISTORY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "backfill", help="add a snapshot per commit that changed .po files"
+    )
+    progress = commands.add_parser("progress", help="print the progress of a locale")
+    progress.add_argument("locale")
+    progress.add_argument("--since", type=_day, help="first day, as YYYY-MM-DD")
+    progress.add_argument("--until", type=_day, help="last day, as YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    history = TranslationHistory(args.history)
+    if args.command == "backfill":
+        added = backfill(history)
+        print(f"Added {added} snapshots to {args.history}")
+        return 0
+
+    until = args.until
+    if until is not None:
+        # Up to the end of the last day
+        until = until.replace(hour=23, minute=59, second=59)
+    for row in history.progress(args.locale, args.since, until):
+        print(
+            f"{row.time:%Y-%m-%d %H:%M}  {row.commit[:10] or '-':10}  "
+            f"{row.translated:>6}/{row.total:<6} {row.percentage:6.2f}%  "
+            f"fuzzy: {row.fuzzy}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+"""
+The translation stats as locale × module arrays.
+
+`TranslationMatrix` holds the counts of the nested ``translation_stats.json``
+schema in one integer array per count, a row per locale and a column per module,
+so that percentages, rankings and the inputs of the translation graph are each
+computed in one vectorised operation, however many locales and modules there are.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from _ext.translation_graph import ModuleStats, TranslationStats
+
+
+@dataclass(frozen=True)
+class TranslationMatrix:
+    locales: list[str]
+    modules: list[str]
+    # Shape (len(locales), len(modules)), zero where a locale lacks a module
+    total: np.ndarray
+    translated: np.ndarray
+    fuzzy: np.ndarray
+    # Whether each locale has a catalog for each module
+    present: np.ndarray
+
+    @classmethod
+    def from_stats(cls, stats: TranslationStats) -> "TranslationMatrix":
+        """Gather the counts of the stats, with locales and modules sorted by name."""
+        locales = sorted(stats)
+        modules = sorted({module for counts in stats.values() for module in counts})
+        column = {module: j for j, module in enumerate(modules)}
+
+        shape = (len(locales), len(modules))
+        counts = np.zeros((3, *shape), dtype=np.int64)
+        present = np.zeros(shape, dtype=bool)
+        for i, locale in enumerate(locales):
+            for module, module_stats in stats[locale].items():
+                j = column[module]
+                counts[:, i, j] = (
+                    module_stats["total"],
+                    module_stats["translated"],
+                    module_stats["fuzzy"],
+                )
+                present[i, j] = True
+        return cls(locales, modules, *counts, present)
+
+    def to_stats(self) -> TranslationStats:
+        """The stats in the schema of ``translation_stats.json``."""
+        stats = {}
+        untranslated = self.untranslated
+        for i, locale in enumerate(self.locales):
+            stats[locale] = {}
+            for j in np.flatnonzero(self.present[i]):
+                total = int(self.total[i, j])
+                translated = int(self.translated[i, j])
+                # Rounded as in calculate_translation_percentage, for identical output
+                percentage = (translated / total * 100) if total > 0 else 0
+                stats[locale][self.modules[j]] = ModuleStats(
+                    total=total,
+                    translated=translated,
+                    fuzzy=int(self.fuzzy[i, j]),
+                    untranslated=int(untranslated[i, j]),
+                    percentage=round(percentage, 2),
+                )
+        return stats
+
+    @property
+    def untranslated(self) -> np.ndarray:
+        return self.total - self.translated - self.fuzzy
+
+    def percentages(self) -> np.ndarray:
+        """The translated percentage of each module, 0 for empty or missing ones."""
+        ratio = np.divide(
+            self.translated,
+            self.total,
+            out=np.zeros(self.total.shape),
+            where=self.total > 0,
+        )
+        return np.round(ratio * 100, 2)
+
+    def with_english(self) -> "TranslationMatrix":
+        """
+        Prepend English, the source language, as fully translated.
+
+        The size of each English module is taken from the first locale that has it.
+        """
+        first = self.present.argmax(axis=0)
+        columns = np.arange(len(self.modules))
+        total = self.total[first, columns]
+        return TranslationMatrix(
+            locales=["en", *self.locales],
+            modules=self.modules,
+            total=np.vstack([total, self.total]),
+            translated=np.vstack([total, self.translated]),
+            fuzzy=np.vstack([np.zeros_like(total), self.fuzzy]),
+            present=np.vstack([self.present.any(axis=0), self.present]),
+        )
+
+    def ranked(self) -> "TranslationMatrix":
+        """
+        Reorder the locales from most to least complete, by mean module percentage.
+
+        Locales that are as complete as each other keep their order.
+        """
+        if not self.modules:
+            return self
+        # Averaged over the modules each locale has
+        percentages = np.where(self.present, self.percentages(), 0)
+        completion = np.divide(
+            percentages.sum(axis=1),
+            self.present.sum(axis=1),
+            out=np.zeros(len(self.locales)),
+            where=self.present.any(axis=1),
+        )
+        order = np.argsort(-completion, kind="stable")
+        return TranslationMatrix(
+            locales=[self.locales[i] for i in order],
+            modules=self.modules,
+            total=self.total[order],
+            translated=self.translated[order],
+            fuzzy=self.fuzzy[order],
+            present=self.present[order],
+        )
+
+    def percentage_labels(self) -> np.ndarray:
+        """The percentages, truncated to whole numbers, as shown in the graph cells."""
+        whole = np.floor(self.percentages()).astype(np.int64).astype(str)
+        return np.char.add(whole, "%")
+
+    def hover_data(self) -> np.ndarray:
+        """
+        The translated, fuzzy, untranslated and total counts and the percentage of
+        each module, stacked along a last axis in that order.
+        """
+        return np.stack(
+            [
+                self.translated,
+                self.fuzzy,
+                self.untranslated,
+                self.total,
+                self.percentages(),
+            ],
+            axis=-1,
+        )
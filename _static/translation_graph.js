@@ -0,0 +1,58 @@
+// Draw the translation graphs (see _ext/translation_graph.py) only once they
+// scroll into view. plotly.js weighs several megabytes, so it is only
+// downloaded then, preferably from the _static directory shared by all
+// languages, falling back to the copy next to this script.
+(() => {
+  const localStatic = new URL(".", document.currentScript.src);
+  let plotly = null;
+
+  function loadScript(src) {
+    return new Promise((resolve, reject) => {
+      const script = document.createElement("script");
+      script.src = src;
+      script.onload = resolve;
+      script.onerror = reject;
+      document.head.appendChild(script);
+    });
+  }
+
+  function loadPlotly(graph) {
+    if (plotly === null) {
+      const filename = graph.dataset.plotlyjs;
+      const local = new URL(filename, localStatic).href;
+      const shared = graph.dataset.sharedStatic
+        ? new URL(filename, new URL(graph.dataset.sharedStatic, location.href))
+            .href
+        : local;
+      plotly = loadScript(shared).catch(() =>
+        shared === local ? Promise.reject() : loadScript(local),
+      );
+    }
+    return plotly;
+  }
+
+  async function draw(graph) {
+    const figure = JSON.parse(graph.querySelector("script").textContent);
+    await loadPlotly(graph);
+    await window.Plotly.newPlot(graph, figure.data, figure.layout, {
+      displayModeBar: false,
+      responsive: true,
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    const graphs = document.querySelectorAll(".translation-graph");
+    const observer = new IntersectionObserver(
+      (entries) => {
+        entries
+          .filter((entry) => entry.isIntersecting)
+          .forEach((entry) => {
+            observer.unobserve(entry.target);
+            draw(entry.target);
+          });
+      },
+      { rootMargin: "200px" },
+    );
+    graphs.forEach((graph) => observer.observe(graph));
+  });
+})();
@@ -16,20 +16,27 @@ import sys
 sys.path.insert(0, os.path.abspath("."))
 import os
 import subprocess
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from _ext import rss
-
 if TYPE_CHECKING:
     from sphinx.application import Sphinx
 
-current_year = datetime.now().year
+# reproducible builds pin the date: https://reproducible-builds.org/specs/source-date-epoch/
+if "SOURCE_DATE_EPOCH" in os.environ:
+    build_date = datetime.fromtimestamp(
+        int(os.environ["SOURCE_DATE_EPOCH"]), timezone.utc
+    )
+else:
+    build_date = datetime.now()
+current_year = build_date.year
 organization_name = "pyOpenSci"
 
 # env vars
 sphinx_env = os.environ.get("SPHINX_ENV", "development")
 language_env = os.environ.get("SPHINX_LANG", "en")
+# the caches that survive between builds, relative to this directory
+cache_dir_env = os.environ.get("SPHINX_CACHE_DIR", "_build/.cache")
 
 
 # -- Project information -----------------------------------------------------
@@ -58,15 +65,18 @@ else:
 
 # Use only the Git SHA for the Sphinx "release" string.
 # (Sphinx doesn't require PEP 440 here, but we keep it well-formed and stable.)
-try:
-    release_value = (
-        subprocess.check_output(["git", "rev-parse", "--short=12", "HEAD"])
-        .decode("utf-8")
-        .strip()
-    )
-except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
-    # Fallback when building from a source archive or without git available
-    release_value = "unknown"
+# SPHINX_RELEASE lets scripts/build/build_languages.py ask git once for all languages
+release_value = os.environ.get("SPHINX_RELEASE", "")
+if not release_value:
+    try:
+        release_value = (
+            subprocess.check_output(["git", "rev-parse", "--short=12", "HEAD"])
+            .decode("utf-8")
+            .strip()
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        # Fallback when building from a source archive or without git available
+        release_value = "unknown"
 
 release = release_value
 
@@ -86,8 +96,20 @@ extensions = [
     "sphinx_favicon",
     "sphinxcontrib.bibtex",
     "_ext.translation_graph",
+    "_ext.rss",
+    "_ext.gettext_manifest",
+    "_ext.doctree_cache",
+    "_ext.html_gettext",
 ]
 
+# opt-in build profiling: SPHINX_PROFILE=timing,memory (see _ext/build_*.py),
+# loaded first so that they measure the listeners of the other extensions
+profilers = os.environ.get("SPHINX_PROFILE", "").split(",")
+if "memory" in profilers:
+    extensions.insert(0, "_ext.build_memory")
+if "timing" in profilers:
+    extensions.insert(0, "_ext.build_timing")
+
 # colon fence for card support in md
 myst_enable_extensions = [
     "colon_fence",
@@ -108,6 +130,10 @@ lang_selector_baseurl = "/python-package-guide/"
 if not sphinx_env == "production":
     # for links in language selector when developing locally
     lang_selector_baseurl = "/"
+# every language loads plotly.js from the English build, so browsers cache it once
+translation_graph_shared_static = f"{lang_selector_baseurl}_static/"
+# append the translation stats of each build to the progress history
+translation_stats_history = os.path.join(cache_dir_env, "translation_history")
 
 html_theme_options = {
     "announcement": "<p><a href='https://www.pyopensci.org/about-peer-review/index.html'>We run peer review of scientific Python software. Learn more.</a></p>",
@@ -240,12 +266,18 @@ linkcheck_ignore = [
 ]
 
 
-def _post_build(app: "Sphinx", exception: Exception | None) -> None:
-    rss.generate_tutorials_feed(app)
+# -- Options for RSS feeds --------------------------------------------------
 
+# one <section>.rss feed per section, in the output of each language
+rss_feeds = {
+    "tutorials": {
+        "title": "pyOpenSci Tutorials",
+        "index": "tutorials/intro",
+        "description": "A tutorial feed that lists metadata for the pyOpenSci Python packaging tutorials so we can automatically list them on our website.",
+    },
+}
 
-def setup(app: "Sphinx"):
-    app.connect("build-finished", _post_build)
 
+def setup(app: "Sphinx"):
     # Parallel safety: https://www.sphinx-doc.org/en/master/extdev/index.html#extension-metadata
     return {"parallel_read_safe": True, "parallel_write_safe": True}
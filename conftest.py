@@ -0,0 +1,93 @@
+"""Fixtures shared by the tests of the extensions in _ext and of the build scripts."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent
+
+CONF = """
+import sys
+sys.path.insert(0, {base!r})
+extensions = {extensions!r}
+locale_dirs = ["locales"]
+
+
+def setup(app):
+    def note_read(app, doctree):
+        with open({log!r}, "a") as log:
+            log.write(app.env.docname + "\\n")
+
+    app.connect("doctree-read", note_read)
+"""
+
+
+class SphinxProject:
+    """A small Sphinx project, which notes the pages each build reads."""
+
+    def __init__(
+        self,
+        root: Path,
+        pages: dict[str, str],
+        files: dict[str, str],
+        extensions: list[str],
+        conf: str = "",
+    ):
+        self.root = root
+        self.srcdir = root / "source"
+        self.log = root / "read.log"
+        settings = {"base": str(BASE_DIR), "extensions": extensions}
+        settings["log"] = str(self.log)
+        self.write("conf.py", CONF.format(**settings) + conf)
+        for name, text in pages.items():
+            self.write(f"{name}.rst", text)
+        for name, text in files.items():
+            self.write(name, text)
+
+    def write(self, name: str, text: str) -> Path:
+        path = self.srcdir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        return path
+
+    def build(
+        self,
+        builder: str = "html",
+        outdir: Path | None = None,
+        doctree_dir: Path | None = None,
+        language: str | None = None,
+    ) -> list[str]:
+        """
+        Build the project, into ``<root>/<builder>[-<language>]`` by default, and
+        return the pages the build read.
+        """
+        from sphinx.cmd.build import build_main
+
+        if outdir is None:
+            outdir = self.root / (f"{builder}-{language}" if language else builder)
+        args = ["-q", "-b", builder]
+        if doctree_dir is not None:
+            args += ["-d", str(doctree_dir)]
+        if language is not None:
+            args += ["-D", f"language={language}"]
+        self.log.unlink(missing_ok=True)
+        assert build_main([*args, str(self.srcdir), str(outdir)]) == 0
+        return sorted(self.log.read_text().split()) if self.log.exists() else []
+
+
+@pytest.fixture
+def sphinx_project(tmp_path):
+    """
+    Make a project from its pages (reStructuredText, by docname), any other files
+    (by path), extensions and settings added to conf.py, in ``tmp_path`` or the
+    given directory.
+    """
+
+    def make(pages, files=None, extensions=(), root=None, conf=""):
+        root = tmp_path if root is None else root
+        root.mkdir(parents=True, exist_ok=True)
+        return SphinxProject(root, pages, files or {}, list(extensions), conf)
+
+    return make
@@ -1,7 +1,6 @@
 import os
 import pathlib
 import shutil
-import subprocess
 import sys
 
 import nox
@@ -22,6 +21,9 @@ SOURCE_DIR = pathlib.Path(".")
 
 # Location of the translation templates
 TRANSLATION_TEMPLATE_DIR = pathlib.Path(BUILD_DIR, "gettext")
+# Doctrees of the English HTML build, which the templates are written from
+# (see _ext/html_gettext.py)
+HTML_DOCTREE_DIR = OUTPUT_DIR / ".doctrees"
 TRANSLATION_LOCALES_DIR = pathlib.Path("locales")
 
 # Sphinx build commands
@@ -51,6 +53,23 @@ TRANSLATION_TEMPLATE_PARAMETERS = ["-b", "gettext"]
 # Scripts that maintain the translation stats and the translation issues
 TRANSLATION_SCRIPTS_DIR = pathlib.Path("scripts", "translation")
 
+# Sphinx extensions local to the guide
+EXTENSIONS_DIR = pathlib.Path("_ext")
+
+# Benchmarks of the extensions, on synthetic translations and tutorials
+BENCHMARKS_DIR = pathlib.Path("scripts", "benchmarks")
+
+# Reports of the opt-in build profilers (SPHINX_PROFILE)
+PROFILE_DIR = pathlib.Path(BUILD_DIR, "profile")
+
+# Scripts that drive or check whole builds of the guide
+BUILD_SCRIPTS_DIR = pathlib.Path("scripts", "build")
+
+# Translation stats computed once and shared by the build of each language
+TRANSLATION_STATS_SNAPSHOT = pathlib.Path(
+    BUILD_DIR, ".cache", "translation_stats_snapshot.json"
+)
+
 # Sphinx-autobuild ignore and include parameters
 AUTOBUILD_IGNORE = [
     "_build",
@@ -78,7 +97,12 @@ def docs(session):
     session.install("-e", ".")
     sphinx_env = _sphinx_env(session)
     session.run(
-        SPHINX_BUILD, *BUILD_PARAMETERS, SOURCE_DIR, OUTPUT_DIR, *session.posargs
+        SPHINX_BUILD,
+        *BUILD_PARAMETERS,
+        *_translation_stats_snapshot(session),
+        SOURCE_DIR,
+        OUTPUT_DIR,
+        *session.posargs,
     )
     # When building the guide, also build the translations in RELEASE_LANGUAGES
     session.notify("build-release-languages", session.posargs)
@@ -108,10 +132,14 @@ def docs_test(session):
     Note: this is the session used in CI/CD to release the guide.
     """
     session.install("-e", ".")
+    # Add the commits that changed the .po files and are not in the translation
+    # history yet, such as all of them when the CI cache of the history is gone
+    session.run("python", "-m", "_ext.translation_history", "backfill")
     session.run(
         SPHINX_BUILD,
         *BUILD_PARAMETERS,
         *TEST_PARAMETERS,
+        *_translation_stats_snapshot(session),
         SOURCE_DIR,
         OUTPUT_DIR,
         *session.posargs,
@@ -124,6 +152,76 @@ def docs_test(session):
     )
 
 
+@nox.session(name="docs-profile")
+def docs_profile(session):
+    """
+    Build the guide with the build timing extension, and print where the time went.
+
+    The full reports (JSON and collapsed stacks for flamegraph tools) are written to
+    _build/profile, replacing those of the previous run. It takes sphinx-build
+    parameters, for example -D language=es.
+    """
+    session.install("-e", ".")
+    _remove_reports(session, "timing-*.json", "timing-*.collapsed")
+    session.run(
+        SPHINX_BUILD,
+        *BUILD_PARAMETERS,
+        *_translation_stats_snapshot(session),
+        SOURCE_DIR,
+        OUTPUT_DIR,
+        *session.posargs,
+        env={"SPHINX_PROFILE": "timing"},
+    )
+    reports = sorted(pathlib.Path(PROFILE_DIR).glob("timing-*.json"))
+    session.run("python", "-m", "_ext.build_timing", *map(str, reports))
+
+
+@nox.session(name="docs-profile-memory")
+def docs_profile_memory(session):
+    """
+    Build the guide and its release translations with the memory profiler, and
+    print the peak memory of each build phase and language.
+
+    Each language is built in a process of its own, traced from the start, so that
+    the reports of the languages, and of different runs, can be compared. The
+    reports are written to _build/profile/memory-html-<lang>.json, replacing those
+    of the previous run. It takes sphinx-build parameters, and --baseline DIR as the
+    first parameters to compare with the reports of an earlier run (copied to DIR),
+    for example:
+
+        nox -s docs-profile-memory -- --baseline _build/profile-main
+    """
+    baseline = []
+    if session.posargs[:1] == ["--baseline"]:
+        baseline, session.posargs[:] = session.posargs[:2], session.posargs[2:]
+    session.install("-e", ".")
+    stats_snapshot = _translation_stats_snapshot(session)
+    _remove_reports(session, "memory-*.json")
+    _build_languages(
+        session,
+        ["en", *RELEASE_LANGUAGES],
+        [*stats_snapshot, *session.posargs],
+        env={"SPHINX_PROFILE": "memory", "PYTHONTRACEMALLOC": "1"},
+        isolated=True,
+    )
+    reports = sorted(pathlib.Path(PROFILE_DIR).glob("memory-html-*.json"))
+    session.run("python", "-m", "_ext.build_memory", *map(str, reports), *baseline)
+
+
+@nox.session(name="docs-reproducible")
+def docs_reproducible(session):
+    """
+    Build the guide twice with the same SOURCE_DATE_EPOCH and report any file that
+    differs, since unchanged sources should give byte-identical output.
+
+    It takes sphinx-build parameters, for example: nox -s docs-reproducible -- -D language=es
+    """
+    session.install("-e", ".")
+    session.run(
+        "python", str(BUILD_SCRIPTS_DIR / "check_reproducible.py"), *session.posargs
+    )
+
+
 def _autobuild_cmd(posargs: list[str], output_dir=OUTPUT_DIR) -> list[str]:
     cmd = [
         SPHINX_AUTO_BUILD,
@@ -195,57 +293,25 @@ def docs_live_lang(session):
 @nox.session(name="docs-live-langs")
 def docs_live_langs(session):
     """
-    Like docs-live but build all languages simultaneously
+    Like docs-live but build and serve all languages at once, on a single port.
 
-    Requires concurrently to run (npm install -g concurrently)
-    """
-    try:
-        subprocess.check_call(
-            ["concurrently"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        )
-    except subprocess.CalledProcessError:
-        # handle errors in the called executable
-        # (aka, was found)
-        pass
-    except OSError:
-        session.error(
-            "docs-live-langs requires concurrently (npm install -g concurrently)"
-        )
+    English is served at / and each translation at /<language>/. Changes to a
+    language's .po files rebuild that language only, other changes rebuild every
+    language. It takes sphinx-build parameters, for example:
 
+        nox -s docs-live-langs -- -D some_setting=value
+    """
     session.install("-e", ".")
-
-    cmds = [
-        '"'
-        + " ".join(
-            ["SPHINX_ENV=development"]
-            + _autobuild_cmd(session.posargs)
-            + ["--open-browser"]
-        )
-        + '"'
-    ]
-    for language in LANGUAGES:
-        cmds.append(
-            '"'
-            + " ".join(
-                [f"SPHINX_LANG={language}", "SPHINX_ENV=development"]
-                + _autobuild_cmd(
-                    session.posargs + ["-D", f"language={language}"],
-                    output_dir=OUTPUT_DIR / language,
-                )
-                + ["--port=0"]
-            )
-            + '"'
-        )
-    cmd = [
-        "concurrently",
-        "--kill-others",
-        "-n",
-        ",".join(["en"] + LANGUAGES),
-        "-c",
-        "auto",
-        *cmds,
-    ]
-    session.run(*cmd)
+    session.run(
+        "python",
+        str(BUILD_SCRIPTS_DIR / "live_server.py"),
+        "--open-browser",
+        "en",
+        *LANGUAGES,
+        "--",
+        *session.posargs,
+        env={"SPHINX_ENV": "development"},
+    )
 
 
 @nox.session(name="docs-clean")
@@ -271,21 +337,10 @@ def update_release_languages(session):
     """
     if RELEASE_LANGUAGES:
         session.install("-e", ".")
-        session.install("sphinx-intl")
-        _clean_translation_templates(session)
         session.log("Updating templates (.pot)")
-        session.run(
-            SPHINX_BUILD,
-            *TRANSLATION_TEMPLATE_PARAMETERS,
-            SOURCE_DIR,
-            TRANSLATION_TEMPLATE_DIR,
-            *session.posargs,
-        )
-        for lang in RELEASE_LANGUAGES:
-            session.log(f"Updating .po files for [{lang}] translation")
-            session.run(
-                "sphinx-intl", "update", "-p", TRANSLATION_TEMPLATE_DIR, "-l", lang
-            )
+        _update_templates(session)
+        session.log(f"Updating .po files for {RELEASE_LANGUAGES} translations")
+        _update_catalogs(session, RELEASE_LANGUAGES)
     else:
         session.warn("No release languages defined in RELEASE_LANGUAGES")
 
@@ -301,20 +356,10 @@ def update_language(session):
     if session.posargs and (lang := session.posargs.pop(0)):
         if lang in LANGUAGES:
             session.install("-e", ".")
-            session.install("sphinx-intl")
-            _clean_translation_templates(session)
             session.log("Updating templates (.pot)")
-            session.run(
-                SPHINX_BUILD,
-                *TRANSLATION_TEMPLATE_PARAMETERS,
-                SOURCE_DIR,
-                TRANSLATION_TEMPLATE_DIR,
-                *session.posargs,
-            )
+            _update_templates(session)
             session.log(f"Updating .po files for [{lang}] translation")
-            session.run(
-                "sphinx-intl", "update", "-p", TRANSLATION_TEMPLATE_DIR, "-l", lang
-            )
+            _update_catalogs(session, [lang])
         else:
             f"[{lang}] locale is not available. Try using:\n\n      "
             "nox -s docs-live-lang -- LANG\n\n      "
@@ -337,10 +382,12 @@ def build_language(session):
     if session.posargs and (lang := session.posargs.pop(0)):
         if lang in LANGUAGES:
             session.install("-e", ".")
+            stats_snapshot = _translation_stats_snapshot(session)
             session.log(f"Building [{lang}] guide")
             session.run(
                 SPHINX_BUILD,
                 *BUILD_PARAMETERS,
+                *stats_snapshot,
                 "-D",
                 f"language={lang}",
                 ".",
@@ -367,22 +414,13 @@ def build_release_languages(session):
         session.warn("No release languages defined in RELEASE_LANGUAGES")
         return
     session.install("-e", ".")
-    for lang in RELEASE_LANGUAGES:
-        session.log(f"Building [{lang}] guide")
-        if lang == "en":
-            out_dir = OUTPUT_DIR
-        else:
-            out_dir = OUTPUT_DIR / lang
-        session.run(
-            SPHINX_BUILD,
-            *BUILD_PARAMETERS,
-            "-D",
-            f"language={lang}",
-            ".",
-            out_dir,
-            *session.posargs,
-            env={"SPHINX_LANG": lang, "SPHINX_ENV": sphinx_env},
-        )
+    stats_snapshot = _translation_stats_snapshot(session)
+    _build_languages(
+        session,
+        RELEASE_LANGUAGES,
+        [*stats_snapshot, *session.posargs],
+        env={"SPHINX_ENV": sphinx_env},
+    )
     session.log(f"Translations built for {RELEASE_LANGUAGES}")
 
 
@@ -407,17 +445,8 @@ def build_all_languages(session):
     session.log(
         f"Building languages{' for release' if sphinx_env == 'production' else ''}: {BUILD_LANGUAGES}"
     )
-    for lang in LANGUAGES:
-        session.log(f"Building [{lang}] guide")
-        session.run(
-            SPHINX_BUILD,
-            *BUILD_PARAMETERS,
-            "-D",
-            f"language={lang}",
-            ".",
-            OUTPUT_DIR / lang,
-            *session.posargs,
-        )
+    stats_snapshot = _translation_stats_snapshot(session)
+    _build_languages(session, LANGUAGES, [*stats_snapshot, *session.posargs])
     session.log(f"Translations built for {LANGUAGES}")
 
 
@@ -443,17 +472,163 @@ def test_translation_scripts(session):
     session.run("pytest", str(TRANSLATION_SCRIPTS_DIR), *session.posargs)
 
 
-def _clean_translation_templates(session) -> None:
+@nox.session(name="test-extensions")
+def test_extensions(session):
+    """
+    Run the unit tests for the Sphinx extensions in _ext, their benchmarks and the
+    build scripts.
+    """
+    session.install("-e", ".")
+    session.install("pytest")
+    session.run(
+        "pytest",
+        str(EXTENSIONS_DIR),
+        str(BENCHMARKS_DIR),
+        str(BUILD_SCRIPTS_DIR),
+        *session.posargs,
+    )
+
+
+@nox.session
+def benchmarks(session):
+    """
+    Time the Sphinx extensions in _ext and compare with the saved baseline.
+
+    Save a baseline before a change, then run again after it to compare:
+
+        nox -s benchmarks -- --save-baseline
+        nox -s benchmarks
+    """
+    session.install("-e", ".")
+    session.run("python", str(BENCHMARKS_DIR / "run_benchmarks.py"), *session.posargs)
+
+
+@nox.session
+def bench(session):
+    """
+    Time cold, no-op and incremental builds of the guide, and a build of all the
+    release languages, and compare with the previous run.
+
+    Each run is added to the history in _build/.cache/benchmarks/build_history.json,
+    and fails when a build is slower than the previous run beyond the tolerance. It
+    takes the options of scripts/benchmarks/run_build_benchmarks.py, for example:
+
+        nox -s bench -- --repeat 3 --tolerance 0.1
+    """
+    session.install("-e", ".")
+    languages = [f"--language={lang}" for lang in ["en", *RELEASE_LANGUAGES]]
+    session.run(
+        "python",
+        str(BENCHMARKS_DIR / "run_build_benchmarks.py"),
+        *languages,
+        *session.posargs,
+    )
+
+
+def _update_templates(session) -> None:
+    """
+    Write the translation templates (.pot) from the doctrees of the English HTML build.
+
+    Only the pages changed since the last HTML or gettext build are read again, and the
+    templates of pages that are gone are removed (see _ext/html_gettext.py and
+    _ext/gettext_manifest.py). The next HTML build reads the pages read here again.
+    """
+    session.run(
+        SPHINX_BUILD,
+        *TRANSLATION_TEMPLATE_PARAMETERS,
+        "-d",
+        HTML_DOCTREE_DIR,
+        SOURCE_DIR,
+        TRANSLATION_TEMPLATE_DIR,
+        *session.posargs,
+    )
+
+
+def _update_catalogs(session, languages: list[str]) -> None:
+    """
+    Merge the templates (.pot) into the .po files of the languages, with a single
+    `sphinx-intl update` for all of them, which merges the files in parallel, one
+    process per CPU. The .po files whose messages did not change are not written.
     """
-    Remove the gettext output directory before regenerating the templates (.pot).
+    session.install("sphinx-intl")
+    languages_args = [arg for lang in languages for arg in ("-l", lang)]
+    session.run(
+        "sphinx-intl",
+        "update",
+        "-p",
+        TRANSLATION_TEMPLATE_DIR,
+        "-d",
+        TRANSLATION_LOCALES_DIR,
+        *languages_args,
+    )
 
-    The gettext build is incremental and never deletes .pot files whose source page is
-    gone. `sphinx-intl update` creates a .po for every .pot it finds. We need to clean
-    so orphan .pot files don't continue to create orphan .po files in each locale.
+
+def _build_languages(
+    session,
+    languages: list[str],
+    sphinx_args: list[str],
+    env: dict | None = None,
+    isolated: bool = False,
+) -> None:
+    """
+    Build the guide in HTML for each language.
+
+    The languages are built one after the other in a single process, which loads
+    Sphinx and the extensions only once. Set LANGUAGE_BUILD_ISOLATED=1 (or pass
+    isolated=True) to build each one in a sphinx-build process of its own instead,
+    and LANGUAGE_BUILD_JOBS to build several of those at the same time (0 for one
+    per CPU). Each language gets its own output and doctree directories, and a log
+    in _build/logs/<lang>.log.
+    """
+    jobs = os.environ.get("LANGUAGE_BUILD_JOBS", "1")
+    isolated = isolated or bool(os.environ.get("LANGUAGE_BUILD_ISOLATED"))
+    session.run(
+        "python",
+        str(BUILD_SCRIPTS_DIR / "build_languages.py"),
+        "--jobs",
+        jobs,
+        *(["--isolated"] if isolated else []),
+        "--out-dir",
+        str(OUTPUT_DIR),
+        *languages,
+        "--",
+        *sphinx_args,
+        env=env,
+    )
+
+
+def _translation_stats_snapshot(session) -> list[str]:
+    """
+    Compute the translation stats once for all the languages built by this nox invocation.
+
+    The snapshot is only rewritten when a .po file changed since it was written. The
+    returned sphinx-build parameters point each build to it, so neither the translation
+    graph nor the translation_stats.json of each language computes the stats again.
+    """
+    # TRANSLATION_STATS_WORKERS parses the .po files in that many processes (0 for
+    # one per CPU) rather than in this one
+    workers = os.environ.get("TRANSLATION_STATS_WORKERS", "1")
+    session.run(
+        "python",
+        "-m",
+        "_ext.translation_graph",
+        str(TRANSLATION_STATS_SNAPSHOT),
+        "--workers",
+        workers,
+    )
+    snapshot = TRANSLATION_STATS_SNAPSHOT.absolute()
+    return ["-D", f"translation_stats_snapshot={snapshot}"]
+
+
+def _remove_reports(session, *patterns: str) -> None:
+    """
+    Remove the profiling reports of earlier runs from PROFILE_DIR, so that only those
+    of this run (and not of other languages or builders) are summarized.
     """
-    if TRANSLATION_TEMPLATE_DIR.exists():
-        session.log(f"Cleaning out {TRANSLATION_TEMPLATE_DIR}")
-        shutil.rmtree(TRANSLATION_TEMPLATE_DIR)
+    for pattern in patterns:
+        for report in PROFILE_DIR.glob(pattern):
+            session.log(f"removing {report}")
+            report.unlink()
 
 
 def _sphinx_env(session) -> str:
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""Time the guide's Sphinx extensions on synthetic inputs of several sizes.
+
+Each benchmark runs on a generated ``locales/`` tree or set of tutorial pages (see
+``synthetic.py``), and its best time out of a few runs is compared with a baseline
+saved by an earlier run, so that a change that makes the build slower shows up
+before it reaches the build itself:
+
+    python scripts/benchmarks/run_benchmarks.py --save-baseline   # before
+    python scripts/benchmarks/run_benchmarks.py                   # after
+
+The run fails when a benchmark is slower than its baseline by more than the
+tolerance. Timings only compare on the same machine, which is why the baseline
+lives in the build directory rather than in the repository.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+
+from _ext import rss  # noqa: E402
+from _ext.translation_graph import TranslationGraph, get_translation_stats  # noqa: E402
+from synthetic import (  # noqa: E402
+    LocalesSpec,
+    tutorial_metadata,
+    write_locales,
+    write_tutorial_sources,
+)
+
+BASELINE_PATH = BASE_DIR / "_build" / ".cache" / "benchmarks" / "baseline.json"
+
+# "medium" is about the size of the guide's own translations today
+LOCALES_SCALES = {
+    "small": LocalesSpec(locales=2, catalogs=10, messages=50),
+    "medium": LocalesSpec(locales=7, catalogs=40, messages=100),
+    "large": LocalesSpec(locales=30, catalogs=80, messages=300),
+}
+TUTORIALS_SCALES = {"small": 10, "medium": 100, "large": 2000}
+
+
+def translation_benchmarks(
+    scale: str, spec: LocalesSpec, workdir: Path
+) -> dict[str, Callable[[], object]]:
+    locales_dir = workdir / "locales"
+    write_locales(locales_dir, spec)
+    cache_path = workdir / "translation_stats.json"
+    stats = get_translation_stats(cache_path=cache_path, locales_dir=locales_dir)
+    return {
+        f"translation_stats[{scale}]": lambda: get_translation_stats(
+            cache_path=None, locales_dir=locales_dir
+        ),
+        f"translation_stats_cached[{scale}]": lambda: get_translation_stats(
+            cache_path=cache_path, locales_dir=locales_dir
+        ),
+        f"translation_graph_figure[{scale}]": lambda: (
+            TranslationGraph.build_figure(stats).to_json()
+        ),
+    }
+
+
+def feed_benchmarks(
+    scale: str, tutorials: int, workdir: Path
+) -> dict[str, Callable[[], object]]:
+    metadata = tutorial_metadata(tutorials, other_pages=tutorials * 2)
+    srcdir = workdir / "source"
+    outdir = workdir / "html"
+    doctreedir = workdir / "doctrees"
+    write_tutorial_sources(srcdir, metadata)
+    outdir.mkdir()
+    doctreedir.mkdir()
+    feeds = {"tutorials": {"title": "", "index": "tutorials/intro", "description": ""}}
+    # Just what generate_feeds uses of a Sphinx application
+    app = SimpleNamespace(
+        config=SimpleNamespace(
+            html_baseurl="https://example.org/guide/", language="en", rss_feeds=feeds
+        ),
+        builder=SimpleNamespace(
+            env=SimpleNamespace(metadata=metadata),
+            get_target_uri=lambda page: f"{page}.html",
+        ),
+        srcdir=srcdir,
+        outdir=outdir,
+        doctreedir=doctreedir,
+    )
+    return {
+        f"tutorials_feed[{scale}]": lambda: rss.generate_feeds(app, force=True),
+        f"tutorials_feed_unchanged[{scale}]": lambda: rss.generate_feeds(app),
+    }
+
+
+def run(scales: list[str], repeat: int) -> dict[str, float]:
+    """The best time of each benchmark, in seconds."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            workdir = Path(tmp, scale)
+            benchmarks = {
+                **translation_benchmarks(scale, LOCALES_SCALES[scale], workdir),
+                **feed_benchmarks(scale, TUTORIALS_SCALES[scale], workdir),
+            }
+            for name, benchmark in benchmarks.items():
+                benchmark()  # Warm up imports and caches
+                timer = timeit.Timer(benchmark)
+                results[name] = min(timer.repeat(repeat=repeat, number=1))
+                print(f"{name:40} {results[name] * 1000:10.2f} ms", flush=True)
+    return results
+
+
+def regressions(
+    results: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """Describe each benchmark slower than its baseline by more than the tolerance."""
+    slower = []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is not None and seconds > before * (1 + tolerance):
+            slower.append(
+                f"{name}: {seconds * 1000:.2f} ms, was {before * 1000:.2f} ms "
+                f"({seconds / before - 1:+.0%})"
+            )
+    return slower
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale",
+        dest="scales",
+        action="append",
+        choices=list(LOCALES_SCALES),
+        help="only run this scale (can be repeated), all of them by default",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="save the results as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="how much slower than the baseline a benchmark may be (0.25: 25%%)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.scales or list(LOCALES_SCALES), args.repeat)
+
+    if args.save_baseline:
+        # Keep the baseline of the scales that were not run
+        baseline = {}
+        if args.baseline.is_file():
+            baseline = json.loads(args.baseline.read_text())["results"]
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": {**baseline, **results},
+                },
+                indent=2,
+            )
+        )
+        print(f"Saved the baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.is_file():
+        print(f"No baseline in {args.baseline} to compare with, see --save-baseline")
+        return 0
+    baseline = json.loads(args.baseline.read_text())["results"]
+    slower = regressions(results, baseline, args.tolerance)
+    if slower:
+        print(f"Slower than the baseline by more than {args.tolerance:.0%}:")
+        print("\n".join(f"  {line}" for line in slower))
+        return 1
+    print(f"No benchmark is slower than the baseline by more than {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+"""Time whole builds of the guide: cold, no-op, incremental and multi-language.
+
+The scenarios build a copy of the guide (the files git lists, committed or not)
+in a temporary directory, and run in this order, each building on what the
+previous ones left there:
+
+- ``cold``: a full English build, from empty output and cache directories
+- ``noop``: the same build again, with nothing changed
+- ``touched_page``: the same build after editing one page (``--page``)
+- ``languages``: a full build of every language (``--language``, repeated), with
+  scripts/build/build_languages.py
+- ``touched_catalog``: the build of the first translation after editing one of
+  its catalogs (``--catalog``)
+
+The builds keep their caches (``SPHINX_CACHE_DIR``) in the temporary directory
+too, the translation stats snapshot shared by the languages included: the
+``cold`` and ``languages`` builds compute the stats again. They read the history
+of the repository for the dates of the pages. Editing adds a line to the end of
+the file of the copy, a different one each time, so that its content changes and
+not only its modification time.
+
+Each run is recorded in a history of timings, and compared with the last run
+recorded before it; the run fails when a scenario is slower by more than the
+tolerance. A run that is slower is recorded but is not the baseline of the next
+one, unless ``--accept`` is given. Arguments after ``--`` are passed on to every build:
+
+    python scripts/benchmarks/run_build_benchmarks.py --language en --language es
+    python scripts/benchmarks/run_build_benchmarks.py -- -D some_setting=value
+
+Timings only compare on the same machine, which is why the history lives in the
+build directory rather than in the repository.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from run_benchmarks import BASE_DIR, regressions
+
+HISTORY_PATH = BASE_DIR / "_build" / ".cache" / "benchmarks" / "build_history.json"
+# Relative to the copy of the guide
+BUILD_LANGUAGES = Path("scripts", "build", "build_languages.py")
+LOCALES_DIR = Path("locales")
+
+
+@dataclass
+class Scenario:
+    name: str
+    command: list[str]
+    # Run before each time the command is timed, such as editing a file
+    prepare: Callable[[], None] | None = None
+    env: dict[str, str] | None = None
+    cwd: Path = BASE_DIR
+
+
+def scenarios(
+    workdir: Path,
+    languages: list[str],
+    page: str,
+    catalog: str,
+    sphinx_args: list[str],
+) -> list[Scenario]:
+    """The scenarios of the copy of the guide in ``workdir/source``."""
+    source_dir, html_dir = workdir / "source", workdir / "html"
+    doctree_dir, languages_dir = workdir / "doctrees", workdir / "languages"
+    cache_dir = workdir / "cache"
+    snapshot_path = cache_dir / "translation_stats_snapshot.json"
+    env = {
+        **os.environ,
+        "SPHINX_CACHE_DIR": str(cache_dir),
+        # The copy has the files of the repository, not its history
+        "GIT_DIR": str(BASE_DIR / ".git"),
+        "GIT_WORK_TREE": str(source_dir),
+    }
+    sphinx_args = ["-D", f"translation_stats_snapshot={snapshot_path}", *sphinx_args]
+    english = [
+        "sphinx-build",
+        "-q",
+        "-b",
+        "html",
+        "-d",
+        str(doctree_dir),
+        *sphinx_args,
+        str(source_dir),
+        str(html_dir),
+    ]
+
+    def build_languages(*languages: str) -> list[str]:
+        return [
+            sys.executable,
+            str(source_dir / BUILD_LANGUAGES),
+            "--out-dir",
+            str(languages_dir),
+            *languages,
+            "--",
+            "-q",
+            *sphinx_args,
+        ]
+
+    def clean(*paths: Path) -> Callable[[], None]:
+        def remove() -> None:
+            for path in paths:
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink(missing_ok=True)
+
+        return remove
+
+    page_edit = "\n\nEdited for a benchmark ({}).\n"
+    found = [
+        Scenario("cold", english, clean(html_dir, doctree_dir, cache_dir)),
+        Scenario("noop", english),
+        Scenario("touched_page", english, edit(source_dir / page, page_edit)),
+        Scenario(
+            "languages",
+            build_languages(*languages),
+            clean(languages_dir, snapshot_path),
+        ),
+    ]
+    if translations := [language for language in languages if language != "en"]:
+        po_path = source_dir / LOCALES_DIR / translations[0] / "LC_MESSAGES" / catalog
+        found.append(
+            Scenario(
+                "touched_catalog",
+                build_languages(translations[0]),
+                edit(po_path, "\n# Edited for a benchmark ({})\n"),
+            )
+        )
+    for scenario in found:
+        scenario.env, scenario.cwd = env, source_dir
+    return found
+
+
+def copy_source(dest: Path) -> None:
+    """Copy the files of the guide git lists, committed or not, but not ignored."""
+    result = subprocess.run(
+        ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        check=True,
+    )
+    for name in result.stdout.decode().split("\0"):
+        path = BASE_DIR / name
+        # Files deleted but not committed yet are still listed
+        if name and path.is_file():
+            (dest / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, dest / name)
+
+
+def edit(path: Path, line: str) -> Callable[[], None]:
+    """
+    Add a line to the end of a file, numbered so that each edit differs from the
+    last (the same content would not be read again).
+    """
+    original = []
+    numbers = itertools.count(1)
+
+    def add_line() -> None:
+        if not original:
+            original.append(path.read_bytes())
+        path.write_bytes(original[0] + line.format(next(numbers)).encode())
+
+    return add_line
+
+
+def run(scenarios: list[Scenario], repeat: int) -> dict[str, float]:
+    """The best wall time of each scenario, in seconds."""
+    results = {}
+    for scenario in scenarios:
+        times = []
+        for _ in range(repeat):
+            if scenario.prepare:
+                scenario.prepare()
+            start = time.perf_counter()
+            subprocess.run(
+                scenario.command, cwd=scenario.cwd, env=scenario.env, check=True
+            )
+            times.append(time.perf_counter() - start)
+        results[scenario.name] = min(times)
+        print(f"{scenario.name:20} {results[scenario.name]:10.2f} s", flush=True)
+    return results
+
+
+def baseline(history: list[dict]) -> dict | None:
+    """The last run recorded that was not slower than its own baseline."""
+    return next((run for run in reversed(history) if not run["regressions"]), None)
+
+
+def git_commit() -> str:
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        usage="%(prog)s [options] [-- SPHINX_ARGS]",
+    )
+    parser.add_argument(
+        "--language",
+        dest="languages",
+        action="append",
+        help="language of the multi-language build (can be repeated), en and es "
+        "by default",
+    )
+    parser.add_argument("--page", default="tutorials/intro.md")
+    parser.add_argument("--catalog", default="tutorials.po")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scenario")
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="how much slower than the baseline a scenario may be (0.25: 25%%)",
+    )
+    parser.add_argument(
+        "--accept",
+        action="store_true",
+        help="make this run the baseline of the next ones, even if it is slower",
+    )
+    parser.add_argument(
+        "--no-record", action="store_true", help="do not add this run to the history"
+    )
+    argv = sys.argv[1:] if argv is None else argv
+    sphinx_args = []
+    if "--" in argv:
+        argv, sphinx_args = argv[: argv.index("--")], argv[argv.index("--") + 1 :]
+    args = parser.parse_args(argv)
+
+    languages = args.languages or ["en", "es"]
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_source(Path(tmp) / "source")
+        found = scenarios(Path(tmp), languages, args.page, args.catalog, sphinx_args)
+        results = run(found, args.repeat)
+
+    history = json.loads(args.history.read_text()) if args.history.is_file() else []
+    previous = baseline(history)
+    slower = []
+    if previous is None:
+        print(f"No earlier run in {args.history} to compare with")
+    else:
+        slower = regressions(results, previous["results"], args.tolerance)
+        than = f"than the run of {previous['date']} by more than {args.tolerance:.0%}"
+        if slower:
+            print(f"Slower {than}:")
+            print("\n".join(f"  {line}" for line in slower))
+        else:
+            print(f"No scenario is slower {than}")
+
+    if not args.no_record:
+        history.append(
+            {
+                "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "languages": languages,
+                "results": results,
+                "regressions": [] if args.accept else slower,
+            }
+        )
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        args.history.write_text(json.dumps(history, indent=2))
+        print(f"Recorded the run in {args.history}")
+    return 1 if slower and not args.accept else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
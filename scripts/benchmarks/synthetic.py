@@ -0,0 +1,137 @@
+"""Synthetic inputs for the benchmarks: ``locales/`` trees and tutorial metadata.
+
+Everything is generated from a seed, so two runs of the benchmarks time exactly
+the same work.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple
+
+HEADER = """\
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+"""
+
+WORDS = (
+    "package python build wheel sdist version license readme test docs "
+    "environment dependency module import release publish metadata tool"
+).split()
+
+
+@dataclass(frozen=True)
+class LocalesSpec:
+    """The shape of a synthetic ``locales/`` tree."""
+
+    locales: int = 7
+    catalogs: int = 40  # Per locale
+    messages: int = 100  # Per catalog
+    # Share of the messages that are translated, fuzzy, and that have plurals
+    translated: float = 0.5
+    fuzzy: float = 0.1
+    plural: float = 0.05
+    seed: int = 0
+
+
+class CatalogCounts(NamedTuple):
+    """What a catalog should count as, in the terms of ``_ext.po_counter``."""
+
+    total: int
+    translated: int
+    fuzzy: int
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def catalog_text(spec: LocalesSpec, rng: random.Random) -> tuple[str, CatalogCounts]:
+    """The contents of one catalog, and the counts expected of it."""
+    entries = [HEADER]
+    translated = fuzzy = 0
+    for i in range(spec.messages):
+        source = f"{sentence(rng)} {i}"
+        draw = rng.random()
+        is_fuzzy = draw < spec.fuzzy
+        is_translated = not is_fuzzy and draw < spec.fuzzy + spec.translated
+        target = sentence(rng) if is_fuzzy or is_translated else ""
+
+        entry = f"#: page.md:{i}\n"
+        if is_fuzzy:
+            entry += "#, fuzzy\n"
+        if rng.random() < spec.plural:
+            # babel counts a plural entry as translated even when its strings are empty
+            is_translated = not is_fuzzy
+            entry += (
+                f'msgid "{source}"\nmsgid_plural "{source}s"\n'
+                f'msgstr[0] "{target}"\nmsgstr[1] "{target}"\n'
+            )
+        elif len(source) > 60:
+            # Long messages are wrapped, as sphinx-intl writes them
+            entry += f'msgid ""\n"{source[:60]}"\n"{source[60:]}"\n'
+            entry += f'msgstr "{target}"\n'
+        else:
+            entry += f'msgid "{source}"\nmsgstr "{target}"\n'
+        entries.append(entry)
+        translated += is_translated
+        fuzzy += is_fuzzy
+    return "\n".join(entries), CatalogCounts(spec.messages, translated, fuzzy)
+
+
+def write_locales(root: Path, spec: LocalesSpec) -> dict[Path, CatalogCounts]:
+    """
+    Write a ``<locale>/LC_MESSAGES/<module>.po`` tree under root.
+
+    Returns the expected counts of each catalog written.
+    """
+    rng = random.Random(spec.seed)
+    written = {}
+    for i in range(spec.locales):
+        catalog_dir = root / f"l{i:02d}" / "LC_MESSAGES"
+        catalog_dir.mkdir(parents=True, exist_ok=True)
+        for j in range(spec.catalogs):
+            path = catalog_dir / f"module-{j:03d}.po"
+            text, counts = catalog_text(spec, rng)
+            path.write_text(text, encoding="utf-8")
+            written[path] = counts
+    return written
+
+
+def tutorial_metadata(
+    tutorials: int, other_pages: int = 0, dated: float = 0.5, seed: int = 0
+) -> dict[str, dict]:
+    """
+    Page metadata as Sphinx collects it, for ``tutorials/`` pages and others.
+
+    Only a share of the tutorials have a ``date_updated``; the date of the others
+    comes from their source file (see `write_tutorial_sources`).
+    """
+    rng = random.Random(seed)
+    metadata = {}
+    for i in range(tutorials):
+        meta = {
+            ":og:title": f"Tutorial {i}: {sentence(rng, 6)}",
+            ":og:description": sentence(rng, 30),
+        }
+        if rng.random() < 0.3:
+            meta[":og:author"] = f"Author {i}"
+        if rng.random() < dated:
+            meta["date_updated"] = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        metadata[f"tutorials/tutorial-{i:04d}"] = meta
+    for i in range(other_pages):
+        metadata[f"section-{i % 10}/page-{i:04d}"] = {}
+    return metadata
+
+
+def write_tutorial_sources(srcdir: Path, metadata: dict[str, dict]) -> None:
+    """Write a source file for each page, for the dates taken from files."""
+    for page in metadata:
+        path = srcdir / f"{page}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# {page}\n", encoding="utf-8")
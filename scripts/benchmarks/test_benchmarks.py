@@ -0,0 +1,52 @@
+"""Tests for the synthetic benchmark inputs and the baseline comparison."""
+
+from __future__ import annotations
+
+from babel.messages import pofile
+
+import run_benchmarks
+from synthetic import CatalogCounts, LocalesSpec, tutorial_metadata, write_locales
+
+
+def babel_counts(po_path) -> CatalogCounts:
+    with open(po_path, encoding="utf-8") as f:
+        catalog = pofile.read_po(f)
+    messages = [message for message in catalog if message.id]
+    return CatalogCounts(
+        total=len(messages),
+        translated=sum(bool(m.string) and not m.fuzzy for m in messages),
+        fuzzy=sum(m.fuzzy for m in messages),
+    )
+
+
+def test_catalogs_count_as_expected(tmp_path):
+    spec = LocalesSpec(locales=2, catalogs=3, messages=200, plural=0.2)
+    written = write_locales(tmp_path, spec)
+    assert len(written) == 6
+    for path, expected in written.items():
+        assert babel_counts(path) == expected
+    # Every kind of message is there
+    totals = [sum(counts) for counts in zip(*written.values())]
+    assert totals[0] == 1200 and totals[1] > 0 and totals[2] > 0
+
+
+def test_the_same_seed_writes_the_same_tree(tmp_path):
+    spec = LocalesSpec(locales=1, catalogs=2, messages=20)
+    first = write_locales(tmp_path / "first", spec)
+    second = write_locales(tmp_path / "second", spec)
+    for a, b in zip(first, second):
+        assert a.read_bytes() == b.read_bytes()
+
+
+def test_tutorial_metadata():
+    metadata = tutorial_metadata(20, other_pages=5)
+    tutorials = [page for page in metadata if page.startswith("tutorials/")]
+    assert len(tutorials) == 20 and len(metadata) == 25
+    assert all(":og:title" in metadata[page] for page in tutorials)
+
+
+def test_only_slowdowns_beyond_the_tolerance_are_regressions():
+    baseline = {"fast": 1.0, "slow": 1.0, "gone": 1.0}
+    results = {"fast": 1.2, "slow": 1.3, "new": 5.0}
+    slower = run_benchmarks.regressions(results, baseline, tolerance=0.25)
+    assert slower == ["slow: 1300.00 ms, was 1000.00 ms (+30%)"]
@@ -0,0 +1,144 @@
+"""Tests for the build scenarios and their history."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import run_build_benchmarks
+from run_build_benchmarks import Scenario, baseline, copy_source, edit, scenarios
+
+
+def test_scenarios_build_on_each_other(tmp_path):
+    found = scenarios(tmp_path, ["en", "es", "ja"], "index.md", "index.po", ["-E"])
+
+    assert [scenario.name for scenario in found] == [
+        "cold",
+        "noop",
+        "touched_page",
+        "languages",
+        "touched_catalog",
+    ]
+    cold, noop, touched_page, languages, touched_catalog = found
+    assert cold.command == noop.command == touched_page.command
+    assert noop.prepare is None
+    source_dir = tmp_path / "source"
+    snapshot = tmp_path / "cache" / "translation_stats_snapshot.json"
+    sphinx_args = ["-D", f"translation_stats_snapshot={snapshot}", "-E"]
+    html_dir = tmp_path / "html"
+    assert cold.command[-5:] == [*sphinx_args, str(source_dir), str(html_dir)]
+    script = source_dir / "scripts" / "build" / "build_languages.py"
+    assert languages.command[1] == str(script)
+    assert languages.command[-8:] == ["en", "es", "ja", "--", "-q", *sphinx_args]
+    # Only the first translation is built again, in the same directories
+    assert touched_catalog.command[:-6] == languages.command[:-8]
+    assert touched_catalog.command[-6:] == ["es", "--", "-q", *sphinx_args]
+    # Every build runs in the copy of the guide
+    assert {scenario.cwd for scenario in found} == {source_dir}
+
+
+def test_no_catalog_scenario_without_translations(tmp_path):
+    found = scenarios(tmp_path, ["en"], "index.md", "index.po", [])
+    assert "touched_catalog" not in [scenario.name for scenario in found]
+
+
+def test_cold_builds_start_from_nothing(tmp_path):
+    found = scenarios(tmp_path, ["en", "es"], "index.md", "index.po", [])
+    cold = found[0]
+    for name in ("html", "cache"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "index.html").write_text("")
+
+    cold.prepare()
+
+    assert not (tmp_path / "html").exists()
+    # The caches of the extensions are not those of the other builds
+    assert not (tmp_path / "cache").exists()
+    for scenario in found:
+        assert scenario.env["SPHINX_CACHE_DIR"] == str(tmp_path / "cache")
+
+    # The languages compute the stats they share again too
+    snapshot = tmp_path / "cache" / "translation_stats_snapshot.json"
+    snapshot.parent.mkdir()
+    snapshot.write_text("{}")
+    languages = found[3]
+    languages.prepare()
+    assert not snapshot.exists()
+
+
+def test_edits_change_the_content_each_time(tmp_path):
+    path = tmp_path / "page.md"
+    path.write_text("# Page\n")
+    add_line = edit(path, "\nEdit {}\n")
+
+    contents = []
+    for _ in range(3):
+        add_line()
+        contents.append(path.read_text())
+
+    assert contents == [f"# Page\n\nEdit {n}\n" for n in (1, 2, 3)]
+
+
+def test_only_the_copy_of_the_guide_is_edited(tmp_path):
+    base_dir = run_build_benchmarks.BASE_DIR
+    page = "tutorials/intro.md"
+    po_path = Path("locales", "es", "LC_MESSAGES", "tutorials.po")
+    originals = {path: (base_dir / path).read_bytes() for path in (page, po_path)}
+
+    copy_source(tmp_path / "source")
+    found = scenarios(tmp_path, ["en", "es"], page, "tutorials.po", [])
+    for scenario in found:
+        if scenario.name.startswith("touched_"):
+            scenario.prepare()
+
+    assert (tmp_path / "source" / "conf.py").is_file()
+    assert not (tmp_path / "source" / "_build").exists()
+    for path, content in originals.items():
+        assert (base_dir / path).read_bytes() == content
+        assert (tmp_path / "source" / path).read_bytes() != content
+
+
+def test_best_time_of_each_scenario():
+    prepared = []
+    found = [
+        Scenario("a", [sys.executable, "-c", "pass"], lambda: prepared.append("a")),
+        Scenario("b", [sys.executable, "-c", "pass"]),
+    ]
+
+    results = run_build_benchmarks.run(found, repeat=2)
+
+    assert list(results) == ["a", "b"]
+    assert prepared == ["a", "a"]
+
+
+def test_slower_runs_are_not_the_baseline():
+    history = [
+        {"date": "1", "results": {"cold": 10.0}, "regressions": []},
+        {"date": "2", "results": {"cold": 20.0}, "regressions": ["cold: slower"]},
+    ]
+    assert baseline(history)["date"] == "1"
+    assert baseline(history[1:]) is None
+    assert baseline([]) is None
+
+
+def test_history_records_and_compares(tmp_path, monkeypatch, capsys):
+    timings = iter([{"cold": 10.0, "noop": 1.0}, {"cold": 20.0, "noop": 1.0}] * 2)
+    monkeypatch.setattr(
+        run_build_benchmarks, "run", lambda found, repeat: next(timings)
+    )
+    monkeypatch.setattr(run_build_benchmarks, "copy_source", lambda dest: None)
+    history_path = tmp_path / "history.json"
+    args = ["--history", str(history_path), "--language", "en"]
+
+    assert run_build_benchmarks.main(args) == 0
+    assert run_build_benchmarks.main(args) == 1
+    assert "cold: 20000.00 ms, was 10000.00 ms (+100%)" in capsys.readouterr().out
+    # Still compared with the first run, until a slower one is accepted
+    assert run_build_benchmarks.main(args) == 0
+    assert run_build_benchmarks.main([*args, "--accept"]) == 0
+
+    history = json.loads(history_path.read_text())
+    assert [run["results"]["cold"] for run in history] == [10.0, 20.0, 10.0, 20.0]
+    assert [bool(run["regressions"]) for run in history] == [False, True, False, False]
+    assert baseline(history)["results"]["cold"] == 20.0
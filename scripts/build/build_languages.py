@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+"""Build the guide for several languages, in this process or in parallel processes.
+
+By default the languages are built one after the other in this process, so that
+Sphinx, the extensions and everything they import (myst_nb, the theme, plotly,
+matplotlib...) are loaded once rather than once per language. Sphinx keeps the
+translations it loaded for the whole process, so they are dropped before each
+build, with the caches of the extensions in _ext. With ``--isolated`` (or
+``--jobs`` other than 1), each language gets a sphinx-build process of its own
+instead, a bounded number of them (``--jobs``) running at the same time, so that
+no build sees what another left in memory.
+
+Each language is built into its own output directory (``<out-dir>/<language>``,
+the English guide being ``<out-dir>`` itself), with its own doctrees and a log of
+its own in ``<out-dir>/../logs/<language>.log``. The first failure stops the
+builds still running and those not started yet. A summary of the result and
+wall time of each language is printed at the end.
+
+Arguments after ``--`` are passed on to every build, as to sphinx-build:
+
+    python scripts/build/build_languages.py es ja -- --keep-going
+    python scripts/build/build_languages.py --isolated --jobs 2 es ja
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+OUTPUT_DIR = BASE_DIR / "_build" / "html"
+# The modules of _ext that keep what they computed for the whole process
+CACHED_EXTENSIONS = {
+    "_ext.git_dates": "_loaded_dates",
+    "_ext.translation_graph": "_loaded_stats",
+}
+
+
+@dataclass
+class LanguageBuild:
+    language: str
+    out_dir: Path
+    log_path: Path
+    status: str = "not started"
+    seconds: float = 0.0
+
+    @property
+    def doctree_dir(self) -> Path:
+        return self.out_dir / ".doctrees"
+
+
+def plan(languages: list[str], out_dir: Path) -> list[LanguageBuild]:
+    log_dir = out_dir.parent / "logs"
+    return [
+        LanguageBuild(
+            language=language,
+            out_dir=out_dir if language == "en" else out_dir / language,
+            log_path=log_dir / f"{language}.log",
+        )
+        for language in languages
+    ]
+
+
+def sphinx_build_args(
+    build: LanguageBuild, sphinx_args: list[str], source_dir: Path = BASE_DIR
+) -> list[str]:
+    """The sphinx-build arguments of a build, without the program name."""
+    return [
+        "-b",
+        "html",
+        "-d",
+        str(build.doctree_dir),
+        "-D",
+        f"language={build.language}",
+        *sphinx_args,
+        str(source_dir),
+        str(build.out_dir),
+    ]
+
+
+def git_release() -> str:
+    """The release conf.py would compute, so that it runs git once, not per build."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return result.stdout.strip()
+
+
+def forget_previous_build() -> None:
+    """Drop what an earlier build in this process left loaded.
+
+    ``sphinx.locale.init`` only adds catalogs to the translator it loaded first for
+    a domain, so without this every language would get the messages of the first.
+    """
+    import sphinx.locale
+
+    sphinx.locale.translators.clear()
+    for module_name, attr in CACHED_EXTENSIONS.items():
+        if module := sys.modules.get(module_name):
+            getattr(module, attr).clear()
+
+
+class InProcessBuilds:
+    """Runs the builds one after the other in this process."""
+
+    def __init__(self, sphinx_args: list[str], source_dir: Path = BASE_DIR):
+        self.sphinx_args = sphinx_args
+        self.source_dir = source_dir
+
+    def run_one(self, build: LanguageBuild) -> int:
+        from sphinx.cmd.build import build_main
+
+        forget_previous_build()
+        # conf.py reads the language of the build from the environment
+        os.environ["SPHINX_LANG"] = build.language
+        with (
+            open(build.log_path, "w") as log,
+            contextlib.redirect_stdout(log),
+            contextlib.redirect_stderr(log),
+        ):
+            try:
+                args = sphinx_build_args(build, self.sphinx_args, self.source_dir)
+                return build_main(args)
+            except (Exception, SystemExit):
+                traceback.print_exc()
+                return 1
+
+    def run(self, builds: list[LanguageBuild]) -> None:
+        failed = False
+        for build in builds:
+            if failed:
+                build.status = "cancelled"
+                continue
+            build.log_path.parent.mkdir(parents=True, exist_ok=True)
+            print(f"Building [{build.language}] guide", flush=True)
+            start = time.perf_counter()
+            returncode = self.run_one(build)
+            build.seconds = time.perf_counter() - start
+            if returncode == 0:
+                build.status = "ok"
+            else:
+                build.status = f"failed ({returncode})"
+                failed = True
+
+
+class IsolatedBuilds:
+    """Runs each build in a sphinx-build process, a bounded number at a time."""
+
+    def __init__(
+        self, sphinx_args: list[str], jobs: int, source_dir: Path = BASE_DIR
+    ):
+        self.sphinx_args = sphinx_args
+        self.jobs = jobs
+        self.source_dir = source_dir
+        self.failed = threading.Event()
+        self.lock = threading.Lock()
+        self.running: set[subprocess.Popen] = set()
+
+    def command(self, build: LanguageBuild) -> list[str]:
+        args = sphinx_build_args(build, self.sphinx_args, self.source_dir)
+        return ["sphinx-build", *args]
+
+    def run_one(self, build: LanguageBuild) -> None:
+        build.log_path.parent.mkdir(parents=True, exist_ok=True)
+        env = {**os.environ, "SPHINX_LANG": build.language}
+        start = time.perf_counter()
+        with self.lock:
+            if self.failed.is_set():
+                build.status = "cancelled"
+                return
+            with open(build.log_path, "w") as log:
+                process = subprocess.Popen(
+                    self.command(build),
+                    cwd=BASE_DIR,
+                    env=env,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+            self.running.add(process)
+        returncode = process.wait()
+        build.seconds = time.perf_counter() - start
+        with self.lock:
+            self.running.discard(process)
+            if returncode == 0:
+                build.status = "ok"
+            elif self.failed.is_set():
+                # Terminated because another language failed first
+                build.status = "cancelled"
+            else:
+                build.status = f"failed ({returncode})"
+                self.failed.set()
+                for other in self.running:
+                    other.terminate()
+
+    def run(self, builds: list[LanguageBuild]) -> None:
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            list(pool.map(self.run_one, builds))
+
+
+def summary(builds: list[LanguageBuild], wall_time: float) -> str:
+    lines = [f"{'language':10} {'result':14} {'time':>9}  log"]
+    for build in builds:
+        seconds = f"{build.seconds:8.1f}s" if build.seconds else f"{'-':>9}"
+        lines.append(
+            f"{build.language:10} {build.status:14} {seconds}  {build.log_path}"
+        )
+    lines.append(f"{'total':10} {'':14} {wall_time:8.1f}s")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        usage="%(prog)s [options] LANGUAGE [LANGUAGE ...] [-- SPHINX_ARGS]",
+    )
+    parser.add_argument("languages", nargs="+", metavar="LANGUAGE")
+    parser.add_argument(
+        "--isolated",
+        action="store_true",
+        help="build each language in a sphinx-build process of its own",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="languages built at the same time, in separate processes (0: one per "
+        "CPU); other than 1, implies --isolated",
+    )
+    parser.add_argument("--out-dir", type=Path, default=OUTPUT_DIR)
+    argv = sys.argv[1:] if argv is None else argv
+    sphinx_args = []
+    if "--" in argv:
+        argv, sphinx_args = argv[: argv.index("--")], argv[argv.index("--") + 1 :]
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    builds = plan(args.languages, args.out_dir.absolute())
+    os.environ.setdefault("SPHINX_RELEASE", git_release())
+    start = time.perf_counter()
+    if args.isolated or jobs != 1:
+        print(f"Building {', '.join(args.languages)} with {jobs} jobs", flush=True)
+        IsolatedBuilds(sphinx_args, jobs).run(builds)
+    else:
+        print(f"Building {', '.join(args.languages)} in this process", flush=True)
+        InProcessBuilds(sphinx_args).run(builds)
+    print(summary(builds, time.perf_counter() - start))
+
+    failed = [build for build in builds if build.status.startswith("failed")]
+    for build in failed:
+        print(f"\n[{build.language}] build failed, end of {build.log_path}:")
+        print("".join(build.log_path.read_text().splitlines(True)[-20:]), end="")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Build the guide twice from scratch and report the files that came out different.
+
+Both builds run with the same ``SOURCE_DATE_EPOCH`` (the time of the last commit,
+unless it is already set), which pins the dates the build would otherwise stamp,
+so any difference is something the build does not do reproducibly.
+
+Extra arguments are passed on to sphinx-build, for example:
+
+    python scripts/build/check_reproducible.py -D language=es
+"""
+
+from __future__ import annotations
+
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def source_date_epoch() -> str:
+    """The pinned build time, from the environment or the last commit."""
+    if epoch := os.environ.get("SOURCE_DATE_EPOCH"):
+        return epoch
+    result = subprocess.run(
+        ["git", "log", "-1", "--format=%ct"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+def build(out_dir: Path, sphinx_args: list[str], env: dict[str, str]) -> None:
+    """A clean build, with its own doctrees, so no state carries over."""
+    subprocess.run(
+        ["sphinx-build", "-q", "-E", "-b", "html", "-d", str(out_dir / ".doctrees")]
+        + sphinx_args
+        + [str(BASE_DIR), str(out_dir / "html")],
+        env=env,
+        check=True,
+    )
+
+
+def differences(first: Path, second: Path) -> list[str]:
+    """The files that differ, or that only one of the two trees has."""
+    found = []
+    pending = [filecmp.dircmp(first, second)]
+    while pending:
+        comparison = pending.pop()
+        relative = Path(comparison.left).relative_to(first)
+        for name in comparison.left_only:
+            found.append(f"only in the first build: {relative / name}")
+        for name in comparison.right_only:
+            found.append(f"only in the second build: {relative / name}")
+        # dircmp only compares sizes and modification times, so compare contents
+        _, mismatch, errors = filecmp.cmpfiles(
+            comparison.left, comparison.right, comparison.common_files, shallow=False
+        )
+        found.extend(f"differs: {relative / name}" for name in mismatch + errors)
+        pending.extend(comparison.subdirs.values())
+    return sorted(found)
+
+
+def main(argv: list[str] | None = None) -> int:
+    sphinx_args = sys.argv[1:] if argv is None else argv
+    env = {**os.environ, "SOURCE_DATE_EPOCH": source_date_epoch()}
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = Path(tmp, "first"), Path(tmp, "second")
+        for out_dir in (first, second):
+            print(f"Building into {out_dir}", flush=True)
+            build(out_dir, sphinx_args, env)
+        found = differences(first / "html", second / "html")
+
+    if found:
+        print(f"{len(found)} files are not reproducible:")
+        print("\n".join(f"  {line}" for line in found))
+        return 1
+    print(f"Both builds are identical (SOURCE_DATE_EPOCH={env['SOURCE_DATE_EPOCH']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
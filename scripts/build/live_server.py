@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+"""Serve the guide in several languages on one port, rebuilding them as files change.
+
+The English guide is served at ``/`` and each translation at ``/<language>/``, from
+the directories build_languages.py builds them into. A single watcher follows the
+changes to the repository and routes each one to the builds it affects:
+
+- a ``.po`` file in ``locales/<language>/`` rebuilds that language only
+- any other source (pages, conf.py, static files, templates) rebuilds every
+  language, each one incrementally, so only the pages affected are written again
+- build outputs (``_build``, the ``.mo`` files the builds compile) and editor
+  files are ignored
+
+Changes are collected until the files have been quiet for ``--debounce``
+milliseconds. At most ``--jobs`` builds (sphinx-build processes) run at the same
+time; a language that changes while it is building is built again once it is
+done. Open pages reload when their language has been rebuilt.
+
+Arguments after ``--`` are passed on to every build, as to sphinx-build:
+
+    python scripts/build/live_server.py en es ja -- -D some_setting=value
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+import webbrowser
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+
+from build_languages import (
+    BASE_DIR,
+    OUTPUT_DIR,
+    LanguageBuild,
+    git_release,
+    plan,
+    sphinx_build_args,
+)
+
+# Top-level directories whose changes never affect the guide
+IGNORED_DIRS = {"_build", ".nox", ".git", "build_assets", "tmp", "node_modules"}
+# Files the builds write themselves, or that editors write next to the sources
+IGNORED_SUFFIXES = (".mo", ".pyc", ".swp", ".swx", ".tmp", "~")
+
+RELOAD_PATH = "/websocket-reload"
+# Reconnects to the server, and reloads when told its language was rebuilt
+RELOAD_SCRIPT = f"""
+<script>
+const reload = new WebSocket(
+  `ws://${{location.host}}{RELOAD_PATH}?path=${{location.pathname}}`
+);
+reload.onmessage = () => window.location.reload();
+</script>
+"""
+
+
+def languages_for(path: Path, languages: Iterable[str]) -> set[str]:
+    """The languages to build again after a change to a file of the repository."""
+    try:
+        parts = path.resolve().relative_to(BASE_DIR).parts
+    except ValueError:
+        return set()
+    if (
+        not parts
+        or parts[0] in IGNORED_DIRS
+        or any(part == "__pycache__" for part in parts)
+        or path.name.startswith(".#")
+        or path.name.endswith(IGNORED_SUFFIXES)
+    ):
+        return set()
+    if parts[0] == "locales":
+        if len(parts) > 2 and path.suffix == ".po" and parts[1] in languages:
+            return {parts[1]}
+        return set()
+    return set(languages)
+
+
+def language_of(url_path: str, languages: Iterable[str]) -> str:
+    """The language of a page of the server, from the first part of its path."""
+    first = url_path.strip("/").split("/", 1)[0]
+    return first if first in languages and first != "en" else "en"
+
+
+class LiveBuilds:
+    """Builds the languages asked for, ``jobs`` at a time, each at most once at once."""
+
+    def __init__(
+        self,
+        builds: list[LanguageBuild],
+        run_build: Callable[[LanguageBuild], Awaitable[int]],
+        jobs: int,
+        on_built: Callable[[LanguageBuild], None] = lambda build: None,
+    ):
+        self.builds = {build.language: build for build in builds}
+        self.run_build = run_build
+        self.on_built = on_built
+        self.slots = asyncio.Semaphore(jobs)
+        self.waiting: set[str] = set()
+        self.running: set[str] = set()
+        # Changed while building, to build again when done
+        self.again: set[str] = set()
+        self.tasks: set[asyncio.Task] = set()
+
+    def request(self, languages: Iterable[str]) -> None:
+        for language in languages:
+            if language in self.waiting:
+                continue  # Its build has not started yet, it will see the change
+            if language in self.running:
+                self.again.add(language)
+                continue
+            self.waiting.add(language)
+            task = asyncio.create_task(self.build(self.builds[language]))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def build(self, build: LanguageBuild) -> None:
+        async with self.slots:
+            self.waiting.discard(build.language)
+            self.running.add(build.language)
+            start = time.perf_counter()
+            returncode = await self.run_build(build)
+            build.seconds = time.perf_counter() - start
+            build.status = "ok" if returncode == 0 else f"failed ({returncode})"
+            self.running.discard(build.language)
+        self.on_built(build)
+        if build.language in self.again:
+            self.again.discard(build.language)
+            self.request([build.language])
+
+    async def wait(self) -> None:
+        while self.tasks:
+            await asyncio.gather(*self.tasks)
+
+
+async def sphinx_build(build: LanguageBuild, sphinx_args: list[str]) -> int:
+    """An incremental build of a language, in a sphinx-build process."""
+    build.log_path.parent.mkdir(parents=True, exist_ok=True)
+    env = {**os.environ, "SPHINX_LANG": build.language}
+    with open(build.log_path, "w") as log:
+        process = await asyncio.create_subprocess_exec(
+            "sphinx-build",
+            *sphinx_build_args(build, sphinx_args),
+            cwd=BASE_DIR,
+            env=env,
+            stdout=log,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        return await process.wait()
+
+
+def reload_middleware(app, script: bytes):
+    """Add the reload script at the end of the HTML pages served by an ASGI app."""
+    from starlette.datastructures import MutableHeaders
+
+    async def middleware(scope, receive, send):
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+        is_html = False
+
+        async def send_with_script(message):
+            nonlocal is_html
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                is_html = headers.get("content-type", "").startswith("text/html")
+                if is_html and "content-length" in headers:
+                    length = int(headers["content-length"]) + len(script)
+                    headers["content-length"] = str(length)
+            elif (
+                message["type"] == "http.response.body"
+                and is_html
+                and not message.get("more_body", False)
+            ):
+                message["body"] += script
+            await send(message)
+
+        await app(scope, receive, send_with_script)
+
+    return middleware
+
+
+def make_app(
+    builds: list[LanguageBuild], sphinx_args: list[str], jobs: int, debounce: int
+):
+    import watchfiles
+    from starlette.applications import Starlette
+    from starlette.responses import RedirectResponse
+    from starlette.routing import Mount, Route, WebSocketRoute
+    from starlette.staticfiles import StaticFiles
+    from starlette.websockets import WebSocketDisconnect
+
+    languages = [build.language for build in builds]
+    clients: dict[str, set] = {language: set() for language in languages}
+
+    def on_built(build: LanguageBuild) -> None:
+        print(f"[{build.language}] {build.status} in {build.seconds:.1f}s", flush=True)
+        if build.status != "ok":
+            print(f"[{build.language}] see {build.log_path}", flush=True)
+            return
+        for websocket in list(clients[build.language]):
+            asyncio.create_task(websocket.send_text("reload"))
+
+    live = LiveBuilds(
+        builds, lambda build: sphinx_build(build, sphinx_args), jobs, on_built
+    )
+
+    async def watch() -> None:
+        async for changes in watchfiles.awatch(
+            BASE_DIR,
+            watch_filter=lambda _, path: bool(languages_for(Path(path), languages)),
+            debounce=debounce,
+        ):
+            affected: set[str] = set()
+            for _, path in changes:
+                affected |= languages_for(Path(path), languages)
+            changed = sorted(os.path.relpath(path, BASE_DIR) for _, path in changes)
+            to_build = sorted(affected, key=languages.index)
+            print(
+                f"Changed {', '.join(changed)}, building {', '.join(to_build)}",
+                flush=True,
+            )
+            live.request(to_build)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        live.request(languages)
+        watcher = asyncio.create_task(watch())
+        yield
+        watcher.cancel()
+
+    async def reload(websocket) -> None:
+        path = websocket.query_params.get("path", "/")
+        language = language_of(path, languages)
+        await websocket.accept()
+        clients[language].add(websocket)
+        try:
+            async for _ in websocket.iter_text():
+                pass
+        except WebSocketDisconnect:
+            pass
+        finally:
+            clients[language].discard(websocket)
+
+    async def english(request):
+        return RedirectResponse(f"/{request.path_params['path']}")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    app = Starlette(
+        routes=[
+            WebSocketRoute(RELOAD_PATH, reload),
+            Route("/en/{path:path}", english),
+            Mount("/", StaticFiles(directory=OUTPUT_DIR, html=True)),
+        ],
+        lifespan=lifespan,
+    )
+    return reload_middleware(app, RELOAD_SCRIPT.encode())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        usage="%(prog)s [options] LANGUAGE [LANGUAGE ...] [-- SPHINX_ARGS]",
+    )
+    parser.add_argument("languages", nargs="+", metavar="LANGUAGE")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="languages built at the same time (0: half the CPUs, at least one)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=int,
+        default=1000,
+        help="milliseconds without changes before building",
+    )
+    parser.add_argument("--open-browser", action="store_true")
+    argv = sys.argv[1:] if argv is None else argv
+    sphinx_args = []
+    if "--" in argv:
+        argv, sphinx_args = argv[: argv.index("--")], argv[argv.index("--") + 1 :]
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    jobs = args.jobs or max(1, (os.cpu_count() or 1) // 2)
+    builds = plan(args.languages, OUTPUT_DIR)
+    os.environ.setdefault("SPHINX_RELEASE", git_release())
+    app = make_app(builds, sphinx_args, jobs, args.debounce)
+    url = f"http://{args.host}:{args.port}/"
+    print(f"Serving {', '.join(args.languages)} at {url} ({jobs} builds at a time)")
+    if args.open_browser:
+        webbrowser.open(url)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Tests for the builds of the guide in several languages."""
+
+from __future__ import annotations
+
+import os
+import sys
+
+import build_languages
+from build_languages import InProcessBuilds, IsolatedBuilds, plan
+
+# What each stand-in build does instead of running sphinx-build
+SCRIPTS = {
+    "ok": "print('built')",
+    "fails": "import sys; print('broken'); sys.exit(2)",
+    "slow": "import time; time.sleep(30)",
+}
+
+
+class FakeBuilds(IsolatedBuilds):
+    def command(self, build):
+        return [sys.executable, "-c", SCRIPTS[build.language.split("-")[0]]]
+
+
+def test_each_language_gets_its_own_directories(tmp_path):
+    en, es = plan(["en", "es"], tmp_path / "html")
+    assert en.out_dir == tmp_path / "html"
+    assert es.out_dir == tmp_path / "html" / "es"
+    assert es.doctree_dir == tmp_path / "html" / "es" / ".doctrees"
+    assert es.log_path == tmp_path / "logs" / "es.log"
+
+
+def test_all_languages_are_built(tmp_path):
+    builds = plan(["ok-1", "ok-2", "ok-3"], tmp_path / "html")
+    FakeBuilds([], jobs=2).run(builds)
+    assert [build.status for build in builds] == ["ok", "ok", "ok"]
+    assert builds[0].log_path.read_text() == "built\n"
+
+
+def test_the_first_failure_stops_the_other_builds(tmp_path):
+    builds = plan(["slow", "fails", "ok"], tmp_path / "html")
+    FakeBuilds([], jobs=2).run(builds)
+    assert [build.status for build in builds] == [
+        "cancelled",
+        "failed (2)",
+        "cancelled",
+    ]
+    assert builds[0].seconds < 30
+    assert builds[1].log_path.read_text() == "broken\n"
+
+
+def test_in_process_builds_stop_at_the_first_failure(tmp_path, monkeypatch):
+    from sphinx.cmd import build as sphinx_build
+
+    built = []
+
+    def build_main(argv):
+        language = argv[argv.index("-D") + 1].removeprefix("language=")
+        built.append((language, os.environ["SPHINX_LANG"]))
+        print(f"building {language}")
+        return 2 if language == "fails" else 0
+
+    monkeypatch.setattr(sphinx_build, "build_main", build_main)
+    monkeypatch.setenv("SPHINX_LANG", "en")
+    builds = plan(["ok", "fails", "ok-2"], tmp_path / "html")
+    InProcessBuilds([]).run(builds)
+    assert built == [("ok", "ok"), ("fails", "fails")]
+    assert [build.status for build in builds] == ["ok", "failed (2)", "cancelled"]
+    assert builds[1].log_path.read_text() == "building fails\n"
+
+
+def test_languages_are_built_in_this_process_unless_isolated(tmp_path, monkeypatch):
+    used = []
+    for builds in (InProcessBuilds, IsolatedBuilds):
+        monkeypatch.setattr(builds, "run", lambda self, builds: used.append(self))
+
+    out_dir = ["--out-dir", str(tmp_path / "html")]
+    for args in ([], ["--isolated"], ["--jobs", "2"]):
+        assert build_languages.main([*out_dir, *args, "es", "ja"]) == 0
+
+    assert [type(builds) for builds in used] == [
+        InProcessBuilds,
+        IsolatedBuilds,
+        IsolatedBuilds,
+    ]
+    assert [builds.jobs for builds in used[1:]] == [1, 2]
+
+
+PO = """
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "Hello"
+msgstr "{translation}"
+"""
+TRANSLATIONS = {"es": "Hola", "ja": "こんにちは"}
+
+
+def make_project(sphinx_project):
+    catalogs = {
+        f"locales/{language}/LC_MESSAGES/index.po": PO.format(translation=translation)
+        for language, translation in TRANSLATIONS.items()
+    }
+    return sphinx_project({"index": "Index\n=====\n\nHello\n"}, catalogs).srcdir
+
+
+def translated_pages(builds):
+    return {
+        build.language: (build.out_dir / "index.html").read_text(encoding="utf-8")
+        for build in builds
+    }
+
+
+def assert_each_language_is_translated(builds):
+    assert [build.status for build in builds] == ["ok", "ok"]
+    pages = translated_pages(builds)
+    for language, translation in TRANSLATIONS.items():
+        others = set(TRANSLATIONS.values()) - {translation}
+        assert translation in pages[language], language
+        assert not any(other in pages[language] for other in others), language
+
+
+def test_isolated_builds_are_translated(tmp_path, sphinx_project):
+    srcdir = make_project(sphinx_project)
+    builds = plan(["es", "ja"], tmp_path / "html")
+    IsolatedBuilds(["-q"], jobs=1, source_dir=srcdir).run(builds)
+    assert_each_language_is_translated(builds)
+
+
+def test_in_process_builds_do_not_share_translations(
+    tmp_path, monkeypatch, sphinx_project
+):
+    srcdir = make_project(sphinx_project)
+    monkeypatch.setenv("SPHINX_LANG", "en")
+    builds = plan(["es", "ja"], tmp_path / "html")
+    InProcessBuilds(["-q"], source_dir=srcdir).run(builds)
+    assert_each_language_is_translated(builds)
@@ -0,0 +1,33 @@
+"""Tests for the comparison of two builds."""
+
+from __future__ import annotations
+
+import os
+
+from check_reproducible import differences
+
+
+def write(root, files):
+    for path, content in files.items():
+        path = root / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def test_identical_trees_have_no_differences(tmp_path):
+    files = {"index.html": "same", "_static/app.js": "same"}
+    write(tmp_path / "a", files)
+    write(tmp_path / "b", files)
+    assert differences(tmp_path / "a", tmp_path / "b") == []
+
+
+def test_contents_are_compared_not_just_sizes_and_times(tmp_path):
+    write(tmp_path / "a", {"feed/tutorials.rss": "2024", "a.html": "a"})
+    write(tmp_path / "b", {"feed/tutorials.rss": "2025", "b.html": "b"})
+    for path in (tmp_path / "a" / "feed", tmp_path / "b" / "feed"):
+        os.utime(path / "tutorials.rss", (0, 0))
+    assert differences(tmp_path / "a", tmp_path / "b") == [
+        "differs: feed/tutorials.rss",
+        "only in the first build: a.html",
+        "only in the second build: b.html",
+    ]
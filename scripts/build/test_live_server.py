@@ -0,0 +1,82 @@
+"""Tests for the live preview server of the guide in several languages."""
+
+from __future__ import annotations
+
+import asyncio
+
+from build_languages import BASE_DIR, plan
+from live_server import LiveBuilds, language_of, languages_for, reload_middleware
+
+LANGUAGES = ["en", "es", "ja"]
+
+
+def test_changes_are_routed_to_the_languages_they_affect():
+    assert languages_for(BASE_DIR / "tutorials" / "intro.md", LANGUAGES) == {
+        "en",
+        "es",
+        "ja",
+    }
+    assert languages_for(BASE_DIR / "conf.py", LANGUAGES) == set(LANGUAGES)
+    po = BASE_DIR / "locales" / "es" / "LC_MESSAGES" / "tutorials.po"
+    assert languages_for(po, LANGUAGES) == {"es"}
+    # Outputs of the builds, languages not served, editor files
+    assert not languages_for(po.with_suffix(".mo"), LANGUAGES)
+    assert not languages_for(BASE_DIR / "_build" / "html" / "index.html", LANGUAGES)
+    assert not languages_for(BASE_DIR / "locales" / "fr" / "x.po", LANGUAGES)
+    assert not languages_for(BASE_DIR / "index.md.swp", LANGUAGES)
+    assert not languages_for(BASE_DIR / "_ext" / "__pycache__" / "x.pyc", LANGUAGES)
+
+
+def test_pages_belong_to_the_language_of_their_path():
+    assert language_of("/", LANGUAGES) == "en"
+    assert language_of("/tutorials/intro.html", LANGUAGES) == "en"
+    assert language_of("/es/tutorials/intro.html", LANGUAGES) == "es"
+    assert language_of("/ja/", LANGUAGES) == "ja"
+    assert language_of("/fr/index.html", LANGUAGES) == "en"
+
+
+def test_changes_during_a_build_build_the_language_once_more(tmp_path):
+    builds = plan(LANGUAGES, tmp_path / "html")
+    started, built = [], []
+
+    async def run_build(build):
+        started.append(build.language)
+        await asyncio.sleep(0.01)
+        return 0 if build.language != "ja" else 1
+
+    async def scenario():
+        live = LiveBuilds(builds, run_build, 1, lambda build: built.append(build))
+        live.request(["en", "es"])
+        live.request(["en"])  # Not started yet: the same build
+        await asyncio.sleep(0.005)
+        live.request(["en", "ja"])  # en is building: once more after it
+        live.request(["en"])
+        await live.wait()
+
+    asyncio.run(scenario())
+
+    assert started == ["en", "es", "ja", "en"]
+    assert [build.language for build in built] == ["en", "es", "ja", "en"]
+    assert [build.status for build in builds] == ["ok", "ok", "failed (1)"]
+
+
+def test_the_reload_script_is_added_to_html_pages():
+    async def app(scope, receive, send):
+        content_type = b"text/html" if scope["path"].endswith(".html") else b"text/css"
+        headers = [(b"content-type", content_type), (b"content-length", b"6")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"<p></p"})
+
+    def get(path):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = reload_middleware(app, b"<script/>")
+        asyncio.run(middleware({"type": "http", "path": path}, None, send))
+        start, body = sent
+        return dict(start["headers"])[b"content-length"], body["body"]
+
+    assert get("/index.html") == (b"15", b"<p></p<script/>")
+    assert get("/style.css") == (b"6", b"<p></p")
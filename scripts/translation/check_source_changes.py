@@ -5,15 +5,33 @@ Run over a list of changed files by the GitHub Action ``track-english-changes.ym
 which posts the report itself to a tracking issue once the change is on ``main``.
 
 The tracking issue is the lowest numbered issue with the label ``po-refresh-tracker``.
+
+The changed files are read one per line, from a file or from standard input (``-``),
+so a listing of tens of thousands of paths is matched as it is read:
+
+    git diff --name-only main... | python scripts/translation/check_source_changes.py -
+
+To catch up on changes the workflow missed, ``--range`` reports on every commit of
+a range, read from a single ``git log`` run, then on the range as a whole:
+
+    python scripts/translation/check_source_changes.py --range v1.0..main
 """
 
 from __future__ import annotations
 
+import json
+import os
+import subprocess
 import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 LOCALES_DIR = BASE_DIR / "locales"
+# The English sources of the catalogs, kept until a catalog, page or section is
+# added or removed
+SOURCES_CACHE_PATH = BASE_DIR / "_build" / ".cache" / "translated_sources.json"
 
 
 MAX_ROWS = 20
@@ -33,13 +51,46 @@ def english_source(stem: str) -> Path | None:
     return section if section.is_dir() else None
 
 
-def translated_sources() -> dict[str, str]:
-    """Map each repo-relative English source path to the ``.po`` stem it feeds."""
+def sources_key() -> dict[str, int]:
+    """The modification times of the directories the English sources depend on.
+
+    Adding or removing a ``.po`` file changes the time of its directory, and adding
+    or removing a page or section that of the repository root.
+    """
+    key = {".": BASE_DIR.stat().st_mtime_ns}
+    for directory, _, _ in os.walk(LOCALES_DIR):
+        key[os.path.relpath(directory, BASE_DIR)] = os.stat(directory).st_mtime_ns
+    return key
+
+
+def translated_sources(
+    cache_path: Path | None = SOURCES_CACHE_PATH,
+) -> dict[str, str]:
+    """Map each repo-relative English source path to the ``.po`` stem it feeds.
+
+    The map is cached in ``cache_path`` until `sources_key` changes. Pass ``None``
+    to look at every catalog without touching the cache.
+    """
+    key = sources_key() if cache_path is not None else None
+    if cache_path is not None:
+        try:
+            cache = json.loads(cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cache = {}
+        if isinstance(cache, dict) and cache.get("key") == key:
+            return cache["sources"]
+
     found = {}
-    for stem in po_stems():
+    for stem in sorted(po_stems()):
         source = english_source(stem)
         if source is not None:
             found[str(source.relative_to(BASE_DIR))] = stem
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({"key": key, "sources": found}))
+        os.replace(tmp_path, cache_path)
     return found
 
 
@@ -48,8 +99,23 @@ def locale_codes() -> list[str]:
     return sorted(path.name for path in LOCALES_DIR.iterdir() if path.is_dir())
 
 
+def source_stem(path: str, sources: dict[str, str]) -> str | None:
+    """The ``.po`` stem of the source a path is, or sits below, if any.
+
+    Each leading part of the path (``a``, ``a/b``, ``a/b/c.md``) is looked up in
+    the sources, the shortest first, so the cost depends on the depth of the path
+    and not on the number of sources.
+    """
+    prefix = ""
+    for part in path.split("/"):
+        prefix = f"{prefix}/{part}" if prefix else part
+        if prefix in sources:
+            return sources[prefix]
+    return None
+
+
 def affected(
-    changed: list[str], sources: dict[str, str] | None = None
+    changed: Iterable[str], sources: dict[str, str] | None = None
 ) -> dict[str, list[str]]:
     """Group the changed paths by the ``.po`` stem whose source they belong to.
 
@@ -60,13 +126,108 @@ def affected(
     known = translated_sources() if sources is None else sources
     hits: dict[str, list[str]] = {}
     for path in changed:
-        for source, stem in known.items():
-            if path == source or path.startswith(f"{source}/"):
-                hits.setdefault(stem, []).append(path)
-                break
+        stem = source_stem(path, known)
+        if stem is not None:
+            hits.setdefault(stem, []).append(path)
     return {stem: sorted(paths) for stem, paths in sorted(hits.items())}
 
 
+@dataclass
+class CommitHits:
+    commit: str
+    subject: str
+    hits: dict[str, list[str]]
+
+
+# Starts the line of each commit in the log, before its hash and subject
+COMMIT_MARK = "\x00"
+
+
+def log_changes(lines: Iterable[str]) -> Iterator[tuple[str, str, list[str]]]:
+    """The hash, subject and changed paths of each commit of a ``git log``.
+
+    The log is the output of ``git log --name-only --format=%x00%H %s``.
+    """
+    commit = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith(COMMIT_MARK):
+            if commit is not None:
+                yield commit
+            sha, _, subject = line[len(COMMIT_MARK) :].partition(" ")
+            commit = (sha, subject, [])
+        elif line and commit is not None:
+            commit[2].append(line)
+    if commit is not None:
+        yield commit
+
+
+def range_hits(
+    revision_range: str, sources: dict[str, str] | None = None, cwd: Path = BASE_DIR
+) -> Iterator[CommitHits]:
+    """The catalogs each commit of a range could affect, oldest commit first.
+
+    Commits that affect none are left out, as are merge commits, whose changes are
+    those of the commits they merge.
+    """
+    known = translated_sources() if sources is None else sources
+    command = [
+        "git",
+        "-c",
+        "core.quotePath=false",
+        "log",
+        "--reverse",
+        "--no-renames",
+        "--name-only",
+        "--format=%x00%H %s",
+        revision_range,
+    ]
+    with subprocess.Popen(
+        command, cwd=cwd, stdout=subprocess.PIPE, text=True, encoding="utf-8"
+    ) as log:
+        for commit, subject, paths in log_changes(log.stdout):
+            hits = affected(paths, known)
+            if hits:
+                yield CommitHits(commit, subject, hits)
+    if log.returncode:
+        raise subprocess.CalledProcessError(log.returncode, command)
+
+
+def combine(commits: Iterable[CommitHits]) -> dict[str, list[str]]:
+    """The paths of several commits together, grouped by catalog."""
+    combined: dict[str, set[str]] = {}
+    for commit in commits:
+        for stem, paths in commit.hits.items():
+            combined.setdefault(stem, set()).update(paths)
+    return {stem: sorted(paths) for stem, paths in sorted(combined.items())}
+
+
+def render_commits(commits: list[CommitHits]) -> str:
+    """A table of the commits of a range and the catalogs each could affect."""
+    if not commits:
+        return ""
+    rows = []
+    for commit in commits:
+        subject = commit.subject.replace("|", "\\|")
+        catalogs = ", ".join(f"`{stem}.po`" for stem in commit.hits)
+        rows.append(f"| `{commit.commit[:12]}` | {subject} | {catalogs} |")
+    table = "\n".join(rows)
+    return f"""### Commits that changed English text
+
+| Commit | Subject | Catalogs it belongs to |
+| :--- | :--- | :--- |
+{table}
+"""
+
+
+def read_paths(lines: Iterable[str]) -> Iterable[str]:
+    """The paths listed one per line, skipping blank lines."""
+    for line in lines:
+        path = line.strip()
+        if path:
+            yield path
+
+
 def render_report(hits: dict[str, list[str]], locales: list[str]) -> str:
     """The comment left on the tracking issue, or an empty string when no hits."""
     if not hits:
@@ -102,15 +263,35 @@ you can simply close the issue directly.
 def main(argv: list[str]) -> int:
     """Print the report for the paths listed in the file named by ``argv[1]``.
 
+    The paths are read from standard input when the file is ``-``. With
+    ``--range A..B``, the commits of the range are listed before the report on
+    all of them.
+
     Always succeeds (return 0). We do not fail in CI and cause a red mark on
     a pull request for something its author very likely did not do wrong.
     """
+    if len(argv) == 3 and argv[1] == "--range":
+        try:
+            commits = list(range_hits(argv[2]))
+        except subprocess.CalledProcessError:
+            return 0
+        report = render_report(combine(commits), locale_codes())
+        if report:
+            print(render_commits(commits), report, sep="\n", end="")
+        return 0
     if len(argv) != 2:
-        print(f"usage: {Path(argv[0]).name} CHANGED_FILES", file=sys.stderr)
+        name = Path(argv[0]).name
+        usage = f"usage: {name} CHANGED_FILES|-, or {name} --range A..B"
+        print(usage, file=sys.stderr)
         return 0
-    listing = Path(argv[1])
-    changed = listing.read_text(encoding="utf-8").split() if listing.is_file() else []
-    report = render_report(affected(changed), locale_codes())
+    if argv[1] == "-":
+        hits = affected(read_paths(sys.stdin))
+    elif Path(argv[1]).is_file():
+        with open(argv[1], encoding="utf-8") as listing:
+            hits = affected(read_paths(listing))
+    else:
+        hits = {}
+    report = render_report(hits, locale_codes())
     if report:
         print(report, end="")
     return 0
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""Report the translatable messages a change adds, removes or changes, per catalog.
+
+`check_source_changes.py` tells which catalogs (``.po`` files) a change could
+affect. This tells what it does to them: the messages of the changed pages are
+extracted at both revisions, from the local git repository, and compared the way
+a catalog refresh would compare them:
+
+- a message only at the head revision is added, to be translated
+- a message of the base revision that the head revision has a close match for
+  (as babel and msgmerge match them) is changed: its translation is kept, marked
+  fuzzy, to be reviewed
+- any other message of the base revision is removed, with its translation
+
+A message still found in another page of the same catalog is none of those.
+For each locale, the report counts the translations the refresh would drop or
+mark fuzzy, so a change that only touched code samples, links or formatting,
+which leaves the messages as they are, needs no refresh at all.
+
+    python scripts/translation/message_impact.py main
+    python scripts/translation/message_impact.py main~3 main --locales es ja
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import subprocess
+import sys
+import tarfile
+import tempfile
+from dataclasses import dataclass, field
+from difflib import get_close_matches
+from pathlib import Path
+
+from babel.messages import pofile
+from babel.messages.catalog import Catalog
+from check_source_changes import (
+    BASE_DIR,
+    LOCALES_DIR,
+    affected,
+    locale_codes,
+    source_stem,
+    translated_sources,
+)
+
+# The files Sphinx reads pages from
+SOURCE_SUFFIXES = (".md", ".rst", ".ipynb")
+# Files of the repository the pages need to be read, other than the pages
+SUPPORT_FILES = ["bibliography.bib"]
+# How babel (and msgmerge) match a new message with an old one
+FUZZY_CUTOFF = 0.6
+
+MAX_ROWS = 20
+
+
+@dataclass
+class CatalogImpact:
+    stem: str
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    # (old message, new message), the old translation kept as fuzzy
+    changed: list[tuple[str, str]] = field(default_factory=list)
+    # Per locale, the translations removed and those marked fuzzy
+    lost: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+
+def git(*args: str) -> bytes:
+    return subprocess.run(
+        ["git", *args], cwd=BASE_DIR, check=True, capture_output=True
+    ).stdout
+
+
+def changed_paths(base: str, head: str) -> list[str]:
+    # A renamed page is a removed page and an added one, for its messages
+    output = git("diff", "--name-only", "--no-renames", "-z", base, head)
+    return [path for path in output.decode().split("\0") if path]
+
+
+def tree_files(revision: str, paths: list[str]) -> list[str]:
+    """The files at a revision, among the given files and below the directories."""
+    if not paths:
+        return []
+    output = git("ls-tree", "-r", "--name-only", "-z", revision, "--", *paths)
+    return [path for path in output.decode().split("\0") if path]
+
+
+def tree_pages(revision: str, paths: list[str]) -> list[str]:
+    pages = tree_files(revision, paths)
+    return [path for path in pages if path.endswith(SOURCE_SUFFIXES)]
+
+
+def export(revision: str, paths: list[str], dest: Path) -> None:
+    """Write files as they are at a revision into a directory."""
+    if not paths:
+        return
+    archive = git("archive", "--format=tar", revision, "--", *paths)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest, filter="data")
+
+
+def extract_messages(srcdir: Path) -> dict[str, set[str]]:
+    """The messages of each page in a directory, by its path in the directory.
+
+    The pages are read with the configuration of the guide, so the messages are
+    the same as those of ``nox -s update-language``.
+    """
+    from sphinx.application import Sphinx
+
+    outdir = srcdir.parent / "gettext"
+    # Sphinx needs a root document, this one without any message
+    (srcdir / "index.rst").write_text(":orphan:\n")
+    app = Sphinx(
+        srcdir,
+        BASE_DIR,
+        outdir,
+        outdir / ".doctrees",
+        "gettext",
+        confoverrides={"gettext_compact": False, "nb_execution_mode": "off"},
+        status=None,
+        warning=None,
+        freshenv=True,
+    )
+    app.build(force_all=True)
+    return {
+        Path(app.env.doc2path(docname, False)).as_posix(): {
+            message.text for message in catalog
+        }
+        for docname, catalog in app.builder.catalogs.items()
+        if docname in app.env.found_docs and docname != app.config.root_doc
+    }
+
+
+def diff_messages(
+    old: set[str], new: set[str]
+) -> tuple[list[str], list[str], list[tuple[str, str]]]:
+    """The messages added, removed and changed when a catalog goes from old to new.
+
+    As in babel's ``Catalog.update``, each new message is matched with the closest
+    old one, by their lowercase text, and an old message may match several.
+    """
+    gone = {message.lower().strip(): message for message in old - new}
+    added, changed, matched = [], [], set()
+    for message in sorted(new - old):
+        close = get_close_matches(message.lower().strip(), gone, 1, FUZZY_CUTOFF)
+        if close:
+            changed.append((gone[close[0]], message))
+            matched.add(gone[close[0]])
+        else:
+            added.append(message)
+    removed = sorted(old - new - matched)
+    return added, removed, changed
+
+
+def read_catalog(path: Path) -> Catalog:
+    with open(path, "rb") as f:
+        catalog = pofile.read_po(f)
+    if catalog.charset and catalog.charset.lower() != "utf-8":
+        # Read again, decoding with the charset its header declares
+        with open(path, "rb") as f:
+            catalog = pofile.read_po(f, charset=catalog.charset)
+    return catalog
+
+
+def translations_lost(
+    impact: CatalogImpact, locales: list[str], locales_dir: Path = LOCALES_DIR
+) -> dict[str, tuple[int, int]]:
+    """Per locale, the translated messages removed, and those made fuzzy."""
+    lost = {}
+    changed = {old for old, _ in impact.changed}
+    for locale in locales:
+        po_path = locales_dir / locale / "LC_MESSAGES" / f"{impact.stem}.po"
+        if not po_path.is_file():
+            continue
+        translated = {
+            message.id
+            for message in read_catalog(po_path)
+            if message.id and message.string and not message.fuzzy
+        }
+        lost[locale] = (
+            len(translated.intersection(impact.removed)),
+            len(translated & changed),
+        )
+    return lost
+
+
+def message_impact(base: str, head: str, locales: list[str]) -> list[CatalogImpact]:
+    """What the changes from ``base`` to ``head`` do to each catalog they touch."""
+    sources = translated_sources()
+    touched = affected(changed_paths(base, head), sources)
+    if not touched:
+        return []
+    changed = [path for paths in touched.values() for path in paths]
+    # The other pages of the catalogs are the same at both revisions
+    catalog_sources = [s for s, stem in sources.items() if stem in touched]
+    unchanged = sorted(set(tree_pages(head, catalog_sources)) - set(changed))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srcdir = Path(tmp) / "source"
+        export(base, tree_pages(base, changed), srcdir / "base")
+        export(head, tree_pages(head, changed), srcdir / "head")
+        export(head, unchanged, srcdir / "unchanged")
+        export(head, tree_files(head, SUPPORT_FILES), srcdir)
+        pages = extract_messages(srcdir)
+
+    messages = {
+        group: {stem: set() for stem in touched}
+        for group in ("base", "head", "unchanged")
+    }
+    for path, page_messages in pages.items():
+        group, _, source = path.partition("/")
+        stem = source_stem(source, sources)
+        if group in messages and stem in touched:
+            messages[group][stem] |= page_messages
+
+    impacts = []
+    for stem in touched:
+        unchanged_messages = messages["unchanged"][stem]
+        old = messages["base"][stem] | unchanged_messages
+        new = messages["head"][stem] | unchanged_messages
+        impact = CatalogImpact(stem, *diff_messages(old, new))
+        impact.lost = translations_lost(impact, locales)
+        impacts.append(impact)
+    return impacts
+
+
+def _quote(message: str, width: int = 80) -> str:
+    text = " ".join(message.split())
+    text = text if len(text) <= width else f"{text[: width - 1]}…"
+    return f"`{text}`" if "`" not in text else text
+
+
+def render_report(impacts: list[CatalogImpact]) -> str:
+    """The report, in Markdown, with an all-clear when no message changed."""
+    changed = [i for i in impacts if i.added or i.removed or i.changed]
+    if not changed:
+        return "No translatable message changed, the catalogs need no refresh.\n"
+    sections = []
+    for impact in changed:
+        lines = [
+            f"### `{impact.stem}.po`: {len(impact.added)} added, "
+            f"{len(impact.removed)} removed, {len(impact.changed)} changed",
+            "",
+        ]
+        if impact.lost:
+            lines += [
+                "| Locale | Translations removed | Translations to review |",
+                "| :--- | ---: | ---: |",
+                *(
+                    f"| {locale} | {removed} | {fuzzy} |"
+                    for locale, (removed, fuzzy) in impact.lost.items()
+                ),
+                "",
+            ]
+        rows = (
+            [f"- added: {_quote(message)}" for message in impact.added]
+            + [f"- removed: {_quote(message)}" for message in impact.removed]
+            + [
+                f"- changed: {_quote(old)} → {_quote(new)}"
+                for old, new in impact.changed
+            ]
+        )
+        lines += rows[:MAX_ROWS]
+        if len(rows) > MAX_ROWS:
+            lines.append(f"- and {len(rows) - MAX_ROWS} more")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", help="the revision the change starts from")
+    parser.add_argument("head", nargs="?", default="HEAD")
+    parser.add_argument(
+        "--locales", nargs="+", metavar="LOCALE", help="default: every locale"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        impacts = message_impact(args.base, args.head, args.locales or locale_codes())
+    except subprocess.CalledProcessError as error:
+        print(error.stderr.decode(errors="replace"), end="", file=sys.stderr)
+        return 1
+    print(render_report(impacts), end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import io
+import os
+import subprocess
+
 import check_source_changes as check
 
 # A stand-in for the real repository layout: one page, one section.
@@ -44,6 +48,105 @@ def test_several_sources_are_grouped_by_catalog():
     }
 
 
+def test_the_source_of_a_deep_path_is_found_by_its_leading_parts():
+    sources = {**SOURCES, "documentation/write": "write"}
+    assert check.source_stem("documentation/write/a/b.md", sources) == "documentation"
+    assert check.source_stem("documentation", sources) == "documentation"
+    assert check.source_stem("documentation-old/a.md", sources) is None
+    assert check.source_stem("", sources) is None
+
+
+def test_the_paths_are_read_one_per_line_as_they_come(monkeypatch, capsys):
+    lines = iter(["index.md\n", "\n", "  documentation/a b.md \n", "noxfile.py\n"])
+    assert check.affected(check.read_paths(lines), SOURCES) == {
+        "documentation": ["documentation/a b.md"],
+        "index": ["index.md"],
+    }
+
+    monkeypatch.setattr(check.sys, "stdin", io.StringIO("documentation/x.md\n"))
+    assert check.main(["check_source_changes.py", "-"]) == 0
+    assert "`documentation/x.md` | `documentation.po`" in capsys.readouterr().out
+
+
+def test_the_sources_are_cached_until_a_catalog_is_added(tmp_path, monkeypatch):
+    base = tmp_path / "repo"
+    messages = base / "locales" / "es" / "LC_MESSAGES"
+    messages.mkdir(parents=True)
+    (messages / "index.po").touch()
+    (base / "index.md").touch()
+    (base / "tutorials").mkdir()
+    monkeypatch.setattr(check, "BASE_DIR", base)
+    monkeypatch.setattr(check, "LOCALES_DIR", base / "locales")
+    cache_path = tmp_path / "cache" / "sources.json"
+
+    assert check.translated_sources(cache_path) == {"index.md": "index"}
+    cache_mtime = cache_path.stat().st_mtime_ns
+    assert check.translated_sources(cache_path) == {"index.md": "index"}
+    assert cache_path.stat().st_mtime_ns == cache_mtime
+
+    (messages / "tutorials.po").touch()
+    os.utime(messages, ns=(1, 1))  # A new time, however coarse the clock
+    assert check.translated_sources(cache_path) == {
+        "index.md": "index",
+        "tutorials": "tutorials",
+    }
+    assert check.translated_sources(None) == check.translated_sources(cache_path)
+
+
+def test_the_log_is_split_into_commits():
+    log = [
+        "\x00aaa Add a page\n",
+        "\n",
+        "index.md\n",
+        "documentation/a.md\n",
+        "\x00bbb Merge branch 'x'\n",
+        "\x00ccc Fix | typo\n",
+        "\n",
+        "noxfile.py\n",
+    ]
+    assert list(check.log_changes(log)) == [
+        ("aaa", "Add a page", ["index.md", "documentation/a.md"]),
+        ("bbb", "Merge branch 'x'", []),
+        ("ccc", "Fix | typo", ["noxfile.py"]),
+    ]
+
+
+def test_a_range_is_reported_per_commit_and_as_a_whole(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    def commit(message, **files):
+        for name, text in files.items():
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        git("add", "-A")
+        git("-c", "user.name=A", "-c", "user.email=a@b", "commit", "-m", message)
+
+    git("init", "-q")
+    commit("Start", **{"index.md": "1"})
+    commit("Edit the index", **{"index.md": "2", "noxfile.py": "x"})
+    commit("Only tooling", **{"noxfile.py": "y"})
+    commit("Edit | docs", **{"documentation/a.md": "1", "index.md": "3"})
+
+    commits = list(check.range_hits("HEAD~3..HEAD", SOURCES, cwd=tmp_path))
+
+    assert [(c.subject, c.hits) for c in commits] == [
+        ("Edit the index", {"index": ["index.md"]}),
+        (
+            "Edit | docs",
+            {"documentation": ["documentation/a.md"], "index": ["index.md"]},
+        ),
+    ]
+    assert check.combine(commits) == {
+        "documentation": ["documentation/a.md"],
+        "index": ["index.md"],
+    }
+    table = check.render_commits(commits)
+    assert f"| `{commits[1].commit[:12]}` | Edit \\| docs | " in table
+    assert table.endswith("| `documentation.po`, `index.po` |\n")
+
+
 def test_no_report_when_nothing_relevant_changed():
     assert check.render_report({}, ["es", "pt"]) == ""
 
@@ -0,0 +1,74 @@
+"""Tests for the report of the messages a change adds, removes or changes."""
+
+from __future__ import annotations
+
+from babel.messages import pofile
+from babel.messages.catalog import Catalog
+
+from message_impact import (
+    CatalogImpact,
+    diff_messages,
+    extract_messages,
+    render_report,
+    translations_lost,
+)
+
+
+def test_messages_are_added_removed_or_changed_as_a_refresh_sees_them():
+    old = {"Create a Python package", "Add a README file", "Keep me"}
+    new = {"Create a Python package!", "Publish on conda-forge", "Keep me"}
+
+    added, removed, changed = diff_messages(old, new)
+
+    assert added == ["Publish on conda-forge"]
+    assert removed == ["Add a README file"]
+    assert changed == [("Create a Python package", "Create a Python package!")]
+    assert diff_messages(old, old) == ([], [], [])
+
+
+def test_translations_lost_are_counted_per_locale(tmp_path):
+    catalog = Catalog(locale="es")
+    catalog.add("Add a README file", "Añade un README")
+    catalog.add("Create a Python package", "Crea un paquete", flags=["fuzzy"])
+    catalog.add("Publish your package", "")
+    catalog.add("Keep me", "Guárdame")
+    po_path = tmp_path / "es" / "LC_MESSAGES" / "tutorials.po"
+    po_path.parent.mkdir(parents=True)
+    with open(po_path, "wb") as f:
+        pofile.write_po(f, catalog)
+    impact = CatalogImpact(
+        "tutorials",
+        removed=["Add a README file", "Publish your package"],
+        changed=[("Create a Python package", "Create a Python package!")],
+    )
+
+    # A fuzzy or empty translation is not one to lose
+    assert translations_lost(impact, ["es", "ja"], tmp_path) == {"es": (1, 0)}
+
+
+def test_the_report_lists_the_messages_and_the_translations_lost():
+    impact = CatalogImpact(
+        "tutorials",
+        added=["Publish on conda-forge"],
+        changed=[("Create a package", "Create a package!")],
+        lost={"es": (0, 1), "ja": (0, 0)},
+    )
+    report = render_report([impact, CatalogImpact("index")])
+
+    assert "### `tutorials.po`: 1 added, 0 removed, 1 changed" in report
+    assert "| es | 0 | 1 |" in report
+    assert "- changed: `Create a package` → `Create a package!`" in report
+    assert "index.po" not in report
+    assert "need no refresh" in render_report([CatalogImpact("index")])
+
+
+def test_messages_are_extracted_with_the_guide_configuration(tmp_path):
+    srcdir = tmp_path / "source"
+    (srcdir / "head" / "tutorials").mkdir(parents=True)
+    (srcdir / "head" / "tutorials" / "intro.md").write_text(
+        "# Python packaging\n\nSome *text*.\n\n```python\nimport this\n```\n"
+    )
+
+    pages = extract_messages(srcdir)
+
+    assert pages == {"head/tutorials/intro.md": {"Python packaging", "Some *text*."}}